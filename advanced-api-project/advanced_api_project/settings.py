@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'advanced_api_project.instrumentation.QueryMetricsMiddleware',  # Query count / latency per view
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -140,3 +141,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
+
+# Request instrumentation (see advanced_api_project/instrumentation.py)
+# A staff-only per-view summary at /admin/metrics/, plus Server-Timing
+# headers while DEBUG is on (they expose DB timings to every client)
+QUERY_METRICS_WINDOW = 1000
+QUERY_METRICS_SERVER_TIMING = DEBUG
@@ -11,6 +11,7 @@ Test Classes:
     - BookSearchingTestCase: Tests for search functionality
     - BookOrderingTestCase: Tests for ordering functionality
     - BookPermissionsTestCase: Tests for authentication and permissions
+    - BookQueryScalingTestCase: Query counts stay flat as data grows
 
 Run tests with: python manage.py test api
 """
@@ -21,6 +22,7 @@ from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from api.models import Author, Book
+from advanced_api_project.testing import QueryScalingTestMixin
 from datetime import datetime
 
 
@@ -887,3 +889,48 @@ class BookCombinedFeaturesTestCase(APITestCase):
         # Verify ordering
         years = [book['publication_year'] for book in response.data['results']]
         self.assertEqual(years, sorted(years, reverse=True))
+
+
+class BookQueryScalingTestCase(QueryScalingTestMixin, APITestCase):
+    """
+    Every /api/ endpoint must run a constant number of queries.
+
+    Requests each endpoint with N and then 10N authors and books, as an
+    authenticated user so the write endpoints get past the permission
+    check, and fails if any query count grows (e.g. a serializer field
+    that looks up the author per book).
+    """
+
+    def setUp(self):
+        """Authenticate and start with no seeded data."""
+        self.user = User.objects.create_user(username='scaler', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.seeded = 0
+
+    def seed(self, count):
+        """Add ``count`` authors with two books each."""
+        for _ in range(count):
+            self.seeded += 1
+            author = Author.objects.create(name=f'Author {self.seeded}')
+            Book.objects.create(
+                title=f'Book {self.seeded}', publication_year=2000, author=author
+            )
+            Book.objects.create(
+                title=f'Sequel {self.seeded}', publication_year=2001, author=author
+            )
+
+    def url_kwargs(self, name, kwarg):
+        """Point every detail endpoint at the first seeded book."""
+        if kwarg == 'pk':
+            return Book.objects.order_by('pk').values_list('pk', flat=True).first()
+        raise AssertionError(f'No URL kwarg value for {name}: {kwarg}')
+
+    def test_api_queries_do_not_scale_with_data(self):
+        """
+        Verifies:
+            - Every endpoint is requested
+            - No endpoint's query count grows with 10x the books
+        """
+        counts = self.assertQueriesDoNotScale()
+        self.assertIn('api:book-list', counts)
+        self.assertEqual(counts['api:book-detail'][0], status.HTTP_200_OK)
@@ -18,11 +18,12 @@ from rest_framework import generics, permissions, filters
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django_filters import rest_framework as django_filters
 from django_filters.rest_framework import DjangoFilterBackend
+from advanced_api_project.instrumentation import InstrumentedViewMixin
 from .models import Book
 from .serializers import BookSerializer
 
 
-class BookListView(generics.ListAPIView):
+class BookListView(InstrumentedViewMixin, generics.ListAPIView):
     """
     ListView for retrieving all books with advanced filtering, searching, and ordering.
     
@@ -82,7 +83,7 @@ class BookListView(generics.ListAPIView):
     ordering = ['title']  # Default ordering by title (ascending)
 
 
-class BookDetailView(generics.RetrieveAPIView):
+class BookDetailView(InstrumentedViewMixin, generics.RetrieveAPIView):
     """
     DetailView for retrieving a single book by ID.
     
@@ -108,7 +109,7 @@ class BookDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]  # Read-only for everyone, write for authenticated
 
 
-class BookCreateView(generics.CreateAPIView):
+class BookCreateView(InstrumentedViewMixin, generics.CreateAPIView):
     """
     CreateView for adding a new book.
     
@@ -159,7 +160,7 @@ class BookCreateView(generics.CreateAPIView):
         serializer.save()
 
 
-class BookUpdateView(generics.UpdateAPIView):
+class BookUpdateView(InstrumentedViewMixin, generics.UpdateAPIView):
     """
     UpdateView for modifying an existing book.
     
@@ -218,7 +219,7 @@ class BookUpdateView(generics.UpdateAPIView):
         serializer.save()
 
 
-class BookDeleteView(generics.DestroyAPIView):
+class BookDeleteView(InstrumentedViewMixin, generics.DestroyAPIView):
     """
     DeleteView for removing a book.
     
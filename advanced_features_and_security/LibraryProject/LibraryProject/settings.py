@@ -28,6 +28,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'LibraryProject.instrumentation.QueryMetricsMiddleware',  # Query count / latency per view
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -281,3 +282,9 @@ CSP_UPGRADE_INSECURE_REQUESTS = True
 
 # Include nonce in script and style tags for inline content
 CSP_INCLUDE_NONCE_IN = ['script-src', 'style-src']
+
+# Request instrumentation (see LibraryProject/instrumentation.py)
+# A staff-only per-view summary at /admin/metrics/, plus Server-Timing
+# headers while DEBUG is on (they expose DB timings to every client)
+QUERY_METRICS_WINDOW = 1000
+QUERY_METRICS_SERVER_TIMING = DEBUG
@@ -0,0 +1,178 @@
+"""
+Per-request query and latency instrumentation.
+
+QueryMetricsMiddleware counts every database query a request runs and
+times it, along with the total request latency. Each response can get a
+``Server-Timing`` header that browser dev tools and curl can show:
+
+    Server-Timing: db;dur=4.1;desc="6 queries", total;dur=12.7
+
+Samples are also kept in an in-process rolling window per view, readable by
+staff users at the metrics endpoint (``metrics_view``). That makes N+1
+regressions visible as a jump in the per-view query count.
+
+This is a trimmed copy of social_media_api/social_media_api/instrumentation.py
+without the DRF serializer timing, which this project has no use for.
+
+Server-Timing reveals DB timings to every client, so it is only sent
+when QUERY_METRICS_SERVER_TIMING is set (off in production settings).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+
+# Upper bounds (ms) of the latency histogram buckets; the last is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class RequestMetrics:
+    """
+    Counters for a single request.
+    """
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """Database execute wrapper that counts and times each query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe rolling window of request samples per view.
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self._samples = defaultdict(self._new_window)
+        self._lock = threading.Lock()
+
+    def _new_window(self):
+        return deque(maxlen=self.window or getattr(settings, 'QUERY_METRICS_WINDOW', 1000))
+
+    def record(self, view_name, total_ms, metrics):
+        sample = (
+            total_ms,
+            metrics.db_time * 1000,
+            metrics.db_queries,
+        )
+        with self._lock:
+            self._samples[view_name].append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self):
+        """
+        Summarize every view's window.
+
+        Returns:
+            dict: {view_name: {requests, latency_ms, db_ms, queries,
+            latency_histogram}}
+        """
+        with self._lock:
+            samples = {name: list(window) for name, window in self._samples.items()}
+
+        summary = {}
+        for name, rows in samples.items():
+            totals, db_times, queries = zip(*rows)
+            histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            for total in totals:
+                histogram[bisect_left(LATENCY_BUCKETS_MS, total)] += 1
+            labels = [f'<={bound}' for bound in LATENCY_BUCKETS_MS]
+            labels.append(f'>{LATENCY_BUCKETS_MS[-1]}')
+
+            summary[name] = {
+                'requests': len(rows),
+                'latency_ms': _percentiles(totals),
+                'db_ms': _percentiles(db_times),
+                'queries': {
+                    'mean': round(sum(queries) / len(queries), 2),
+                    'max': max(queries),
+                },
+                'latency_histogram': dict(zip(labels, histogram)),
+            }
+        return summary
+
+
+def _percentiles(values):
+    ordered = sorted(values)
+    last = len(ordered) - 1
+
+    def pick(fraction):
+        return round(ordered[min(last, int(round(fraction * last)))], 3)
+
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'max': round(ordered[-1], 3)}
+
+
+registry = MetricsRegistry()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+class QueryMetricsMiddleware:
+    """
+    Record DB query count, DB time and total latency for every request.
+
+    Place it near the top of MIDDLEWARE so the total covers the rest of the
+    stack. Set QUERY_METRICS_SERVER_TIMING = True to emit the Server-Timing
+    header; leave it off where timings shouldn't be exposed publicly.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.db_wrapper))
+            response = self.get_response(request)
+
+        total_ms = (time.perf_counter() - start) * 1000
+        registry.record(_view_name(request), total_ms, metrics)
+
+        if getattr(settings, 'QUERY_METRICS_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries", '
+                f'total;dur={total_ms:.1f}'
+            )
+        return response
+
+
+def metrics_view(request):
+    """
+    Staff-only JSON summary of the rolling per-view metrics.
+
+    GET ?reset=1 clears the window after reading it.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_staff:
+        return JsonResponse({'detail': 'Staff access required.'}, status=403)
+
+    data = registry.snapshot()
+    if request.GET.get('reset'):
+        registry.clear()
+    return JsonResponse({'views': data})
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'django_blog.instrumentation.QueryMetricsMiddleware',  # Query count / latency per view
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -130,3 +131,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'profile'
 LOGOUT_REDIRECT_URL = 'home'
+
+# Request instrumentation (see django_blog/instrumentation.py)
+# A staff-only per-view summary at /admin/metrics/, plus Server-Timing
+# headers while DEBUG is on (they expose DB timings to every client)
+QUERY_METRICS_WINDOW = 1000
+QUERY_METRICS_SERVER_TIMING = DEBUG
@@ -17,7 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .instrumentation import metrics_view
+
 urlpatterns = [
+    # Staff-only per-view query/latency metrics (before the admin catch-all)
+    path('admin/metrics/', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('', include('blog.urls')),
 ]
@@ -7,14 +7,19 @@ providing an interface for managing users.
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+
+from social_media_api.admin_utils import LargeTableAdminMixin, count_subquery
 from .models import CustomUser
 
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
     """
     Custom admin interface for CustomUser model.
     
-    Extends Django's UserAdmin to include custom fields.
+    Extends Django's UserAdmin to include custom fields. Follower and
+    following counts are per-row subqueries on the follow table, and
+    the followers field uses an autocomplete widget instead of listing
+    every user.
     """
     
     model = CustomUser
@@ -36,8 +41,20 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
     
-    # Configure the many-to-many widget for followers
-    filter_horizontal = ['followers', 'groups', 'user_permissions']
+    # Autocomplete for followers: a select box would render every user
+    autocomplete_fields = ['followers']
+    filter_horizontal = ['groups', 'user_permissions']
+    
+    def get_queryset(self, request):
+        """
+        Annotate follow counts, read by followers_count/following_count.
+        """
+        follows = CustomUser._meta.get_field('followers')
+        Follow = follows.remote_field.through
+        return super().get_queryset(request).annotate(
+            num_followers=count_subquery(Follow.objects.all(), follows.m2m_field_name()),
+            num_following=count_subquery(Follow.objects.all(), follows.m2m_reverse_field_name()),
+        )
 
 
 # Register the CustomUser model with the custom admin interface
@@ -0,0 +1,91 @@
+"""
+Remember-device tokens for fast repeat logins.
+
+After a successful password login that names a device_id, the login view
+issues a random device_token and returns it with the auth token. The
+cache keeps only an HMAC of the user id, device id, the user's current
+password hash and that random token, under a per-device key. A repeat
+login from the same device within LOGIN_DEVICE_CACHE_TTL seconds may send
+the device_token instead of the password; it is checked against the HMAC
+in microseconds instead of a full scrypt/argon2/PBKDF2 run, and replaced
+by a new token (each token works once).
+
+The stored value is never a function of the password, so the cache
+contents (even together with SECRET_KEY) offer no shortcut for guessing
+passwords; they only reveal HMACs of random 256-bit tokens. Binding the
+password hash into the HMAC means any password change (or a transparent
+rehash) invalidates every remembered device automatically.
+"""
+
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+User = get_user_model()
+
+
+def _cache_key(user_id, device_id):
+    device_digest = hashlib.sha256(device_id.encode('utf-8')).hexdigest()
+    return f'login_device:{user_id}:{device_digest}'
+
+
+def _verifier(user, device_id, device_token):
+    message = '\x00'.join([str(user.pk), device_id, user.password, device_token])
+    return hmac.new(
+        settings.SECRET_KEY.encode('utf-8'),
+        message.encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def _ttl():
+    return getattr(settings, 'LOGIN_DEVICE_CACHE_TTL', 0)
+
+
+def remember_device(user, device_id):
+    """
+    Remember a successful login from device_id.
+
+    Returns:
+        str: A new device_token for the client, or None if remembered
+        devices are disabled or no device_id was given
+    """
+    if not device_id or not _ttl():
+        return None
+    device_token = secrets.token_urlsafe(32)
+    cache.set(_cache_key(user.pk, device_id), _verifier(user, device_id, device_token), _ttl())
+    return device_token
+
+
+def authenticate_known_device(username, device_id, device_token):
+    """
+    Authenticate a repeat login from a remembered device without hashing.
+
+    Loads the user and their token in one query. Returns the user, with
+    auth_token already loaded, on a cache hit; the device_token is then
+    spent and the caller issues a new one with remember_device(). Returns
+    None if the device is unknown, the entry expired or the token doesn't
+    match; the caller then falls back to authenticate().
+    """
+    if not device_id or not device_token or not _ttl():
+        return None
+
+    user = (
+        User.objects.select_related('auth_token')
+        .filter(username=username, is_active=True)
+        .first()
+    )
+    if user is None:
+        return None
+
+    key = _cache_key(user.pk, device_id)
+    stored = cache.get(key)
+    if stored is None or not constant_time_compare(stored, _verifier(user, device_id, device_token)):
+        return None
+    cache.delete(key)
+    return user
@@ -0,0 +1,156 @@
+"""
+Profile picture processing pipeline.
+
+Uploaded profile pictures are stored as sent. After the upload commits, a
+background task renders square, center-cropped variants for every size in
+PROFILE_PICTURE_SIZES, as both JPEG and WebP. It records their storage
+paths in CustomUser.profile_picture_variants. Serializers expose the
+variant URLs, so feeds can load 64px avatars instead of
+multi-megabyte originals.
+
+The ``process_profile_pictures`` management command regenerates any
+variants that are missing, e.g. after a worker restart.
+"""
+
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from social_media_api.background import run_in_background
+from social_media_api.response_cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+DEFAULT_PROFILE_PICTURE_SIZES = {'thumb': 64, 'small': 128, 'medium': 256}
+
+# Output formats: (file extension, Pillow format, save options)
+VARIANT_FORMATS = (
+    ('jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+)
+
+
+def profile_picture_sizes():
+    """Return the configured {name: pixel size} mapping."""
+    return getattr(settings, 'PROFILE_PICTURE_SIZES', DEFAULT_PROFILE_PICTURE_SIZES)
+
+
+def render_variants(image_file, sizes):
+    """
+    Render every size/format variant of an image.
+
+    Returns:
+        dict: {size_name: {extension: bytes}}
+    """
+    with Image.open(image_file) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    rendered = {}
+    for name, size in sizes.items():
+        variant = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        rendered[name] = {}
+        for extension, image_format, options in VARIANT_FORMATS:
+            buffer = BytesIO()
+            variant.save(buffer, image_format, **options)
+            rendered[name][extension] = buffer.getvalue()
+    return rendered
+
+
+def generate_profile_picture_variants(user_id):
+    """
+    Build and store the variants for a user's current profile picture.
+
+    Safe to run repeatedly. If the user uploads a new picture while this
+    runs, the stale result is discarded and its files removed.
+    """
+    user = (
+        User.objects.filter(pk=user_id)
+        .only('id', 'profile_picture', 'profile_picture_variants')
+        .first()
+    )
+    if user is None or not user.profile_picture:
+        return
+
+    source_name = user.profile_picture.name
+    storage = user.profile_picture.storage
+
+    with user.profile_picture.open('rb') as image_file:
+        rendered = render_variants(image_file, profile_picture_sizes())
+
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    variants = {}
+    for name, formats in rendered.items():
+        variants[name] = {}
+        for extension, data in formats.items():
+            path = f'profile_pictures/variants/{user_id}/{stem}_{name}.{extension}'
+            variants[name][extension] = storage.save(path, ContentFile(data))
+
+    updated = User.objects.filter(pk=user_id, profile_picture=source_name).update(
+        profile_picture_variants=variants
+    )
+    if not updated:
+        # The picture changed underneath us; the newer task will replace it
+        delete_variant_files(storage, variants)
+        return
+    invalidate('user', user_id)
+    if user.profile_picture_variants:
+        # Regenerated (e.g. new sizes); drop the previous files
+        delete_variant_files(storage, user.profile_picture_variants)
+
+
+def delete_variant_files(storage, variants):
+    """Remove the files of a variants mapping from storage."""
+    for formats in variants.values():
+        for path in formats.values():
+            try:
+                storage.delete(path)
+            except OSError:
+                logger.warning('Could not delete profile picture variant %s', path)
+
+
+def schedule_profile_picture_processing(user):
+    """
+    Discard a user's old variants and render new ones in the background.
+
+    Call after saving a new profile_picture.
+    """
+    old_variants = user.profile_picture_variants
+    if old_variants:
+        storage = user._meta.get_field('profile_picture').storage
+        delete_variant_files(storage, old_variants)
+    User.objects.filter(pk=user.pk).update(profile_picture_variants={})
+    user.profile_picture_variants = {}
+
+    if user.profile_picture:
+        run_in_background(generate_profile_picture_variants, user.pk)
+
+
+def profile_picture_urls(user, request=None):
+    """
+    Return the original and per-size variant URLs for a user's picture.
+
+    Sizes that haven't been rendered yet are omitted; clients should fall
+    back to the original.
+    """
+    if not user.profile_picture:
+        return None
+
+    storage = user.profile_picture.storage
+
+    def absolute(url):
+        return request.build_absolute_uri(url) if request is not None else url
+
+    urls = {'original': absolute(user.profile_picture.url)}
+    for name, formats in (user.profile_picture_variants or {}).items():
+        urls[name] = {
+            extension: absolute(storage.url(path))
+            for extension, path in formats.items()
+        }
+    return urls
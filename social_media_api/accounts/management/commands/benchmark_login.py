@@ -0,0 +1,121 @@
+"""
+Django management command to benchmark login throughput.
+
+Measures, for the configured database and cache:
+- password verification per hasher profile (scrypt, argon2 if installed,
+  pbkdf2) with the tuned parameters from settings
+- the full /api/login/ view on a cold path (password hashing) and on the
+  known-device path (one-time device_token checked against a cached HMAC,
+  no hashing)
+
+A throwaway user is created and deleted again afterwards. Throttling is
+disabled for the benchmark requests.
+
+Usage:
+    python manage.py benchmark_login
+    python manage.py benchmark_login --iterations 200 --json results.json
+"""
+
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password, check_password
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from accounts.views import UserLoginView
+
+User = get_user_model()
+
+BENCHMARK_USERNAME = '__login_benchmark__'
+BENCHMARK_PASSWORD = 'benchmark-password-123'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark password hashers and the login endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Logins or verifications per measurement (default 50)'
+        )
+        parser.add_argument(
+            '--json',
+            dest='json_path',
+            help='Also write the results to this JSON file'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        results = {'iterations': iterations, 'hashers': {}, 'login_view': {}}
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Password verification'))
+        for profile, algorithm in (('scrypt', 'scrypt'), ('argon2', 'argon2'),
+                                   ('pbkdf2', 'pbkdf2_sha256')):
+            try:
+                hasher = get_hasher(algorithm)
+                encoded = make_password(BENCHMARK_PASSWORD, hasher=hasher)
+            except (ValueError, ImportError) as exc:
+                self.stdout.write(self.style.WARNING(f'  {profile:8} skipped ({exc})'))
+                continue
+            elapsed = self._time(lambda: check_password(BENCHMARK_PASSWORD, encoded), iterations)
+            results['hashers'][profile] = self._summary(elapsed, iterations)
+            self._report(profile, results['hashers'][profile])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Login view'))
+        User.objects.filter(username=BENCHMARK_USERNAME).delete()
+        user = User.objects.create_user(username=BENCHMARK_USERNAME, password=BENCHMARK_PASSWORD)
+        try:
+            view = UserLoginView.as_view(throttle_classes=[])
+            factory = APIRequestFactory()
+            payload = {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_PASSWORD}
+
+            device = {'device_id': 'benchmark-device'}
+
+            def login(data):
+                response = view(factory.post('/api/login/', data, format='json'))
+                assert response.status_code == 200, response.data
+                return response.data
+
+            def known_device_login():
+                # Each device_token works once; carry the new one forward
+                data = {'username': BENCHMARK_USERNAME, **device}
+                device['device_token'] = login(data)['device_token']
+
+            cases = (
+                ('cold', lambda: login(payload)),
+                ('known_device', known_device_login),
+            )
+            # Prime the device cache
+            device['device_token'] = login(dict(payload, **device))['device_token']
+            for name, func in cases:
+                elapsed = self._time(func, iterations)
+                results['login_view'][name] = self._summary(elapsed, iterations)
+                self._report(name, results['login_view'][name])
+        finally:
+            user.delete()
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✓ Results written to {options["json_path"]}'))
+
+    def _time(self, func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return time.perf_counter() - start
+
+    def _summary(self, elapsed, iterations):
+        return {
+            'ms_per_op': round(elapsed * 1000 / iterations, 3),
+            'ops_per_sec': round(iterations / elapsed, 1),
+        }
+
+    def _report(self, name, summary):
+        self.stdout.write(
+            f'  {name:14} {summary["ms_per_op"]:9.3f} ms/op  {summary["ops_per_sec"]:9.1f} ops/s'
+        )
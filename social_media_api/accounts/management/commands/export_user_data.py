@@ -0,0 +1,48 @@
+"""
+Django management command to export a user's data.
+
+Writes the user's profile, posts, comments, likes and notifications as
+gzip-compressed NDJSON, streamed with constant memory.
+
+Usage:
+    python manage.py export_user_data alice
+    python manage.py export_user_data alice --output /tmp/alice.ndjson.gz
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.exports import iter_user_records, iter_gzip_ndjson, export_filename
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Export a user's posts, comments, likes and notifications as gzipped NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User to export')
+        parser.add_argument(
+            '--output',
+            help='Output file (default: <username>-export.ndjson.gz)'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Stream the export to the output file.
+        """
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist')
+
+        path = options['output'] or export_filename(user)
+        written = 0
+        with open(path, 'wb') as handle:
+            for chunk in iter_gzip_ndjson(iter_user_records(user)):
+                handle.write(chunk)
+                written += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Exported {user.username} to {path} ({written} bytes)'
+        ))
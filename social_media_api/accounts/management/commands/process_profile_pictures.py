@@ -0,0 +1,48 @@
+"""
+Django management command to render missing profile picture variants.
+
+Variants are normally generated in the background right after upload. Run
+this command (e.g. from cron) to catch up on pictures whose background
+task was lost to a restart, or with --all after changing
+PROFILE_PICTURE_SIZES.
+
+Usage:
+    python manage.py process_profile_pictures
+    python manage.py process_profile_pictures --all
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from accounts.images import generate_profile_picture_variants
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and WebP variants for profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate variants for every user with a picture'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        if not options['all']:
+            users = users.filter(profile_picture_variants={})
+
+        processed = failed = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            try:
+                generate_profile_picture_variants(user_id)
+                processed += 1
+            except Exception as exc:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'  User {user_id}: {exc}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Processed {processed} profile picture(s), {failed} failed'
+        ))
@@ -5,11 +5,38 @@ This module defines a custom user model that extends Django's AbstractUser.
 It includes additional fields for social media functionality:
 - bio: A text field for user biography
 - profile_picture: An image field for user profile pictures
+- profile_picture_variants: Resized copies of the profile picture
 - followers: A many-to-many relationship for following other users
+- deleted_at: Soft-delete marker for accounts pending removal
 """
 
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.utils import timezone
+
+
+class CustomUserManager(UserManager):
+    """
+    User manager with helpers for serializing follow relationships.
+    """
+    
+    def with_follow_ids(self):
+        """
+        Prefetch follower and following ids (two queries in total).
+        
+        followers_count/following_count and the id lists in
+        UserProfileSerializer are then served from the prefetch cache
+        instead of four queries per user.
+        """
+        id_only = self.model.objects.only('id')
+        return self.get_queryset().prefetch_related(
+            models.Prefetch('followers', queryset=id_only),
+            models.Prefetch('following', queryset=id_only),
+        )
+    
+    def visible(self):
+        """Return users that have not been soft-deleted."""
+        return self.get_queryset().filter(deleted_at__isnull=True)
 
 
 class CustomUser(AbstractUser):
@@ -19,7 +46,12 @@ class CustomUser(AbstractUser):
     Attributes:
         bio (TextField): User's biography or description
         profile_picture (ImageField): User's profile picture
+        profile_picture_variants (JSONField): Storage paths of the resized
+            picture, {size: {format: path}}, filled in by accounts.images
         followers (ManyToManyField): Users who follow this user
+        deleted_at (DateTimeField): Set when the account is soft-deleted;
+            it is deactivated at once and removed later by
+            social_media_api.reaper
     """
     
     bio = models.TextField(
@@ -35,6 +67,13 @@ class CustomUser(AbstractUser):
         help_text="User profile picture"
     )
     
+    profile_picture_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized profile picture paths by size and format"
+    )
+    
     followers = models.ManyToManyField(
         'self',
         symmetrical=False,
@@ -43,20 +82,77 @@ class CustomUser(AbstractUser):
         help_text="Users who follow this user"
     )
     
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the account was soft-deleted (pending removal)"
+    )
+    
+    objects = CustomUserManager()
+    
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='accounts_user_deleted_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.username
     
     @property
     def followers_count(self):
-        """Return the number of followers."""
+        """
+        Return the number of followers.
+        
+        Uses the num_followers annotation (set by the admin changelist)
+        when present.
+        """
+        if hasattr(self, 'num_followers'):
+            return self.num_followers
         return self.followers.count()
     
     @property
     def following_count(self):
-        """Return the number of users this user follows."""
+        """
+        Return the number of users this user follows.
+        
+        Uses the num_following annotation when present.
+        """
+        if hasattr(self, 'num_following'):
+            return self.num_following
         return self.following.count()
+    
+    def soft_delete(self):
+        """
+        Deactivate the account and hide it and its posts immediately.
+        
+        The auth token is revoked so the account can no longer be used,
+        and cached detail responses of the hidden posts are invalidated.
+        Rows that reference the user are removed later by the reaper.
+        
+        Returns:
+            bool: False if the account was already soft-deleted
+        """
+        from rest_framework.authtoken.models import Token
+        from posts.models import Post
+        from social_media_api.response_cache import invalidate
+        
+        now = timezone.now()
+        updated = type(self).objects.filter(pk=self.pk, deleted_at__isnull=True).update(
+            deleted_at=now, is_active=False
+        )
+        self.deleted_at = now
+        self.is_active = False
+        if updated:
+            Token.objects.filter(user_id=self.pk).delete()
+            post_ids = list(Post.objects.filter(author_id=self.pk).values_list('pk', flat=True))
+            Post.all_objects.filter(pk__in=post_ids).update(deleted_at=now)
+            invalidate('post', *post_ids)
+        return bool(updated)
@@ -6,15 +6,41 @@ and profile management using Django REST Framework.
 """
 
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
 
+from .images import profile_picture_urls, schedule_profile_picture_processing
+
 # Get the custom user model
 User = get_user_model()
 
 # Example usage: serializers.CharField() for text fields
 
 
+def validate_profile_picture_size(value):
+    """
+    Reject profile pictures larger than PROFILE_PICTURE_MAX_UPLOAD_SIZE bytes.
+    """
+    limit = getattr(settings, 'PROFILE_PICTURE_MAX_UPLOAD_SIZE', None)
+    if value and limit and value.size > limit:
+        raise serializers.ValidationError(
+            f'Profile picture must be at most {limit // (1024 * 1024)} MB.'
+        )
+    return value
+
+
+class ProfilePictureURLsMixin(serializers.Serializer):
+    """
+    Adds profile_picture_urls: the original plus each resized variant.
+    """
+    
+    profile_picture_urls = serializers.SerializerMethodField()
+    
+    def get_profile_picture_urls(self, obj):
+        return profile_picture_urls(obj, self.context.get('request'))
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration.
@@ -47,6 +73,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             'email': {'required': True},
         }
     
+    def validate_profile_picture(self, value):
+        return validate_profile_picture_size(value)
+    
     def validate(self, data):
         """
         Validate that passwords match.
@@ -76,6 +105,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         # Create authentication token for the user
         Token.objects.create(user=user)
         
+        # Render avatar sizes off the request path
+        if user.profile_picture:
+            schedule_profile_picture_processing(user)
+        
         return user
 
 
@@ -84,18 +117,40 @@ class UserLoginSerializer(serializers.Serializer):
     Serializer for user login.
     
     Validates user credentials and returns authentication token.
+    A device_token from an earlier login on the same device_id may be
+    sent instead of the password (see accounts.device_logins).
     """
     
     username = serializers.CharField(required=True)
     password = serializers.CharField(
-        required=True,
+        required=False,
         write_only=True,
         style={'input_type': 'password'}
     )
+    device_id = serializers.CharField(
+        required=False,
+        write_only=True,
+        max_length=128,
+        help_text="Stable client device identifier; enables fast repeat logins"
+    )
+    device_token = serializers.CharField(
+        required=False,
+        write_only=True,
+        max_length=128,
+        help_text="Remember-device token returned by the previous login"
+    )
     token = serializers.CharField(read_only=True)
+    
+    def validate(self, attrs):
+        """
+        Require a password unless a device_token is given.
+        """
+        if not attrs.get('password') and not attrs.get('device_token'):
+            raise serializers.ValidationError({'password': ['This field is required.']})
+        return attrs
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(ProfilePictureURLsMixin, serializers.ModelSerializer):
     """
     Serializer for user profile data.
     
@@ -110,7 +165,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 
-                  'bio', 'profile_picture', 'date_joined', 
+                  'bio', 'profile_picture', 'profile_picture_urls', 'date_joined', 
                   'followers_count', 'following_count', 'followers', 'following']
         read_only_fields = ['id', 'username', 'date_joined']
 
@@ -128,9 +183,22 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'email': {'required': False},
         }
+    
+    def validate_profile_picture(self, value):
+        return validate_profile_picture_size(value)
+    
+    def update(self, instance, validated_data):
+        """
+        Update the profile and reprocess the picture if a new one was sent.
+        """
+        picture_changed = 'profile_picture' in validated_data
+        instance = super().update(instance, validated_data)
+        if picture_changed:
+            schedule_profile_picture_processing(instance)
+        return instance
 
 
-class UserFollowSerializer(serializers.ModelSerializer):
+class UserFollowSerializer(ProfilePictureURLsMixin, serializers.ModelSerializer):
     """
     Simplified serializer for user follow operations.
     
@@ -142,6 +210,6 @@ class UserFollowSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = User
-        fields = ['id', 'username', 'bio', 'profile_picture', 
+        fields = ['id', 'username', 'bio', 'profile_picture', 'profile_picture_urls',
                   'followers_count', 'following_count']
         read_only_fields = ['id', 'username']
@@ -4,7 +4,7 @@ Tests for the accounts app.
 This module contains test cases for user authentication and profile management.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
@@ -84,6 +84,73 @@ class UserLoginTestCase(APITestCase):
         response = self.client.post(self.login_url, data, format='json')
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_login_rehashes_legacy_password(self):
+        """Test that a PBKDF2 hash is upgraded to the configured hasher on login."""
+        from django.contrib.auth.hashers import make_password
+        
+        self.user.password = make_password('testpass123', hasher='pbkdf2_sha256')
+        self.user.save(update_fields=['password'])
+        
+        data = {'username': 'testuser', 'password': 'testpass123'}
+        response = self.client.post(self.login_url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+    
+    def test_known_device_login_skips_password_hasher(self):
+        """Test that a repeat login from the same device skips authenticate()."""
+        from unittest import mock
+        from accounts import views
+        
+        data = {'username': 'testuser', 'password': 'testpass123', 'device_id': 'phone-1'}
+        first = self.client.post(self.login_url, data, format='json')
+        
+        repeat = {
+            'username': 'testuser', 'device_id': 'phone-1',
+            'device_token': first.data['device_token'],
+        }
+        with mock.patch.object(views, 'authenticate') as authenticate:
+            second = self.client.post(self.login_url, repeat, format='json')
+            authenticate.assert_not_called()
+        
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['token'], first.data['token'])
+        self.assertNotEqual(second.data['device_token'], first.data['device_token'])
+    
+    def test_known_device_login_rejects_wrong_password(self):
+        """Test that a remembered device still requires the right password."""
+        data = {'username': 'testuser', 'password': 'testpass123', 'device_id': 'phone-1'}
+        self.client.post(self.login_url, data, format='json')
+        
+        data['password'] = 'wrongpassword'
+        response = self.client.post(self.login_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_device_token_is_single_use_and_not_password_derived(self):
+        """Test that device tokens are random, spent on use and tied to the device."""
+        from django.core.cache import cache
+        
+        data = {'username': 'testuser', 'password': 'testpass123', 'device_id': 'phone-1'}
+        device_token = self.client.post(self.login_url, data, format='json').data['device_token']
+        self.assertNotIn('testpass123', device_token)
+        self.assertNotEqual(
+            self.client.post(self.login_url, data, format='json').data['device_token'], device_token
+        )
+        
+        cache.clear()
+        first = self.client.post(self.login_url, data, format='json').data['device_token']
+        repeat = {'username': 'testuser', 'device_id': 'phone-1', 'device_token': first}
+        self.assertEqual(self.client.post(self.login_url, repeat, format='json').status_code,
+                         status.HTTP_200_OK)
+        # Replayed token, or a token presented for another device
+        self.assertEqual(self.client.post(self.login_url, repeat, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        other = self.client.post(self.login_url, data, format='json').data['device_token']
+        repeat.update(device_id='laptop-1', device_token=other)
+        self.assertEqual(self.client.post(self.login_url, repeat, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
 
 
 class UserFollowTestCase(APITestCase):
@@ -193,3 +260,214 @@ class UserFollowTestCase(APITestCase):
         self.assertEqual(self.user1.followers_count, 1)
         self.assertEqual(self.user2.followers_count, 1)
         self.assertEqual(self.user2.following_count, 1)
+
+
+class UserDataExportTestCase(APITestCase):
+    """Test cases for the streaming data export."""
+    
+    def setUp(self):
+        from posts.models import Post, Comment, Like
+        
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='exporter',
+            email='exporter@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        post = Post.objects.create(author=self.user, title='Mine', content='Body')
+        Post.objects.create(author=self.other, title='Theirs', content='Body')
+        Comment.objects.create(post=post, author=self.user, content='Nice')
+        Like.objects.create(user=self.user, post=post)
+        
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def test_export_streams_gzipped_ndjson(self):
+        """Test that the export contains only the user's own records."""
+        import gzip
+        import json
+        
+        response = self.client.get('/api/profile/export/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        
+        body = gzip.decompress(b''.join(response.streaming_content))
+        records = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        types = [record['type'] for record in records]
+        
+        self.assertEqual(types, ['profile', 'post', 'comment', 'like'])
+        self.assertEqual(records[1]['title'], 'Mine')
+    
+    def test_export_requires_authentication(self):
+        """Test that anonymous users cannot export data."""
+        self.client.credentials()
+        response = self.client.get('/api/profile/export/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProfilePictureTestCase(APITestCase):
+    """Test cases for the profile picture variant pipeline."""
+    
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root,
+            BACKGROUND_TASKS_EAGER=True,
+            PROFILE_PICTURE_SIZES={'thumb': 64, 'medium': 256},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='avatar',
+            email='avatar@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def _upload(self, size=(800, 600)):
+        from io import BytesIO
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+        
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'PNG')
+        picture = SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(
+                '/api/profile/', {'profile_picture': picture}, format='multipart'
+            )
+    
+    def test_upload_generates_sized_variants(self):
+        """Test that uploading a picture renders JPEG and WebP variants."""
+        from PIL import Image
+        
+        response = self._upload()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.user.refresh_from_db()
+        variants = self.user.profile_picture_variants
+        self.assertEqual(set(variants), {'thumb', 'medium'})
+        self.assertEqual(set(variants['thumb']), {'jpg', 'webp'})
+        
+        storage = self.user.profile_picture.storage
+        with storage.open(variants['thumb']['webp']) as handle:
+            with Image.open(handle) as image:
+                self.assertEqual(image.size, (64, 64))
+                self.assertEqual(image.format, 'WEBP')
+    
+    def test_profile_exposes_variant_urls(self):
+        """Test that the profile response lists the size-specific URLs."""
+        self._upload()
+        
+        response = self.client.get('/api/profile/')
+        urls = response.data['profile_picture_urls']
+        
+        self.assertIn('original', urls)
+        self.assertTrue(urls['thumb']['webp'].endswith('.webp'))
+        self.assertTrue(urls['medium']['jpg'].startswith('http://testserver/media/'))
+    
+    def test_profile_without_picture_has_no_urls(self):
+        """Test that users without a picture report null URLs."""
+        response = self.client.get('/api/profile/')
+        self.assertIsNone(response.data['profile_picture_urls'])
+    
+    def test_oversized_upload_is_rejected(self):
+        """Test that pictures above the configured limit are rejected."""
+        with override_settings(PROFILE_PICTURE_MAX_UPLOAD_SIZE=100):
+            response = self._upload()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('profile_picture', response.data)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, REAPER_BATCH_SIZE=2)
+class AccountDeletionTestCase(APITestCase):
+    """Test cases for deleting an account through the profile endpoint."""
+    
+    def setUp(self):
+        from posts.models import Post, Comment, Like
+        
+        self.user = User.objects.create_user(username='leaving', password='testpass123')
+        self.friend = User.objects.create_user(username='friend', password='testpass123')
+        self.user.following.add(self.friend)
+        self.friend.following.add(self.user)
+        self.post = Post.objects.create(author=self.user, title='Mine', content='Bye')
+        self.friend_post = Post.objects.create(author=self.friend, title='Theirs', content='Hi')
+        Comment.objects.create(post=self.friend_post, author=self.user, content='Nice')
+        Like.objects.add_like(self.user, self.friend_post.pk)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def test_delete_hides_account_immediately(self):
+        """Test that a deleted account is deactivated and hidden at once."""
+        from posts.models import Post, Comment
+        
+        response = self.client.delete('/api/profile/')
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertFalse(Comment.objects.filter(author=self.user).exists())
+        
+        client = APIClient()
+        client.force_authenticate(user=self.friend)
+        self.assertEqual(client.get(f'/api/users/{self.user.pk}/').status_code, 404)
+        self.assertEqual(client.post(f'/api/follow/{self.user.pk}/').status_code, 404)
+    
+    def test_reaper_purges_account(self):
+        """Test that the reaper removes the account and keeps counters right."""
+        from posts.models import Post, Comment
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete('/api/profile/')
+        
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(Comment._base_manager.filter(author_id=self.user.pk).exists())
+        self.friend_post.refresh_from_db()
+        self.assertEqual(self.friend_post.like_count, 0)
+        self.assertEqual(self.friend.followers.count(), 0)
+        self.assertEqual(self.friend.following.count(), 0)
+
+
+class UserListFieldsetTestCase(APITestCase):
+    """Test cases for ?fields= and ?omit= on the user list."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='testpass123', bio='Hello')
+        self.other = User.objects.create_user(username='bob', password='testpass123')
+        self.user.following.add(self.other)
+    
+    def test_fields_skip_follow_prefetch(self):
+        """Test that follow ids aren't prefetched unless requested."""
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/users/?fields=id,username')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(row['username'] for row in response.data['results']), ['alice', 'bob']
+        )
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username'})
+    
+    def test_omit_keeps_follow_counts(self):
+        """Test that ?omit= leaves the remaining fields intact."""
+        response = self.client.get('/api/users/?omit=email,bio')
+        rows = {row['username']: row for row in response.data['results']}
+        self.assertNotIn('email', rows['alice'])
+        self.assertEqual(rows['alice']['following_count'], 1)
+        self.assertEqual(rows['bob']['followers'], [self.user.id])
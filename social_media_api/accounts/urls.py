@@ -12,7 +12,8 @@ from .views import (
     UserListView,
     UserDetailView,
     follow_user,
-    unfollow_user
+    unfollow_user,
+    export_user_data
 )
 
 app_name = 'accounts'
@@ -31,6 +32,10 @@ urlpatterns = [
     # PUT/PATCH /api/profile/ - Update profile
     path('profile/', UserProfileView.as_view(), name='profile'),
     
+    # Data export endpoint (requires authentication)
+    # GET /api/profile/export/ - gzip-compressed NDJSON download
+    path('profile/export/', export_user_data, name='profile-export'),
+    
     # List all users
     # GET /api/users/
     path('users/', UserListView.as_view(), name='user-list'),
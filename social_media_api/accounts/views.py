@@ -9,10 +9,11 @@ from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from django.contrib.auth import authenticate, get_user_model
 from django.shortcuts import get_object_or_404
-from django.contrib.contenttypes.models import ContentType
+from django.http import StreamingHttpResponse
+from django.db import transaction
 # Example usage: generics.GenericAPIView, CustomUser.objects.all()
 from .serializers import (
     UserRegistrationSerializer,
@@ -21,12 +22,22 @@ from .serializers import (
     UserUpdateSerializer,
     UserFollowSerializer
 )
+from posts.feed_cache import schedule_feed_warmup
+from social_media_api.background import run_in_background
+from social_media_api.fieldsets import SparseFieldsetMixin
+from social_media_api.instrumentation import InstrumentedViewMixin
+from social_media_api.outbox import publish
+from social_media_api.reaper import reap_user
+from social_media_api.response_cache import CachedRetrieveMixin, invalidate
+from social_media_api.throttling import TokenBucketThrottle, UserTokenBucketThrottle
+from .device_logins import authenticate_known_device, remember_device
+from .exports import iter_user_records, iter_gzip_ndjson, export_filename
 
 # Get the custom user model
 User = get_user_model()
 
 
-class UserRegistrationView(generics.CreateAPIView):
+class UserRegistrationView(InstrumentedViewMixin, generics.CreateAPIView):
     """
     API view for user registration.
     
@@ -48,6 +59,7 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'auth'
     
     def create(self, request, *args, **kwargs):
         """
@@ -81,34 +93,63 @@ class UserLoginView(APIView):
     
     Request body:
         - username (required): User's username
-        - password (required): User's password
+        - password (required unless device_token is sent): User's password
+        - device_id (optional): Stable client device identifier
+        - device_token (optional): Token from the previous login on device_id
     
     Response:
-        - 200 OK: Returns user data and authentication token
+        - 200 OK: Returns user data and authentication token, plus a new
+          device_token when a device_id was given
         - 400 Bad Request: Returns error if credentials are invalid
     """
     
     permission_classes = [permissions.AllowAny]
     serializer_class = UserLoginSerializer
+    throttle_scope = 'auth'
     
     def post(self, request):
         """
         Authenticate user and return authentication token.
+        
+        A device_id (body field or X-Device-Id header) gets a one-time
+        device_token in the response. Sending it with the next login from
+        the same device within LOGIN_DEVICE_CACHE_TTL skips the password
+        hasher and token lookup; see accounts.device_logins.
         """
         serializer = UserLoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         username = serializer.validated_data['username']
-        password = serializer.validated_data['password']
+        password = serializer.validated_data.get('password')
+        device_id = (
+            serializer.validated_data.get('device_id')
+            or request.headers.get('X-Device-Id', '')
+        )
         
-        # Authenticate user
-        user = authenticate(username=username, password=password)
+        # Fast path: remembered device, one query and no password hashing
+        user = authenticate_known_device(
+            username, device_id, serializer.validated_data.get('device_token')
+        )
+        token = None
+        if user is not None:
+            try:
+                token = user.auth_token
+            except Token.DoesNotExist:
+                token = None
+        elif password:
+            # Authenticate user (rehashes the password if the hasher
+            # profile or its parameters changed)
+            user = authenticate(username=username, password=password)
         
         if user is not None:
-            # Get or create token for the user
-            token, created = Token.objects.get_or_create(user=user)
+            if token is None:
+                # Get or create token for the user
+                token, created = Token.objects.get_or_create(user=user)
             
-            return Response({
+            # Have the first feed page cached before the client asks for it
+            schedule_feed_warmup(user)
+            
+            data = {
                 'user': {
                     'id': user.id,
                     'username': user.username,
@@ -117,16 +158,20 @@ class UserLoginView(APIView):
                 },
                 'token': token.key,
                 'message': 'Login successful'
-            }, status=status.HTTP_200_OK)
+            }
+            device_token = remember_device(user, device_id)
+            if device_token:
+                data['device_token'] = device_token
+            return Response(data, status=status.HTTP_200_OK)
         else:
             return Response({
                 'error': 'Invalid username or password'
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(InstrumentedViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
-    API view for retrieving and updating user profile.
+    API view for retrieving, updating and deleting user profile.
     
     GET /api/profile/
     - Returns authenticated user's profile information
@@ -134,6 +179,10 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     PUT/PATCH /api/profile/
     - Updates authenticated user's profile
     
+    DELETE /api/profile/
+    - Deletes the account: it is deactivated and hidden at once (token
+      revoked, posts hidden) and its data is removed in the background
+    
     Request body (for update):
         - email (optional): New email address
         - first_name (optional): First name
@@ -143,6 +192,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     
     Response:
         - 200 OK: Returns user profile data
+        - 204 No Content: Account deleted
         - 401 Unauthorized: If user is not authenticated
     """
     
@@ -155,6 +205,21 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         """
         return self.request.user
     
+    def perform_update(self, serializer):
+        """
+        Save the profile and drop its cached public profile response.
+        """
+        serializer.save()
+        invalidate('user', serializer.instance.pk)
+    
+    def perform_destroy(self, instance):
+        """
+        Soft-delete the account and queue the removal of its data.
+        """
+        if instance.soft_delete():
+            invalidate('user', instance.pk)
+            run_in_background(reap_user, instance.pk)
+    
     def get_serializer_class(self):
         """
         Use different serializer for update operations.
@@ -164,39 +229,64 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return UserProfileSerializer
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(SparseFieldsetMixin, InstrumentedViewMixin, generics.ListAPIView):
     """
     API view for listing all users.
     
     GET /api/users/
     
+    Query Parameters:
+        - fields / omit: Comma-separated profile fields to include or
+          leave out (see social_media_api.fieldsets)
+    
     Response:
-        - 200 OK: Returns list of all users
+        - 200 OK: Returns list of all users (deleted accounts excluded)
     """
     
-    queryset = User.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    
+    # Follow fields come from the prefetch; picture URLs from two columns
+    follow_fields = ('followers_count', 'following_count', 'followers', 'following')
+    sparse_field_columns = dict(
+        {name: () for name in follow_fields},
+        profile_picture_urls=('profile_picture', 'profile_picture_variants'),
+    )
+    
+    def get_queryset(self):
+        """
+        Return active users, prefetching follow ids only when requested.
+        """
+        queryset = User.objects.all()
+        if any(self.wants_field(name) for name in self.follow_fields):
+            queryset = User.objects.with_follow_ids()
+        return self.sparse_queryset(queryset.filter(deleted_at__isnull=True))
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(CachedRetrieveMixin, InstrumentedViewMixin, generics.RetrieveAPIView):
     """
     API view for retrieving a specific user's profile.
     
     GET /api/users/<int:pk>/
     
+    Responses are cached and rebuilt single-flight (see
+    social_media_api.response_cache); follows and profile changes
+    invalidate them.
+    
     Response:
         - 200 OK: Returns user profile data
-        - 404 Not Found: If user doesn't exist
+        - 404 Not Found: If user doesn't exist or was deleted
     """
     
-    queryset = User.objects.all()
+    queryset = User.objects.with_follow_ids().filter(deleted_at__isnull=True)
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    response_cache_scope = 'user'
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserTokenBucketThrottle, TokenBucketThrottle.for_scope('follows')])
 def follow_user(request, user_id):
     """
     Follow a user.
@@ -211,7 +301,7 @@ def follow_user(request, user_id):
         - 400 Bad Request: If trying to follow self or already following
         - 404 Not Found: If user doesn't exist
     """
-    user_to_follow = get_object_or_404(User, id=user_id)
+    user_to_follow = get_object_or_404(User.objects.visible(), id=user_id)
     current_user = request.user
     
     # Check if trying to follow self
@@ -226,18 +316,12 @@ def follow_user(request, user_id):
             'error': f'You are already following {user_to_follow.username}'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Add to following
-    current_user.following.add(user_to_follow)
-    
-    # Create notification for the followed user
-    from notifications.models import Notification
-    Notification.objects.create(
-        recipient=user_to_follow,
-        actor=current_user,
-        verb='started following you',
-        target_content_type=ContentType.objects.get_for_model(user_to_follow),
-        target_object_id=user_to_follow.id
-    )
+    # Add to following; the notification and the rebuild of the cached
+    # feed page are driven by the follow.created event
+    with transaction.atomic():
+        current_user.following.add(user_to_follow)
+        publish('follow.created', follower_id=current_user.pk, followed_id=user_to_follow.pk)
+    invalidate('user', current_user.pk, user_to_follow.pk)
     
     serializer = UserFollowSerializer(user_to_follow)
     return Response({
@@ -248,6 +332,7 @@ def follow_user(request, user_id):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserTokenBucketThrottle, TokenBucketThrottle.for_scope('follows')])
 def unfollow_user(request, user_id):
     """
     Unfollow a user.
@@ -261,7 +346,7 @@ def unfollow_user(request, user_id):
         - 400 Bad Request: If not following the user
         - 404 Not Found: If user doesn't exist
     """
-    user_to_unfollow = get_object_or_404(User, id=user_id)
+    user_to_unfollow = get_object_or_404(User.objects.visible(), id=user_id)
     current_user = request.user
     
     # Check if following the user
@@ -270,11 +355,40 @@ def unfollow_user(request, user_id):
             'error': f'You are not following {user_to_unfollow.username}'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Remove from following
-    current_user.following.remove(user_to_unfollow)
+    # Remove from following (the feed page is rebuilt from the event)
+    with transaction.atomic():
+        current_user.following.remove(user_to_unfollow)
+        publish('follow.deleted', follower_id=current_user.pk, followed_id=user_to_unfollow.pk)
+    invalidate('user', current_user.pk, user_to_unfollow.pk)
     
     serializer = UserFollowSerializer(user_to_unfollow)
     return Response({
         'message': f'You have unfollowed {user_to_unfollow.username}',
         'user': serializer.data
     }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_user_data(request):
+    """
+    Download all of the authenticated user's data.
+    
+    GET /api/profile/export/
+    
+    Streams the user's profile, posts, comments, likes and notifications
+    as gzip-compressed NDJSON (one JSON object per line, each with a
+    "type" key). Rows are read with server-side cursors and compressed
+    as they are sent, so large accounts export in constant memory.
+    
+    Response:
+        - 200 OK: application/gzip attachment
+        - 401 Unauthorized: If user is not authenticated
+    """
+    user = request.user
+    response = StreamingHttpResponse(
+        iter_gzip_ndjson(iter_user_records(user)),
+        content_type='application/gzip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(user)}"'
+    return response
@@ -5,18 +5,30 @@ This module registers the Notification model with the Django admin interface.
 """
 
 from django.contrib import admin
+
+from social_media_api.admin_jobs import (
+    BackgroundActionsAdminMixin, delete_in_background, mark_read_in_background,
+)
+from social_media_api.admin_utils import LargeTableAdminMixin
 from .models import Notification
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(BackgroundActionsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin configuration for Notification model.
+    
+    Bulk actions run as chunked background jobs (see
+    social_media_api.admin_jobs).
     """
     
+    actions = [mark_read_in_background, delete_in_background]
+    
     list_display = ['id', 'recipient', 'actor', 'verb', 'timestamp', 'read']
     list_filter = ['read', 'timestamp', 'verb']
+    list_select_related = ['recipient', 'actor']
     search_fields = ['recipient__username', 'actor__username', 'verb']
+    autocomplete_fields = ['recipient', 'actor']
     readonly_fields = ['timestamp']
     ordering = ['-timestamp']
     
@@ -0,0 +1,108 @@
+"""
+Django management command for monthly table partitions (PostgreSQL only).
+
+Converts the notifications table to monthly range partitions once. After
+that, run it regularly (e.g. daily from cron) to create upcoming partitions
+and detach the ones older than PARTITION_RETENTION_MONTHS.
+
+Usage:
+    python manage.py manage_partitions --convert
+    python manage.py manage_partitions                     # create next months
+    python manage.py manage_partitions --detach            # also detach old months
+    python manage.py manage_partitions --detach --drop --retention-months 12
+    python manage.py manage_partitions --list
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from social_media_api.partitioning import (
+    PartitioningError,
+    partitioned_tables,
+    retention_cutoff,
+)
+
+
+class Command(BaseCommand):
+    help = 'Create, convert and detach monthly table partitions (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert the tables to partitioned tables (one-time, locks the tables)'
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Months of partitions to create in advance (default 3)'
+        )
+        parser.add_argument(
+            '--detach',
+            action='store_true',
+            help='Detach partitions older than the retention window'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='With --detach, drop the detached partitions instead of keeping them'
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            help='Override PARTITION_RETENTION_MONTHS for --detach'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List the attached partitions and exit'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Run the requested partition maintenance for every partitioned table.
+        """
+        if options['drop'] and not options['detach']:
+            raise CommandError('--drop can only be used with --detach')
+
+        cutoff = None
+        if options['detach']:
+            retention = options['retention_months']
+            if retention is None:
+                retention = getattr(settings, 'PARTITION_RETENTION_MONTHS', 0)
+            if retention < 1:
+                raise CommandError(
+                    'Set PARTITION_RETENTION_MONTHS or pass --retention-months to detach partitions'
+                )
+            cutoff = retention_cutoff(months=retention)
+
+        try:
+            for table in partitioned_tables():
+                self.stdout.write(self.style.MIGRATE_HEADING(table.table))
+
+                if options['list']:
+                    for name, bound in table.partitions():
+                        self.stdout.write(f'  {name:45} {bound}')
+                    continue
+
+                if options['convert']:
+                    table.convert(options['months_ahead'])
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✓ Converted {table.table} to monthly partitions on "{table.column}"'
+                    ))
+
+                created = table.ensure_partitions(options['months_ahead'])
+                self.stdout.write(f'  Partitions present through {created[-1]}')
+
+                if cutoff is not None:
+                    removed = table.detach_before(cutoff, drop=options['drop'])
+                    action = 'Dropped' if options['drop'] else 'Detached'
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✓ {action} {len(removed)} partition(s) older than {cutoff:%Y-%m}'
+                    ))
+                    for name in removed:
+                        self.stdout.write(f'  {name}')
+        except PartitioningError as exc:
+            raise CommandError(str(exc))
+
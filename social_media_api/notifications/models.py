@@ -10,9 +10,29 @@ from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
+from social_media_api.partitioning import retention_cutoff
+
 User = get_user_model()
 
 
+class NotificationQuerySet(models.QuerySet):
+    """
+    QuerySet for notifications.
+    """
+    
+    def within_retention(self):
+        """
+        Limit to the PARTITION_RETENTION_MONTHS window (no-op when unset).
+        
+        On a partitioned table this lets PostgreSQL skip old partitions;
+        see social_media_api.partitioning.
+        """
+        cutoff = retention_cutoff()
+        if cutoff is None:
+            return self
+        return self.filter(timestamp__gte=cutoff)
+
+
 class Notification(models.Model):
     """
     Notification model for tracking user interactions and activities.
@@ -77,6 +97,8 @@ class Notification(models.Model):
         help_text="Whether the notification has been read"
     )
     
+    objects = NotificationQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-timestamp']
         verbose_name = 'Notification'
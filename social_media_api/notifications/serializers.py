@@ -6,6 +6,7 @@ This module defines serializers for the Notification model.
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from social_media_api.serialization import FastListSerializer
 from .models import Notification
 
 User = get_user_model()
@@ -33,6 +34,7 @@ class NotificationSerializer(serializers.ModelSerializer):
                   'verb', 'target_type', 'target_id', 'timestamp', 'read']
         read_only_fields = ['id', 'recipient', 'recipient_id', 'actor', 
                            'actor_id', 'timestamp']
+        list_serializer_class = FastListSerializer
     
     def get_target_type(self, obj):
         """
@@ -4,7 +4,14 @@ Tests for the notifications app.
 This module contains test cases for Notification functionality.
 """
 
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.test import APITestCase, APIClient
@@ -13,6 +20,7 @@ from rest_framework.authtoken.models import Token
 
 from .models import Notification
 from posts.models import Post
+from social_media_api.partitioning import PartitionedTable, retention_cutoff
 
 User = get_user_model()
 
@@ -200,3 +208,78 @@ class NotificationAPITestCase(APITestCase):
         response = self.client.post(url)
         
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_fields_skip_unrequested_joins(self):
+        """Test that ?fields= only joins the relations it needs."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/notifications/?fields=id,verb,target_type')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {(row['verb'], row['target_type']) for row in response.data['results']},
+            {('liked your post', 'post'), ('started following you', 'customuser')}
+        )
+        sql = next(q['sql'] for q in queries.captured_queries
+                   if 'FROM "notifications_notification"' in q['sql'] and 'COUNT' not in q['sql'])
+        self.assertIn('django_content_type', sql)
+        self.assertNotIn('"username"', sql)
+
+
+class PartitionRetentionTestCase(APITestCase):
+    """Test cases for the monthly retention window and partition helpers."""
+    
+    def setUp(self):
+        self.user1 = User.objects.create_user(username='user1', password='testpass123')
+        self.user2 = User.objects.create_user(username='user2', password='testpass123')
+        self.client.force_authenticate(user=self.user1)
+        self.user1.following.add(self.user2)
+        
+        now = timezone.now()
+        self.recent = Notification.objects.create(
+            recipient=self.user1, actor=self.user2, verb='liked your post'
+        )
+        self.old = Notification.objects.create(
+            recipient=self.user1, actor=self.user2, verb='commented on your post'
+        )
+        Notification.objects.filter(pk=self.old.pk).update(timestamp=now - timedelta(days=400))
+        
+        self.recent_post = Post.objects.create(author=self.user2, title='New', content='Body')
+        self.old_post = Post.objects.create(author=self.user2, title='Old', content='Body')
+        Post.objects.filter(pk=self.old_post.pk).update(created_at=now - timedelta(days=400))
+    
+    def test_lists_are_unbounded_by_default(self):
+        """Test that without PARTITION_RETENTION_MONTHS nothing is filtered."""
+        notifications = self.client.get('/api/notifications/').data['results']
+        feed = self.client.get('/api/feed/').data['results']
+        
+        self.assertEqual(len(notifications), 2)
+        self.assertEqual(len(feed), 2)
+    
+    @override_settings(PARTITION_RETENTION_MONTHS=3)
+    def test_retention_window_prunes_old_rows(self):
+        """Test that the feed and notification list skip months outside the window."""
+        notifications = self.client.get('/api/notifications/').data['results']
+        feed = self.client.get('/api/feed/').data['results']
+        
+        self.assertEqual([n['id'] for n in notifications], [self.recent.id])
+        self.assertEqual([p['id'] for p in feed], [self.recent_post.id])
+    
+    def test_month_arithmetic_and_partition_ddl(self):
+        """Test month boundaries and the generated partition DDL."""
+        now = datetime(2026, 1, 15, 12, 30, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            retention_cutoff(now, months=3), datetime(2025, 11, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertIsNone(retention_cutoff(now, months=0))
+        
+        table = PartitionedTable(Notification, 'timestamp')
+        sql = table.partition_sql(datetime(2025, 12, 1, tzinfo=dt_timezone.utc))
+        self.assertIn('"notifications_notification_p2025_12"', sql)
+        self.assertIn("FROM ('2025-12-01T00:00:00+00:00') TO ('2026-01-01T00:00:00+00:00')", sql)
+    
+    def test_manage_partitions_requires_postgresql(self):
+        """Test that the command refuses to run on other databases."""
+        if connection.vendor == 'postgresql':
+            self.skipTest('Runs against a non-PostgreSQL database only')
+        with self.assertRaisesMessage(CommandError, 'requires PostgreSQL'):
+            call_command('manage_partitions', stdout=StringIO())
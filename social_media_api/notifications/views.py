@@ -9,11 +9,14 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 
+from social_media_api.fieldsets import SparseFieldsetMixin
+from social_media_api.instrumentation import InstrumentedViewMixin
+
 from .models import Notification
 from .serializers import NotificationSerializer
 
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(SparseFieldsetMixin, InstrumentedViewMixin, generics.ListAPIView):
     """
     API view for listing user notifications.
     
@@ -24,6 +27,8 @@ class NotificationListView(generics.ListAPIView):
     
     Query Parameters:
         - unread: Filter for unread notifications only (optional, true/false)
+        - fields / omit: Comma-separated notification fields to include or
+          leave out (see social_media_api.fieldsets)
     
     Response:
         - 200 OK: Returns list of notifications
@@ -33,20 +38,36 @@ class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Joined relations and the serializer fields that read them
+    related_fields = {
+        'actor': ('actor', 'actor_id'),
+        'recipient': ('recipient', 'recipient_id'),
+        'target_content_type': ('target_type',),
+    }
+    sparse_field_columns = {'target_type': ('target_content_type',)}
+    
     def get_queryset(self):
         """
         Return notifications for the authenticated user.
         Can filter by unread status.
         """
         user = self.request.user
-        queryset = Notification.objects.filter(recipient=user)
+        queryset = Notification.objects.filter(
+            recipient=user, actor__deleted_at__isnull=True
+        ).within_retention()
+        related = [
+            relation for relation, fields in self.related_fields.items()
+            if any(self.wants_field(name) for name in fields)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
         
         # Filter by unread if specified
         unread_param = self.request.query_params.get('unread', None)
         if unread_param and unread_param.lower() == 'true':
             queryset = queryset.filter(read=False)
         
-        return queryset
+        return self.sparse_queryset(queryset)
 
 
 @api_view(['POST'])
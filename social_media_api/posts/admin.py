@@ -2,22 +2,41 @@
 Admin configuration for the posts app.
 
 This module registers Post and Comment models with the Django admin interface.
+Changelists are built for large tables: counts come from per-page
+subqueries, related rows from list_select_related, foreign keys are
+edited through autocomplete widgets and filtered by id (see
+social_media_api.admin_utils). Bulk actions run as chunked background
+jobs (see social_media_api.admin_jobs), tracked on the Admin Job pages.
+Outbox events can be inspected, e.g. to find events the relay gave up on.
 """
 
 from django.contrib import admin
-from .models import Post, Comment, Like
+
+from social_media_api.admin_jobs import (
+    BackgroundActionsAdminMixin, ReassignAuthorActionForm,
+    delete_in_background, reassign_author_in_background,
+)
+from social_media_api.admin_utils import (
+    AuthorFilter, LargeTableAdminMixin, PostFilter, UserFilter, count_subquery,
+)
+from .models import Post, Comment, Like, AdminJob, OutboxEvent
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(BackgroundActionsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin interface for Post model.
     """
     
-    list_display = ['title', 'author', 'created_at', 'updated_at', 'comment_count']
-    list_filter = ['created_at', 'updated_at', 'author']
+    actions = [delete_in_background, reassign_author_in_background]
+    action_form = ReassignAuthorActionForm
+    
+    list_display = ['title', 'author_link', 'created_at', 'updated_at', 'comment_count', 'deleted_at']
+    list_filter = ['created_at', 'updated_at', AuthorFilter]
+    list_select_related = ['author']
     search_fields = ['title', 'content', 'author__username']
-    readonly_fields = ['created_at', 'updated_at', 'comment_count']
+    autocomplete_fields = ['author']
+    readonly_fields = ['created_at', 'updated_at', 'comment_count', 'deleted_at']
     date_hierarchy = 'created_at'
     
     fieldsets = (
@@ -25,21 +44,39 @@ class PostAdmin(admin.ModelAdmin):
             'fields': ('author', 'title', 'content')
         }),
         ('Timestamps', {
-            'fields': ('created_at', 'updated_at', 'comment_count'),
+            'fields': ('created_at', 'updated_at', 'comment_count', 'deleted_at'),
             'classes': ('collapse',)
         }),
     )
+    
+    def get_queryset(self, request):
+        """
+        Include soft-deleted posts that are waiting for the reaper, with
+        comment counts read by Post.comment_count.
+        """
+        return Post.all_objects.annotate(
+            num_comments=count_subquery(Comment._base_manager.all(), 'post')
+        )
+    
+    @admin.display(description='Author', ordering='author')
+    def author_link(self, obj):
+        return self.filter_link(obj, 'author')
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(BackgroundActionsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin interface for Comment model.
     """
     
-    list_display = ['__str__', 'author', 'post', 'created_at']
-    list_filter = ['created_at', 'updated_at', 'author']
+    actions = [delete_in_background, reassign_author_in_background]
+    action_form = ReassignAuthorActionForm
+    
+    list_display = ['__str__', 'author_link', 'post_link', 'created_at']
+    list_filter = ['created_at', 'updated_at', AuthorFilter, PostFilter]
+    list_select_related = ['author', 'post__author']
     search_fields = ['content', 'author__username', 'post__title']
+    autocomplete_fields = ['post', 'author']
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'created_at'
     
@@ -52,17 +89,35 @@ class CommentAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def get_queryset(self, request):
+        """
+        Include comments hidden by a soft-deleted post or author.
+        """
+        return Comment._base_manager.all()
+    
+    @admin.display(description='Author', ordering='author')
+    def author_link(self, obj):
+        return self.filter_link(obj, 'author')
+    
+    @admin.display(description='Post', ordering='post')
+    def post_link(self, obj):
+        return self.filter_link(obj, 'post')
 
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(BackgroundActionsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin interface for Like model.
     """
     
-    list_display = ['user', 'post', 'created_at']
-    list_filter = ['created_at']
+    actions = [delete_in_background]
+    
+    list_display = ['user_link', 'post_link', 'created_at']
+    list_filter = ['created_at', UserFilter, PostFilter]
+    list_select_related = ['user', 'post__author']
     search_fields = ['user__username', 'post__title']
+    autocomplete_fields = ['user', 'post']
     readonly_fields = ['created_at']
     date_hierarchy = 'created_at'
     
@@ -75,3 +130,60 @@ class LikeAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    @admin.display(description='User', ordering='user')
+    def user_link(self, obj):
+        return self.filter_link(obj, 'user')
+    
+    @admin.display(description='Post', ordering='post')
+    def post_link(self, obj):
+        return self.filter_link(obj, 'post')
+
+
+@admin.register(AdminJob)
+class AdminJobAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for background bulk action jobs.
+    """
+    
+    list_display = ['id', 'action', 'content_type', 'status', 'progress', 'created_by', 'created_at',
+                    'finished_at']
+    list_filter = ['status', 'action']
+    list_select_related = ['content_type', 'created_by']
+    fields = ['action', 'content_type', 'params', 'status', 'progress', 'error', 'created_by',
+              'created_at', 'heartbeat_at', 'finished_at']
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_queryset(self, request):
+        """
+        Leave out the selected ids, which can run to 100k+ entries.
+        """
+        return super().get_queryset(request).defer('object_ids')
+    
+    @admin.display(description='Progress')
+    def progress(self, obj):
+        return f'{obj.processed} / {obj.total} ({obj.percent_done}%)'
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """
+    Read-only admin interface for the outbox event stream.
+    """
+    
+    list_display = ['id', 'topic', 'created_at', 'processed_at', 'attempts']
+    list_filter = ['topic']
+    fields = ['topic', 'payload', 'created_at', 'processed_at', 'attempts', 'error']
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,70 @@
+"""
+In-memory sample objects for the CPU benchmarks.
+
+The serializer and response benchmarks measure serialization, rendering
+and compression without the database. These helpers build unsaved posts,
+comments and notifications, with related objects and annotations
+populated, in the shape the API views produce.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+
+from notifications.models import Notification
+
+from .models import Post, Comment
+
+User = get_user_model()
+
+
+def _timestamp(i):
+    return datetime(2024, 1, 1, tzinfo=dt_timezone.utc) + timedelta(minutes=i, microseconds=i)
+
+
+def sample_users(count=50):
+    return [User(id=i, username=f'bench_user_{i}') for i in range(1, count + 1)]
+
+
+def sample_comments(rows, post_id=None, start=1):
+    """Return rows comments; every fourth is top-level, the rest are replies."""
+    users = sample_users()
+    return [
+        Comment(
+            id=i, post_id=post_id or i // 10 + 1, parent_id=i - 1 if i % 4 else None,
+            depth=1 if i % 4 else 0, author=users[i % len(users)],
+            content=f'Comment {i}: ' + 'thoughtful reply ' * 3,
+            created_at=_timestamp(i), updated_at=_timestamp(i),
+        )
+        for i in range(start, start + rows)
+    ]
+
+
+def sample_posts(rows):
+    """Return rows posts annotated as the list views annotate them."""
+    users = sample_users()
+    posts = []
+    for i in range(1, rows + 1):
+        post = Post(
+            id=i, author=users[i % len(users)], title=f'Post {i}',
+            content='Benchmark content ' * 8, like_count=i % 40,
+            created_at=_timestamp(i), updated_at=_timestamp(i + 1),
+        )
+        post.num_comments = i % 7
+        post.liked_by_me = i % 3 == 0
+        posts.append(post)
+    return posts
+
+
+def sample_notifications(rows):
+    users = sample_users()
+    post_type = ContentType(id=1, app_label='posts', model='post')
+    return [
+        Notification(
+            id=i, recipient=users[0], actor=users[i % len(users)],
+            verb='liked your post', target_content_type=post_type,
+            target_object_id=i, timestamp=_timestamp(i), read=i % 2 == 0,
+        )
+        for i in range(1, rows + 1)
+    ]
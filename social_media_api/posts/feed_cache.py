@@ -0,0 +1,114 @@
+"""
+Per-user cache of the first feed page, prewarmed in the background.
+
+Building a feed page costs a COUNT, the posts query with its annotations
+and the nested comments prefetch. The first page of /api/feed/ is
+therefore cached per user for FEED_CACHE_TTL seconds (60 by default, 0
+disables the cache), and it is built off the request thread when it is
+about to be needed: ``schedule_feed_warmup`` runs after a login, and the
+outbox relay warms it after the user follows or unfollows someone.
+
+Each cached page carries a fingerprint of the feed, the number of posts
+in it and the newest post id. It is computed with one aggregate query on
+every request and the cached page is only used while it matches, so a
+new post from a followed user or a follow change shows up at once.
+Edits, counts and comments on cached posts can lag by up to the TTL,
+except for the user's own likes and comments, which call
+``invalidate_feed``.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Max
+from rest_framework.settings import api_settings
+
+from social_media_api.background import run_in_background
+
+from .models import Post
+from .serializers import PostSerializer
+
+
+def _cache_key(user_id):
+    return f'feed:first_page:{user_id}'
+
+
+def feed_cache_enabled():
+    """Whether FEED_CACHE_TTL enables the first-page cache."""
+    return getattr(settings, 'FEED_CACHE_TTL', 60) > 0
+
+
+def feed_queryset(user):
+    """
+    Return posts from users that user follows, most recent first,
+    annotated with whether user liked each one.
+    """
+    return (
+        Post.objects.filter(author__in=user.following.all())
+        .within_retention()
+        .select_related('author')
+        .with_comment_count()
+        .with_comments()
+        .with_viewer_state(user)
+        .order_by('-created_at')
+    )
+
+
+def feed_fingerprint(user):
+    """
+    Return (post count, newest post id) of user's feed in one query.
+    """
+    stats = Post.objects.filter(author__in=user.following.all()).within_retention().aggregate(
+        count=Count('pk'), newest=Max('pk')
+    )
+    return [stats['count'], stats['newest']]
+
+
+def build_first_page(user, fingerprint=None):
+    """
+    Serialize the first page of user's feed and cache it.
+
+    Returns:
+        dict: {'fingerprint', 'count', 'results'}
+    """
+    if fingerprint is None:
+        fingerprint = feed_fingerprint(user)
+    posts = feed_queryset(user)[:api_settings.PAGE_SIZE]
+    page = {
+        'fingerprint': fingerprint,
+        'count': fingerprint[0],
+        'results': list(PostSerializer(posts, many=True).data),
+    }
+    cache.set(_cache_key(user.pk), page, settings.FEED_CACHE_TTL)
+    return page
+
+
+def get_first_page(user):
+    """
+    Return the first feed page, from the cache while it is current.
+    """
+    fingerprint = feed_fingerprint(user)
+    page = cache.get(_cache_key(user.pk))
+    if page is None or page['fingerprint'] != fingerprint:
+        page = build_first_page(user, fingerprint)
+    return page
+
+
+def invalidate_feed(user_id):
+    """Drop user's cached first page (after their own likes and comments)."""
+    cache.delete(_cache_key(user_id))
+
+
+def warm_feed(user_id):
+    """Build and cache the first feed page of a user."""
+    user = get_user_model().objects.visible().filter(pk=user_id).first()
+    if user is not None:
+        build_first_page(user)
+
+
+def schedule_feed_warmup(user):
+    """
+    Warm user's first feed page in the background after commit.
+    """
+    if feed_cache_enabled():
+        run_in_background(warm_feed, user.pk)
@@ -0,0 +1,193 @@
+"""
+Bulk import of posts from JSON Lines input.
+
+Used by the bulk-import endpoint on PostViewSet and by the ``import_posts``
+management command. Input is consumed as a stream of lines, validated one
+chunk at a time and written with ``bulk_create`` in per-chunk transactions,
+so memory use stays flat regardless of the size of the import.
+
+Each line is a JSON object:
+
+    {"title": "...", "content": "...", "author": "username",
+     "created_at": "2024-01-15T10:30:00Z"}
+
+``author`` and ``created_at`` are optional. ``author`` is only honoured
+when no fixed author is given (the management command); API imports are
+always attributed to the requesting user.
+"""
+
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework import serializers
+
+from social_media_api.outbox import publish_many
+
+from .models import Post
+
+User = get_user_model()
+
+# Number of lines validated and inserted per transaction
+DEFAULT_BATCH_SIZE = 1000
+
+# Cap on the number of line errors echoed back to the caller
+MAX_REPORTED_ERRORS = 100
+
+
+class PostImportSerializer(serializers.Serializer):
+    """
+    Validates a single imported post row.
+    """
+
+    title = serializers.CharField(max_length=200)
+    content = serializers.CharField()
+    author = serializers.CharField(required=False)
+    created_at = serializers.DateTimeField(required=False)
+
+
+class ImportResult:
+    """
+    Running totals for an import.
+
+    Attributes:
+        created (int): Number of posts inserted
+        failed (int): Number of lines rejected
+        errors (list): Up to MAX_REPORTED_ERRORS dicts with line and errors
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line_number, errors):
+        """Record a rejected line."""
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'errors': errors})
+
+    def as_dict(self):
+        """Return the result as a JSON-serializable dict."""
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+def _parse_lines(lines):
+    """
+    Yield (line_number, row_or_None, error_or_None) for each non-blank line.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+        except UnicodeDecodeError as exc:
+            yield line_number, None, {'non_field_errors': [f'Invalid UTF-8: {exc}']}
+            continue
+        except ValueError as exc:
+            yield line_number, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, {'non_field_errors': ['Each line must be a JSON object']}
+            continue
+        yield line_number, row, None
+
+
+def _import_chunk(chunk, author, result):
+    """
+    Validate one chunk of parsed lines and insert the valid rows.
+    """
+    valid = []
+    for line_number, row, error in chunk:
+        if error is not None:
+            result.add_error(line_number, error)
+            continue
+        serializer = PostImportSerializer(data=row)
+        if not serializer.is_valid():
+            result.add_error(line_number, serializer.errors)
+            continue
+        valid.append((line_number, serializer.validated_data))
+
+    if not valid:
+        return
+
+    # Resolve all author usernames in the chunk with a single query
+    authors = {}
+    if author is None:
+        usernames = {data['author'] for _, data in valid if 'author' in data}
+        authors = dict(
+            User.objects.filter(username__in=usernames).values_list('username', 'id')
+        )
+
+    posts = []
+    timestamps = []
+    for line_number, data in valid:
+        if author is not None:
+            author_id = author.pk
+        else:
+            author_id = authors.get(data.get('author'))
+            if author_id is None:
+                result.add_error(line_number, {'author': ['Unknown or missing author']})
+                continue
+        posts.append(Post(author_id=author_id, title=data['title'], content=data['content']))
+        timestamps.append(data.get('created_at'))
+
+    if not posts:
+        return
+
+    with transaction.atomic():
+        Post.objects.bulk_create(posts)
+
+        # bulk_create applies auto_now_add, so restore imported timestamps
+        # with a single bulk UPDATE for the rows that supplied one
+        backdated = []
+        for post, created_at in zip(posts, timestamps):
+            if created_at is not None:
+                post.created_at = created_at
+                post.updated_at = created_at
+                backdated.append(post)
+        if backdated:
+            Post.objects.bulk_update(backdated, ['created_at', 'updated_at'])
+        
+        # Hashtags and mentions are parsed by the outbox relay
+        publish_many('post.created', [
+            {'post_id': post.pk, 'author_id': post.author_id} for post in posts
+        ])
+
+    result.created += len(posts)
+
+
+def import_posts(lines, author=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Import posts from an iterable of JSON lines.
+
+    Args:
+        lines: Iterable of str or bytes, one JSON object per line
+        author: User to attribute every post to, or None to read the
+            ``author`` username from each line
+        batch_size: Lines per validation chunk and transaction
+        progress: Optional callable receiving the ImportResult after each chunk
+
+    Returns:
+        ImportResult: Totals and the first MAX_REPORTED_ERRORS line errors
+    """
+    result = ImportResult()
+    parsed = _parse_lines(lines)
+
+    while True:
+        chunk = list(islice(parsed, batch_size))
+        if not chunk:
+            break
+        _import_chunk(chunk, author, result)
+        if progress is not None:
+            progress(result)
+
+    return result
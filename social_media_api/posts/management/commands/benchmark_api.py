@@ -0,0 +1,301 @@
+"""
+Django management command to benchmark the main API endpoints.
+
+Replays requests against the feed, post list, post comments, like/unlike
+and follow/unfollow endpoints through the full middleware stack (Django's
+test client, no network) and reports latency percentiles (p50/p95/p99),
+throughput and queries per request for each endpoint. Results can be saved
+as JSON and compared against an earlier run.
+
+Run it against a database filled by ``seed_social_graph``. Requests are
+authenticated as the seeded users who follow the most accounts, so their
+feeds are the most expensive. Every like and follow is undone straight
+away, and notifications created during the run are deleted at the end.
+Throttling is disabled while the benchmark runs.
+
+Usage:
+    python manage.py benchmark_api
+    python manage.py benchmark_api --iterations 500 --json after.json --compare before.json
+"""
+
+import json
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from notifications.models import Notification
+from posts.models import Post, Comment, Like
+from social_media_api.throttling import TokenBucketThrottle
+
+User = get_user_model()
+
+# Endpoints in report order: name -> HTTP method
+ENDPOINTS = {
+    'feed': 'get',
+    'post_list': 'get',
+    'post_comments': 'get',
+    'like': 'post',
+    'unlike': 'post',
+    'follow': 'post',
+    'unfollow': 'post',
+}
+
+# Distinct like/follow targets per viewer (each action is undone at once)
+TARGETS_PER_VIEWER = 10
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, wall_time, errors, queries):
+    """
+    Build the result entry for one endpoint.
+
+    Args:
+        latencies: Per-request latency in seconds
+        wall_time: Total seconds spent on the endpoint's requests
+        errors: Number of non-2xx responses
+        queries: Per-request database query counts
+    """
+    ordered = sorted(latencies)
+    in_ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput_rps': round(len(ordered) / wall_time, 1) if wall_time else None,
+        'latency_ms': {
+            'p50': in_ms(percentile(ordered, 0.50)),
+            'p95': in_ms(percentile(ordered, 0.95)),
+            'p99': in_ms(percentile(ordered, 0.99)),
+            'mean': in_ms(sum(ordered) / len(ordered)),
+            'max': in_ms(ordered[-1]),
+        },
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark latency and throughput of the main API endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Requests per endpoint (default 200)'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=10,
+            help='Unrecorded requests per read endpoint first (default 10)'
+        )
+        parser.add_argument(
+            '--viewers',
+            type=int,
+            default=10,
+            help='Number of users to send requests as (default 10)'
+        )
+        parser.add_argument(
+            '--host',
+            help='Host header for the requests (default: first ALLOWED_HOSTS entry)'
+        )
+        parser.add_argument(
+            '--json',
+            dest='json_path',
+            help='Write the results to this JSON file'
+        )
+        parser.add_argument(
+            '--compare',
+            dest='compare_path',
+            help='Earlier results JSON to compare the percentiles against'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Run every endpoint benchmark and report, save and compare results.
+        """
+        if not Post.objects.exists():
+            raise CommandError('No posts found; run seed_social_graph first')
+
+        baseline = None
+        if options['compare_path']:
+            try:
+                with open(options['compare_path'], encoding='utf-8') as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read {options["compare_path"]}: {exc}')
+
+        viewers = list(
+            User.objects.annotate(following_total=Count('following'))
+            .order_by('-following_total', 'pk')[:options['viewers']]
+        )
+        host = options['host'] or self._default_host()
+        clients = []
+        for viewer in viewers:
+            client = APIClient(HTTP_HOST=host)
+            client.force_authenticate(user=viewer)
+            clients.append((viewer, client))
+
+        started_at = timezone.now()
+        samples = defaultdict(lambda: {'latencies': [], 'wall': 0.0, 'errors': 0, 'queries': []})
+
+        saved_rates = TokenBucketThrottle.__dict__.get('THROTTLE_RATES')
+        TokenBucketThrottle.THROTTLE_RATES = dict.fromkeys(TokenBucketThrottle.THROTTLE_RATES)
+        try:
+            self._warm_up(clients, options['warmup'])
+            for step in self._plan(clients, options['iterations']):
+                self._request(samples, *step)
+        finally:
+            if saved_rates is None:
+                del TokenBucketThrottle.THROTTLE_RATES
+            else:
+                TokenBucketThrottle.THROTTLE_RATES = saved_rates
+            Notification.objects.filter(
+                actor__in=viewers, timestamp__gte=started_at
+            ).delete()
+
+        results = {
+            'started_at': started_at.isoformat(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'viewers': len(viewers),
+            'data': {
+                'users': User.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'likes': Like.objects.count(),
+                'notifications': Notification.objects.count(),
+            },
+            'endpoints': {
+                name: summarize(entry['latencies'], entry['wall'], entry['errors'], entry['queries'])
+                for name, entry in ((name, samples[name]) for name in ENDPOINTS)
+                if entry['latencies']
+            },
+        }
+
+        self._report(results, baseline)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✓ Results written to {options["json_path"]}'))
+
+    def _default_host(self):
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*':
+                return host.lstrip('.')
+        return 'localhost'
+
+    def _plan(self, clients, iterations):
+        """
+        Yield (endpoint, client, url) steps, cycling through the viewers.
+
+        Like/unlike and follow/unfollow steps come in pairs, so the data
+        set ends the run as it started.
+        """
+        hot_posts = list(
+            Post.objects.order_by('-like_count', '-pk').values_list('pk', flat=True)[:100]
+        )
+        like_targets = {
+            viewer.pk: list(
+                Post.objects.exclude(likes__user=viewer)
+                .order_by('-pk').values_list('pk', flat=True)[:TARGETS_PER_VIEWER]
+            )
+            for viewer, _ in clients
+        }
+        follow_targets = {
+            viewer.pk: list(
+                User.objects.exclude(followers=viewer).exclude(pk=viewer.pk)
+                .order_by('-pk').values_list('pk', flat=True)[:TARGETS_PER_VIEWER]
+            )
+            for viewer, _ in clients
+        }
+
+        def viewer_at(index):
+            return clients[index % len(clients)]
+
+        for index in range(iterations):
+            _, client = viewer_at(index)
+            yield 'feed', client, reverse('posts:feed')
+        for index in range(iterations):
+            _, client = viewer_at(index)
+            yield 'post_list', client, reverse('posts:post-list')
+        for index in range(iterations):
+            _, client = viewer_at(index)
+            post_id = hot_posts[index % len(hot_posts)]
+            yield 'post_comments', client, reverse('posts:post-comments', kwargs={'pk': post_id})
+
+        for index in range(iterations):
+            viewer, client = viewer_at(index)
+            targets = like_targets[viewer.pk]
+            if targets:
+                post_id = targets[index // len(clients) % len(targets)]
+                yield 'like', client, reverse('posts:like-post', kwargs={'pk': post_id})
+                yield 'unlike', client, reverse('posts:unlike-post', kwargs={'pk': post_id})
+
+        for index in range(iterations):
+            viewer, client = viewer_at(index)
+            targets = follow_targets[viewer.pk]
+            if targets:
+                user_id = targets[index // len(clients) % len(targets)]
+                yield 'follow', client, reverse('accounts:follow-user', kwargs={'user_id': user_id})
+                yield 'unfollow', client, reverse('accounts:unfollow-user', kwargs={'user_id': user_id})
+
+    def _warm_up(self, clients, warmup):
+        """Prime caches and connections with unrecorded read requests."""
+        for index in range(warmup):
+            _, client = clients[index % len(clients)]
+            client.get(reverse('posts:feed'))
+            client.get(reverse('posts:post-list'))
+
+    def _request(self, samples, name, client, url):
+        method = getattr(client, ENDPOINTS[name])
+        start = time.perf_counter()
+        response = method(url, secure=True)
+        elapsed = time.perf_counter() - start
+
+        entry = samples[name]
+        entry['latencies'].append(elapsed)
+        entry['wall'] += elapsed
+        if not 200 <= response.status_code < 300:
+            entry['errors'] += 1
+        metrics = getattr(response.wsgi_request, 'query_metrics', None)
+        if metrics is not None:
+            entry['queries'].append(metrics.db_queries)
+
+    def _report(self, results, baseline):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{results["iterations"]} requests per endpoint, {results["viewers"]} viewers, '
+            f'{results["data"]["posts"]} posts ({results["database"]})'
+        ))
+        previous = (baseline or {}).get('endpoints', {})
+        for name, entry in results['endpoints'].items():
+            latency = entry['latency_ms']
+            line = (
+                f'  {name:14} p50 {latency["p50"]:8.2f}  p95 {latency["p95"]:8.2f}  '
+                f'p99 {latency["p99"]:8.2f} ms  {entry["throughput_rps"]:8.1f} req/s  '
+                f'{entry["queries_per_request"]} queries'
+            )
+            if entry['errors']:
+                line += self.style.WARNING(f'  {entry["errors"]} errors')
+            self.stdout.write(line)
+
+            if name in previous:
+                deltas = []
+                for key in ('p50', 'p95', 'p99'):
+                    before = previous[name]['latency_ms'][key]
+                    change = (latency[key] - before) / before * 100 if before else 0
+                    deltas.append(f'{key} {change:+.1f}%')
+                self.stdout.write(f'  {"":14} vs baseline: {", ".join(deltas)}')
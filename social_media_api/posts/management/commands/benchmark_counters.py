@@ -0,0 +1,119 @@
+"""
+Django management command to benchmark like counting on one hot post.
+
+Starts a number of threads that all like the same freshly created post,
+each as its own users, first with write-through counters and then with
+the write-behind buffer (see posts/counters.py). For each mode it reports
+likes per second, failed likes (e.g. lock timeouts) and whether the
+post's like_count matches its like rows after the final flush.
+
+The users and post are created for the run and deleted afterwards. On
+SQLite writers serialize on the database lock, so run it against
+PostgreSQL to measure row-lock contention.
+
+Usage:
+    python manage.py benchmark_counters
+    python manage.py benchmark_counters --threads 16 --likes 200 --interval 0.5
+"""
+
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+
+from posts.counters import counter_buffer
+from posts.models import Post, Like, TrendingScore
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare write-through and write-behind like counters on one hot post'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Concurrent likers (default 8)'
+        )
+        parser.add_argument(
+            '--likes',
+            type=int,
+            default=100,
+            help='Likes per thread (default 100)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='COUNTER_FLUSH_INTERVAL for the write-behind run (default 1.0)'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Run both modes and report their throughput and consistency.
+        """
+        threads, likes = options['threads'], options['likes']
+        run = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([
+            User(username=f'counterbench_{run}_{index}')
+            for index in range(threads * likes)
+        ])
+        try:
+            for mode, interval in (('write-through', 0), ('write-behind', options['interval'])):
+                with override_settings(COUNTER_FLUSH_INTERVAL=interval):
+                    result = self._run(users[0], users, threads, likes)
+                consistent = result['like_count'] == result['like_rows']
+                style = self.style.SUCCESS if consistent and not result['errors'] else self.style.WARNING
+                self.stdout.write(style(
+                    f'{"✓" if consistent else "✗"} {mode}: {result["likes_per_sec"]} likes/s, '
+                    f'{result["errors"]} error(s), like_count {result["like_count"]} '
+                    f'for {result["like_rows"]} like row(s)'
+                ))
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def _run(self, author, users, threads, likes):
+        """Like one new post from every user, threads at a time."""
+        post = Post.objects.create(author=author, title='Counter benchmark', content='Hot post')
+        errors = []
+        barrier = threading.Barrier(threads)
+
+        def like_all(batch):
+            barrier.wait()
+            try:
+                for user in batch:
+                    try:
+                        Like.objects.add_like(user, post.pk)
+                    except Exception:
+                        errors.append(user.pk)
+            finally:
+                connections.close_all()
+
+        workers = [
+            threading.Thread(target=like_all, args=(users[index * likes:(index + 1) * likes],))
+            for index in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        counter_buffer.flush()
+
+        post.refresh_from_db(fields=['like_count'])
+        result = {
+            'likes_per_sec': round((threads * likes - len(errors)) / elapsed, 1) if elapsed else None,
+            'errors': len(errors),
+            'like_count': post.like_count,
+            'like_rows': Like.objects.filter(post=post).count(),
+        }
+        TrendingScore.objects.filter(post=post).delete()
+        post.delete()
+        return result
@@ -0,0 +1,124 @@
+"""
+Django management command to benchmark JSON rendering and compression.
+
+Builds feed pages in memory (posts, each with nested comments, as
+/api/feed/ returns them) and reports, per page size:
+- render time with DRF's stdlib JSONRenderer and with ORJSONRenderer
+  (orjson if installed)
+- for gzip and brotli (if installed): compressed size, bytes saved and
+  compression CPU time per response
+
+Usage:
+    python manage.py benchmark_responses
+    python manage.py benchmark_responses --posts 10 50 --comments 5 --json results.json
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from posts.benchmarking import sample_posts, sample_comments
+from posts.serializers import PostListSerializer, CommentSerializer
+from social_media_api import renderers
+from social_media_api.compression import available_encodings, compress
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON renderers and response compression'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts',
+            type=int,
+            nargs='+',
+            default=[10, 100],
+            help='Posts per page to measure (default 10 100)'
+        )
+        parser.add_argument(
+            '--comments',
+            type=int,
+            default=5,
+            help='Nested comments per post (default 5)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help='Runs per measurement; the fastest is reported (default 50)'
+        )
+        parser.add_argument(
+            '--json',
+            dest='json_path',
+            help='Also write the results to this JSON file'
+        )
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        if repeat < 1 or options['comments'] < 0 or min(options['posts']) < 1:
+            raise CommandError('--posts and --repeat must be positive')
+
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson is not installed; ORJSONRenderer falls back to the stdlib encoder'
+            ))
+        results = {'comments_per_post': options['comments'], 'repeat': repeat, 'pages': {}}
+
+        for page_size in options['posts']:
+            data = self.feed_page(page_size, options['comments'])
+            result = {'renderers': {}, 'compression': {}}
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'Feed page: {page_size} posts x {options["comments"]} comments'
+            ))
+            body = None
+            for name, renderer in (('stdlib', JSONRenderer()), ('orjson', renderers.ORJSONRenderer())):
+                body = renderer.render(data)
+                elapsed = self._time(lambda: renderer.render(data), repeat)
+                result['renderers'][name] = {'ms': round(elapsed * 1000, 3), 'bytes': len(body)}
+                self.stdout.write(f'  render {name:8} {elapsed * 1000:8.3f} ms  {len(body):9} bytes')
+
+            for encoding in available_encodings():
+                compressed = compress(body, encoding)
+                elapsed = self._time(lambda: compress(body, encoding), repeat)
+                saved = len(body) - len(compressed)
+                result['compression'][encoding] = {
+                    'ms': round(elapsed * 1000, 3),
+                    'bytes': len(compressed),
+                    'bytes_saved': saved,
+                    'percent_saved': round(saved * 100 / len(body), 1),
+                }
+                self.stdout.write(
+                    f'  {encoding:15} {elapsed * 1000:8.3f} ms  {len(compressed):9} bytes  '
+                    f'saved {saved} ({saved * 100 / len(body):.1f}%)'
+                )
+            results['pages'][page_size] = result
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✓ Results written to {options["json_path"]}'))
+
+    def feed_page(self, page_size, comments_per_post):
+        """Return a paginated feed response body with nested comments."""
+        posts = PostListSerializer(sample_posts(page_size), many=True).data
+        for index, post in enumerate(posts):
+            post['comments'] = CommentSerializer(sample_comments(
+                comments_per_post, post_id=post['id'], start=index * comments_per_post + 1
+            ), many=True).data
+        return {
+            'count': page_size * 10,
+            'next': 'http://testserver/api/feed/?page=2',
+            'previous': None,
+            'results': posts,
+        }
+
+    def _time(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,101 @@
+"""
+Django management command to benchmark list serialization.
+
+Serializes in-memory posts, comments and notifications (no database
+access, so only serializer CPU is measured) with DRF's standard
+ListSerializer and with FastListSerializer, the compiled field plan the
+list endpoints use. For each serializer it reports milliseconds per
+1,000 rows and checks that both produce byte-identical JSON.
+
+Usage:
+    python manage.py benchmark_serializers
+    python manage.py benchmark_serializers --rows 5000 --repeat 10 --json results.json
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from notifications.serializers import NotificationSerializer
+from posts.benchmarking import sample_posts, sample_comments, sample_notifications
+from posts.serializers import PostListSerializer, CommentSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark standard vs fast list serializers (ms per 1,000 rows)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Rows serialized per run (default 1000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Runs per measurement; the fastest is reported (default 20)'
+        )
+        parser.add_argument(
+            '--json',
+            dest='json_path',
+            help='Also write the results to this JSON file'
+        )
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        if rows < 1 or repeat < 1:
+            raise CommandError('--rows and --repeat must be positive')
+
+        cases = (
+            ('post_list', PostListSerializer, sample_posts(rows)),
+            ('comment', CommentSerializer, sample_comments(rows)),
+            ('notification', NotificationSerializer, sample_notifications(rows)),
+        )
+        renderer = JSONRenderer()
+        results = {'rows': rows, 'repeat': repeat, 'serializers': {}}
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Serializing {rows} rows (ms per 1,000 rows)'))
+        for name, serializer_class, instances in cases:
+            def standard():
+                return serializers.ListSerializer(instances, child=serializer_class()).data
+
+            def fast():
+                return serializer_class(instances, many=True).data
+
+            identical = renderer.render(standard()) == renderer.render(fast())
+            standard_ms = self._time(standard, repeat) * 1000 * 1000 / rows
+            fast_ms = self._time(fast, repeat) * 1000 * 1000 / rows
+            results['serializers'][name] = {
+                'standard_ms_per_1000': round(standard_ms, 3),
+                'fast_ms_per_1000': round(fast_ms, 3),
+                'speedup': round(standard_ms / fast_ms, 2),
+                'identical_json': identical,
+            }
+            self.stdout.write(
+                f'  {name:14} standard {standard_ms:9.3f}  fast {fast_ms:9.3f}  '
+                f'x{standard_ms / fast_ms:5.2f}  '
+                + (self.style.SUCCESS('identical JSON') if identical
+                   else self.style.ERROR('JSON DIFFERS'))
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✓ Results written to {options["json_path"]}'))
+
+        if not all(result['identical_json'] for result in results['serializers'].values()):
+            raise CommandError('Fast serializers produced different JSON')
+
+    def _time(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
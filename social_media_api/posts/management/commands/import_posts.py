@@ -0,0 +1,70 @@
+"""
+Django management command to bulk import posts from a JSON Lines file.
+
+Each line is a JSON object with title, content, author (username) and an
+optional created_at. The file is streamed, validated in chunks and
+inserted with bulk_create, one transaction per chunk.
+
+Usage:
+    python manage.py import_posts posts.jsonl
+    python manage.py import_posts - --author alice < posts.jsonl
+"""
+
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importers import DEFAULT_BATCH_SIZE, import_posts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Bulk import posts from a JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Path to the JSONL file, or - to read from stdin'
+        )
+        parser.add_argument(
+            '--author',
+            help='Username to attribute every post to (overrides per-line author)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Lines per chunk and transaction (default {DEFAULT_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Stream the input file through the importer and report totals.
+        """
+        author = None
+        if options['author']:
+            try:
+                author = User.objects.get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["author"]}" does not exist')
+
+        def report(result):
+            self.stdout.write(f'  {result.created} imported, {result.failed} failed...')
+
+        if options['path'] == '-':
+            result = import_posts(sys.stdin, author, options['batch_size'], report)
+        else:
+            try:
+                with open(options['path'], encoding='utf-8') as handle:
+                    result = import_posts(handle, author, options['batch_size'], report)
+            except OSError as exc:
+                raise CommandError(f'Cannot read {options["path"]}: {exc}')
+
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f'Line {error["line"]}: {error["errors"]}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Imported {result.created} post(s), {result.failed} line(s) rejected'
+        ))
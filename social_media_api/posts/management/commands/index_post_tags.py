@@ -0,0 +1,50 @@
+"""
+Django management command to (re)build the hashtag and mention index.
+
+Posts are normally indexed in the background after they are created or
+edited (from the outbox event stream). Run this after deploying the
+feature, or if the relay gave up on indexing events, to parse every post
+again in batches. Mentions that are already
+indexed don't notify again.
+
+Usage:
+    python manage.py index_post_tags
+    python manage.py index_post_tags --batch-size 2000
+"""
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tags import index_posts
+
+
+class Command(BaseCommand):
+    help = 'Parse hashtags and mentions of all posts into the index tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Posts parsed per batch and transaction (default 500)'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Index every post, one batch of ids at a time.
+        """
+        batch_size = options['batch_size']
+        post_ids = Post.objects.order_by('pk').values_list('pk', flat=True)
+        total = 0
+        last_id = 0
+
+        while True:
+            batch = list(post_ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            index_posts(batch)
+            total += len(batch)
+            last_id = batch[-1]
+            self.stdout.write(f'  {total} posts indexed...')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed hashtags and mentions for {total} post(s)'))
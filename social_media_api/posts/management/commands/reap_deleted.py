@@ -0,0 +1,37 @@
+"""
+Django management command to purge soft-deleted posts and accounts.
+
+Deleting a post or an account hides it at once and queues the removal of
+its rows in the background (see social_media_api/reaper.py). Queued work
+is lost on a process restart, so run this regularly (e.g. hourly from
+cron) to finish any purge that did not complete.
+
+Usage:
+    python manage.py reap_deleted
+    python manage.py reap_deleted --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+
+from social_media_api.reaper import reap_deleted
+
+
+class Command(BaseCommand):
+    help = 'Hard-delete soft-deleted posts and accounts in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows deleted per transaction (default REAPER_BATCH_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Reap every soft-deleted account, then every remaining soft-deleted post.
+        """
+        counts = reap_deleted(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Reaped {counts['users']} account(s) and {counts['posts']} post(s) "
+            f"({counts['rows']} row(s) deleted)"
+        ))
@@ -0,0 +1,26 @@
+"""
+Django management command to rebuild the trending score table.
+
+Scores are normally maintained incrementally by the like, unlike and
+comment endpoints. Run this after deploying the trending feature, after
+bulk imports or seeding, or after changing TRENDING_HALF_LIFE_HOURS, to
+recompute every score from the likes and comments in the sliding window.
+
+Usage:
+    python manage.py rebuild_trending_scores
+"""
+
+from django.core.management.base import BaseCommand
+
+from posts.models import TrendingScore
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending scores from recent likes and comments'
+
+    def handle(self, *args, **options):
+        """
+        Replace the trending table with freshly computed scores.
+        """
+        count = TrendingScore.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt trending scores for {count} post(s)'))
@@ -0,0 +1,63 @@
+"""
+Django management command to repair drifted like counts.
+
+With COUNTER_FLUSH_INTERVAL set, like_count changes are buffered in each
+worker process (see posts/counters.py) and a crashed worker loses the
+deltas it had not flushed. Like rows are always written in the request,
+so this command recomputes like_count from them for every post where the
+two disagree. Posts liked or unliked within the grace period are
+skipped, as live workers may still hold their deltas. Run ``rebuild_trending_scores`` as
+well to recompute trending scores.
+
+Skipping recent posts relies on the cache every worker writes to, so with
+write-behind counters on and a per-process cache (no REDIS_URL) the
+command refuses to run unless --force is given.
+
+Usage:
+    python manage.py reconcile_counters
+    python manage.py reconcile_counters --grace 0 --batch-size 5000
+    python manage.py reconcile_counters --force
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.counters import (
+    cache_is_shared, counter_buffer, reconcile_like_counts, write_behind_enabled
+)
+
+
+class Command(BaseCommand):
+    help = 'Recompute like counts that drifted from the like rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Posts checked per query (default 1000)'
+        )
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=60,
+            help='Skip posts liked or unliked in the last N seconds (default 60)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Run even though the cache is not shared between processes'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Flush this process's buffer, then correct drifted like counts.
+        """
+        if write_behind_enabled() and not cache_is_shared() and not options['force']:
+            raise CommandError(
+                'Write-behind counters are on but the cache is per-process, so deltas '
+                'other workers have not flushed cannot be seen. Set REDIS_URL, or pass '
+                '--force if no other process is running.'
+            )
+        counter_buffer.flush()
+        corrected = reconcile_like_counts(options['batch_size'], options['grace'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Corrected like counts of {corrected} post(s)'))
@@ -0,0 +1,81 @@
+"""
+Django management command to relay outbox events to their consumers.
+
+Every post, comment, like and follow write appends an event to the
+outbox (see social_media_api/outbox.py). Events are normally relayed in
+the background right after the write commits; run this as a separate
+process with ``--loop`` so events survive restarts and the stream keeps
+flowing under load. Processed events older than ``--prune-days`` are
+deleted at the end of a run, and every ``--prune-every`` polls with
+``--loop``.
+
+Usage:
+    python manage.py relay_outbox
+    python manage.py relay_outbox --loop --interval 0.5
+    python manage.py relay_outbox --loop --prune-every 3600
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from social_media_api.outbox import prune_outbox, relay_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox events in order'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new events until interrupted'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds between polls with --loop (default 1.0)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Events per transaction (default OUTBOX_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--prune-days',
+            type=int,
+            default=7,
+            help='Delete events processed more than N days ago (default 7, 0 keeps them)'
+        )
+        parser.add_argument(
+            '--prune-every',
+            type=int,
+            default=600,
+            help='With --loop, prune after every N polls (default 600)'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Relay pending events once, or continuously with --loop.
+        """
+        total = pruned = polls = 0
+        try:
+            while True:
+                total += relay_outbox(options['batch_size'] or settings.OUTBOX_BATCH_SIZE)
+                if not options['loop']:
+                    break
+                polls += 1
+                if options['prune_days'] and polls % options['prune_every'] == 0:
+                    pruned += prune_outbox(options['prune_days'])
+                close_old_connections()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        if options['prune_days']:
+            pruned += prune_outbox(options['prune_days'])
+            self.stdout.write(self.style.SUCCESS(f'✓ Pruned {pruned} processed event(s)'))
+        self.stdout.write(self.style.SUCCESS(f'✓ Relayed {total} event(s)'))
@@ -0,0 +1,41 @@
+"""
+Django management command to run queued bulk admin jobs.
+
+Bulk admin actions (see social_media_api/admin_jobs.py) queue a job that
+is processed in the background. Queued work is lost on a process
+restart, so run this regularly (e.g. hourly from cron) to finish any job
+that did not complete. Each job resumes from its last saved chunk; a
+running job is only resumed once it has made no progress for
+ADMIN_JOB_STALE_SECONDS, so overlapping runs never process a job twice.
+
+Usage:
+    python manage.py run_admin_jobs
+    python manage.py run_admin_jobs --include-failed
+"""
+
+from django.core.management.base import BaseCommand
+
+from social_media_api.admin_jobs import resume_admin_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run pending and interrupted bulk admin jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-failed',
+            action='store_true',
+            help='Also retry jobs that failed'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Run every unfinished job, oldest first.
+        """
+        jobs = resume_admin_jobs(include_failed=options['include_failed'])
+        failed = [job for job in jobs if job.status == job.FAILED]
+        for job in failed:
+            self.stdout.write(self.style.WARNING(f'Job {job.pk} failed: {job.error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Ran {len(jobs)} job(s), {len(failed)} failed'
+        ))
@@ -0,0 +1,69 @@
+"""
+Django management command to generate a synthetic social graph.
+
+Creates users with a power-law follower distribution plus posts, comments,
+likes and notifications, all with bulk_create, for reproducing
+production-scale data locally. Seeded users log in with the password
+``seed-password-123``.
+
+Usage:
+    python manage.py seed_social_graph
+    python manage.py seed_social_graph --users 10000 --posts-per-user 10 --seed 42
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seeding import DEFAULT_BATCH_SIZE, SEED_PASSWORD, seed_social_graph
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, follows, posts, comments, likes and notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Number of users to create (default 1000)')
+        parser.add_argument('--posts-per-user', type=int, default=5,
+                            help='Average posts per user (default 5)')
+        parser.add_argument('--comments-per-post', type=int, default=2,
+                            help='Average comments per post (default 2)')
+        parser.add_argument('--likes-per-post', type=int, default=5,
+                            help='Average likes per post (default 5)')
+        parser.add_argument('--avg-following', type=int, default=20,
+                            help='Average accounts followed per user (default 20)')
+        parser.add_argument('--alpha', type=float, default=1.2,
+                            help='Power-law exponent of user popularity (default 1.2)')
+        parser.add_argument('--days', type=int, default=90,
+                            help='Spread timestamps over this many days (default 90)')
+        parser.add_argument('--prefix', default='seed',
+                            help='Username prefix (default "seed")')
+        parser.add_argument('--seed', type=int,
+                            help='Random seed for a reproducible data set')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'Rows per bulk insert (default {DEFAULT_BATCH_SIZE})')
+
+    def handle(self, *args, **options):
+        """
+        Generate the data set and report row counts.
+        """
+        if options['users'] < 2:
+            raise CommandError('--users must be at least 2')
+
+        counts = seed_social_graph(
+            users=options['users'],
+            posts_per_user=options['posts_per_user'],
+            comments_per_post=options['comments_per_post'],
+            likes_per_post=options['likes_per_post'],
+            avg_following=options['avg_following'],
+            alpha=options['alpha'],
+            days=options['days'],
+            prefix=options['prefix'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=lambda message: self.stdout.write(f'  {message}...'),
+        )
+
+        for kind, count in counts.items():
+            self.stdout.write(f'  {kind:14} {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Seeded {counts["users"]} users (password "{SEED_PASSWORD}")'
+        ))
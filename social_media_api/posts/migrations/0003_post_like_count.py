@@ -0,0 +1,36 @@
+# Generated by Django 5.1.15 on 2026-10-19 09:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def backfill_like_count(apps, schema_editor):
+    """Populate like_count from the existing Like rows."""
+    Post = apps.get_model('posts', 'Post')
+    Like = apps.get_model('posts', 'Like')
+    counts = (
+        Like.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Post.objects.filter(pk__in=Like.objects.values('post')).update(
+        like_count=Subquery(counts)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_like'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of likes on this post'),
+        ),
+        migrations.RunPython(backfill_like_count, migrations.RunPython.noop),
+    ]
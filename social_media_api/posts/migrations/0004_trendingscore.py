@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_like_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(help_text='Post this score belongs to', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.post')),
+                ('score', models.FloatField(help_text='Log of the time-decayed engagement sum (epoch relative)')),
+                ('updated_at', models.DateTimeField(help_text='Timestamp of the last engagement event')),
+            ],
+            options={
+                'verbose_name': 'Trending Score',
+                'verbose_name_plural': 'Trending Scores',
+                'indexes': [models.Index(fields=['-score'], name='posts_trend_score_3c368b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_trendingscore'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Lowercased tag without the leading #', max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Hashtag',
+                'verbose_name_plural': 'Hashtags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Mention',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the mention was indexed')),
+                ('post', models.ForeignKey(help_text='Post containing the mention', on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.post')),
+                ('user', models.ForeignKey(help_text='User mentioned in the post', on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Mention',
+                'verbose_name_plural': 'Mentions',
+                'ordering': ['-created_at'],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PostHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hashtag', models.ForeignKey(help_text='Hashtag used in the post', on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='posts.hashtag')),
+                ('post', models.ForeignKey(help_text='Post containing the hashtag', on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_links', to='posts.post')),
+            ],
+            options={
+                'verbose_name': 'Post Hashtag',
+                'verbose_name_plural': 'Post Hashtags',
+                'unique_together': {('hashtag', 'post')},
+            },
+        ),
+    ]
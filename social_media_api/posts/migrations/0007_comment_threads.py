@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast, Concat, LPad
+
+
+def fill_root_paths(apps, schema_editor):
+    """Existing comments are all top-level: path is their own padded id."""
+    Comment = apps.get_model('posts', 'Comment')
+    Comment.objects.filter(path='').update(path=Concat(
+        LPad(Cast('id', models.CharField()), 10, models.Value('0')),
+        models.Value('/'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_deleted_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Nesting level (0 for top-level comments)'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Comment this comment replies to', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Materialized path from the thread root to this comment', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comme_post_id_abd11d_idx'),
+        ),
+        migrations.RunPython(fill_root_paths, migrations.RunPython.noop),
+    ]
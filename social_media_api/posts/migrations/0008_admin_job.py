@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('posts', '0007_comment_threads'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(help_text='Bulk action to run', max_length=50)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Action arguments')),
+                ('object_ids', models.JSONField(default=list, help_text='Selected primary keys in ascending order')),
+                ('total', models.PositiveIntegerField(default=0, help_text='Number of selected objects')),
+                ('processed', models.PositiveIntegerField(default=0, help_text='Objects handled so far')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', help_text='Job state', max_length=10)),
+                ('error', models.TextField(blank=True, help_text='Error message if the job failed')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the job was queued')),
+                ('finished_at', models.DateTimeField(blank=True, help_text='When the job completed or failed', null=True)),
+                ('content_type', models.ForeignKey(help_text='Model the action applies to', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('created_by', models.ForeignKey(blank=True, help_text='Moderator who started the job', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Admin Job',
+                'verbose_name_plural': 'Admin Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status'], name='posts_admin_status_43ecfe_idx')],
+            },
+        ),
+    ]
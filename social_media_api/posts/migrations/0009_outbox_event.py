@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_admin_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(help_text='Event type', max_length=50)),
+                ('payload', models.JSONField(default=dict, help_text='Ids describing the change')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the change was written')),
+                ('processed_at', models.DateTimeField(blank=True, help_text='When the relay handled the event', null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Failed delivery attempts')),
+                ('error', models.TextField(blank=True, help_text='Last consumer error')),
+            ],
+            options={
+                'verbose_name': 'Outbox Event',
+                'verbose_name_plural': 'Outbox Events',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['id'], name='posts_outbox_pending_idx'), models.Index(fields=['processed_at'], name='posts_outbo_process_1371d0_idx')],
+            },
+        ),
+    ]
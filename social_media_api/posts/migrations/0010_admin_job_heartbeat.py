@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_outbox_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adminjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='When the running worker last claimed the job or finished a chunk', null=True),
+        ),
+    ]
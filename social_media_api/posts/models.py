@@ -5,13 +5,190 @@ This module defines the Post and Comment models with relationships
 to users and appropriate fields for content management.
 """
 
-from django.db import models
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import models, connections, transaction, IntegrityError
+from django.db.models.functions import Abs, Cast, Concat, Exp, Greatest, LPad, Ln, RowNumber, Substr
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from social_media_api.partitioning import retention_cutoff
 
 # Example usage: models.TextField() for large text content
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for Post with viewer-specific annotations.
+    """
+    
+    def with_viewer_state(self, user):
+        """
+        Annotate each post with liked_by_me for the given user.
+        
+        Uses a single correlated EXISTS subquery against the (user, post)
+        index on Like, so a whole page is resolved in the same query that
+        fetches the posts. like_count is already a column on Post.
+        """
+        if user is None or not user.is_authenticated:
+            return self.annotate(liked_by_me=models.Value(False, output_field=models.BooleanField()))
+        return self.annotate(
+            liked_by_me=models.Exists(
+                Like.objects.filter(post=models.OuterRef('pk'), user=user)
+            )
+        )
+    
+    def with_comment_count(self):
+        """
+        Annotate each post with its number of comments (num_comments).
+        
+        Read through Post.comment_count, so list endpoints get every
+        count in the same query instead of one COUNT per post.
+        """
+        return self.annotate(num_comments=models.Count('comments', distinct=True))
+    
+    def within_retention(self):
+        """
+        Limit to posts inside the PARTITION_RETENTION_MONTHS window.
+        
+        A no-op unless the setting is configured; see
+        social_media_api.partitioning.
+        """
+        cutoff = retention_cutoff()
+        if cutoff is None:
+            return self
+        return self.filter(created_at__gte=cutoff)
+    
+    def with_comments(self):
+        """
+        Prefetch comments together with their authors in one extra query.
+        """
+        return self.prefetch_related(
+            models.Prefetch('comments', queryset=Comment.objects.select_related('author'))
+        )
+
+
+class VisiblePostManager(models.Manager.from_queryset(PostQuerySet)):
+    """
+    Default Post manager: hides soft-deleted posts.
+    
+    Use Post.all_objects to include them (admin, reaper).
+    """
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+# Width of one materialized-path segment: the zero-padded comment id plus '/'
+COMMENT_PATH_DIGITS = 10
+COMMENT_PATH_SEGMENT = COMMENT_PATH_DIGITS + 1
+
+
+class CommentQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for Comment with materialized-path thread queries.
+    
+    Every comment stores ``path``: the zero-padded ids of its ancestors and
+    itself, each followed by '/'. Sorting by path lists a thread depth
+    first in reply order, and a comment's subtree is the contiguous path
+    range starting at its own path, so it loads with one range scan of
+    the (post, path) index.
+    """
+    
+    def subtree(self, comment, max_depth=None):
+        """
+        Return the replies below comment, at any depth, in thread order.
+        
+        Args:
+            comment: The comment whose descendants to return
+            max_depth: Optional number of levels below comment to include
+        """
+        queryset = self.filter(
+            post_id=comment.post_id,
+            path__gt=comment.path,
+            path__lt=comment.path + '~',
+        )
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=comment.depth + max_depth)
+        return queryset.order_by('path')
+    
+    def with_first_replies(self, roots, limit):
+        """
+        Attach the first limit replies of each top-level comment in roots.
+        
+        Sets ``thread_replies`` (in thread order) and ``reply_count`` on
+        every root. The replies of all roots come from a single query over
+        the path range they span; a window function numbers the replies
+        within each thread and counts them.
+        
+        Returns:
+            list: The roots
+        """
+        roots = list(roots)
+        threads = {}
+        for root in roots:
+            root.thread_replies = []
+            root.reply_count = 0
+            threads[root.path] = root
+        if not roots:
+            return roots
+        
+        thread = Substr('path', 1, COMMENT_PATH_SEGMENT)
+        replies = (
+            self.filter(
+                post_id=roots[0].post_id,
+                depth__gt=0,
+                path__gt=min(threads),
+                path__lt=max(threads) + '~',
+            )
+            .annotate(
+                thread=thread,
+                position=models.Window(RowNumber(), partition_by=[thread], order_by='path'),
+                thread_size=models.Window(models.Count('id'), partition_by=[thread]),
+            )
+            # Always read the first reply so thread_size is known for each thread
+            .filter(position__lte=max(limit, 1))
+            .order_by('path')
+        )
+        for reply in replies:
+            root = threads.get(reply.thread)
+            if root is None:
+                continue
+            root.reply_count = reply.thread_size
+            if reply.position <= limit:
+                root.thread_replies.append(reply)
+        return roots
+    
+    def fill_root_paths(self):
+        """
+        Set the path of top-level comments inserted without one (bulk_create).
+        
+        Returns:
+            int: Number of comments updated
+        """
+        return self.filter(path='', parent__isnull=True).update(path=Concat(
+            LPad(Cast('id', models.CharField()), COMMENT_PATH_DIGITS, models.Value('0')),
+            models.Value('/'),
+        ))
+
+
+class VisibleCommentManager(models.Manager.from_queryset(CommentQuerySet)):
+    """
+    Default Comment manager: hides comments on soft-deleted posts and
+    comments by soft-deleted users until the reaper removes them.
+    """
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            post__deleted_at__isnull=True,
+            author__deleted_at__isnull=True,
+        )
+
+
 class Post(models.Model):
     """
     Post model representing user-generated content.
@@ -22,6 +199,12 @@ class Post(models.Model):
         content (TextField): Post content/body
         created_at (DateTimeField): Timestamp when post was created
         updated_at (DateTimeField): Timestamp when post was last updated
+        like_count (PositiveIntegerField): Denormalized number of likes,
+            maintained by LikeManager in the same transaction as the like row,
+            or in batches by posts.counters when COUNTER_FLUSH_INTERVAL is set
+        deleted_at (DateTimeField): Set when the post is soft-deleted; the
+            post is hidden at once and removed later by
+            social_media_api.reaper
     """
     
     author = models.ForeignKey(
@@ -50,6 +233,21 @@ class Post(models.Model):
         help_text="Timestamp when post was last updated"
     )
     
+    like_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of likes on this post"
+    )
+    
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the post was soft-deleted (pending removal)"
+    )
+    
+    objects = VisiblePostManager()
+    all_objects = PostQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Post'
@@ -57,6 +255,11 @@ class Post(models.Model):
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['author']),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='posts_post_deleted_idx',
+            ),
         ]
     
     def __str__(self):
@@ -64,8 +267,29 @@ class Post(models.Model):
     
     @property
     def comment_count(self):
-        """Return the number of comments on this post."""
+        """
+        Return the number of comments on this post.
+        
+        Uses the num_comments annotation from
+        PostQuerySet.with_comment_count() when present.
+        """
+        if hasattr(self, 'num_comments'):
+            return self.num_comments
         return self.comments.count()
+    
+    def soft_delete(self):
+        """
+        Hide the post immediately; dependents are removed by the reaper.
+        
+        Returns:
+            bool: False if the post was already soft-deleted
+        """
+        now = timezone.now()
+        updated = Post.all_objects.filter(pk=self.pk, deleted_at__isnull=True).update(
+            deleted_at=now
+        )
+        self.deleted_at = now
+        return bool(updated)
 
 
 class Comment(models.Model):
@@ -75,6 +299,11 @@ class Comment(models.Model):
     Attributes:
         post (ForeignKey): The post this comment belongs to
         author (ForeignKey): The user who created the comment
+        parent (ForeignKey): The comment this one replies to, if any
+        path (CharField): Materialized path of ids from the thread root
+            to this comment, set on insert (see CommentQuerySet)
+        depth (PositiveSmallIntegerField): 0 for top-level comments,
+            at most COMMENT_MAX_DEPTH
         content (TextField): Comment content
         created_at (DateTimeField): Timestamp when comment was created
         updated_at (DateTimeField): Timestamp when comment was last updated
@@ -94,6 +323,29 @@ class Comment(models.Model):
         help_text="User who created this comment"
     )
     
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='replies',
+        help_text="Comment this comment replies to"
+    )
+    
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Materialized path from the thread root to this comment"
+    )
+    
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text="Nesting level (0 for top-level comments)"
+    )
+    
     content = models.TextField(
         help_text="Comment content"
     )
@@ -108,17 +360,179 @@ class Comment(models.Model):
         help_text="Timestamp when comment was last updated"
     )
     
+    objects = VisibleCommentManager()
+    
     class Meta:
         ordering = ['created_at']
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
         indexes = [
             models.Index(fields=['post', 'created_at']),
+            models.Index(fields=['post', 'path']),
             models.Index(fields=['author']),
         ]
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
+    
+    def save(self, *args, **kwargs):
+        """
+        Save the comment, deriving depth and path from the parent on insert.
+        
+        The path ends with the comment's own id, so it is written with a
+        second UPDATE once the insert has assigned the id.
+        """
+        creating = self._state.adding
+        if creating and self.parent_id is not None:
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+        if creating and not self.path:
+            prefix = self.parent.path if self.parent_id is not None else ''
+            self.path = f'{prefix}{self.pk:0{COMMENT_PATH_DIGITS}d}/'
+            Comment._base_manager.filter(pk=self.pk).update(path=self.path)
+
+
+def _as_datetime(value):
+    """Convert a raw DATETIME column value (text on SQLite) to an aware datetime."""
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+class LikeManager(models.Manager):
+    """
+    Manager implementing like/unlike as single-statement writes.
+    
+    Each operation is one conflict-safe INSERT or DELETE followed by a
+    counter UPDATE on the post, both inside one transaction. The
+    RETURNING clauses hand back everything the view needs (new like
+    count, post author and title), so no extra SELECT is issued and
+    concurrent double-taps can never raise IntegrityError.
+    
+    With COUNTER_FLUSH_INTERVAL set, the like_count and trending updates
+    are buffered instead (see posts.counters) and the returned like_count
+    includes the deltas not yet flushed by this process.
+    """
+    
+    def add_like(self, user, post_id):
+        """
+        Like a post on behalf of user.
+        
+        Returns:
+            tuple: (like, post_info) where like is the new Like instance
+            (or None if the user had already liked the post) and post_info
+            is a dict with like_count, author_id and title (or None if the
+            post does not exist).
+        """
+        from .counters import change_like_count, record_engagement, write_behind_enabled
+        
+        like_table = self.model._meta.db_table
+        post_table = Post._meta.db_table
+        connection = connections[self.db]
+        now = timezone.now()
+        
+        with transaction.atomic(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {like_table} (user_id, post_id, created_at) '
+                    f'SELECT %s, id, %s FROM {post_table} '
+                    f'WHERE id = %s AND deleted_at IS NULL '
+                    f'ON CONFLICT (user_id, post_id) DO NOTHING RETURNING id',
+                    [user.pk, connection.ops.adapt_datetimefield_value(now), post_id]
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    return None, self._post_info(post_id)
+                
+                if write_behind_enabled():
+                    record_engagement(post_id, TrendingScoreManager.LIKE_WEIGHT, now)
+                    change_like_count(post_id, 1)
+                    like = self.model(id=row[0], user=user, post_id=post_id, created_at=now)
+                    return like, self._buffered_post_info(post_id, 1)
+                
+                cursor.execute(
+                    f'UPDATE {post_table} SET like_count = like_count + 1 '
+                    f'WHERE id = %s RETURNING like_count, author_id, title',
+                    [post_id]
+                )
+                like_count, author_id, title = cursor.fetchone()
+            
+            TrendingScore.objects.record(post_id, TrendingScoreManager.LIKE_WEIGHT, now)
+        
+        like = self.model(id=row[0], user=user, post_id=post_id, created_at=now)
+        return like, {'like_count': like_count, 'author_id': author_id, 'title': title}
+    
+    def remove_like(self, user, post_id):
+        """
+        Remove user's like from a post.
+        
+        Returns:
+            tuple: (removed, post_info) where removed tells whether a like
+            row was deleted and post_info is as for add_like.
+        """
+        from .counters import change_like_count, retract_engagement, write_behind_enabled
+        
+        like_table = self.model._meta.db_table
+        post_table = Post._meta.db_table
+        
+        with transaction.atomic(using=self.db):
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {like_table} WHERE user_id = %s AND post_id = %s '
+                    f'RETURNING created_at',
+                    [user.pk, post_id]
+                )
+                deleted = cursor.fetchone()
+                if deleted is None:
+                    return False, self._post_info(post_id)
+                
+                if write_behind_enabled():
+                    retract_engagement(
+                        post_id, TrendingScoreManager.LIKE_WEIGHT, _as_datetime(deleted[0])
+                    )
+                    change_like_count(post_id, -1)
+                    return True, self._buffered_post_info(post_id, -1)
+                
+                TrendingScore.objects.retract(
+                    post_id, TrendingScoreManager.LIKE_WEIGHT, _as_datetime(deleted[0])
+                )
+                
+                cursor.execute(
+                    f'UPDATE {post_table} SET like_count = like_count - 1 '
+                    f'WHERE id = %s AND like_count > 0 RETURNING like_count, author_id, title',
+                    [post_id]
+                )
+                row = cursor.fetchone()
+        
+        if row is None:
+            return True, self._post_info(post_id)
+        like_count, author_id, title = row
+        return True, {'like_count': like_count, 'author_id': author_id, 'title': title}
+    
+    def _buffered_post_info(self, post_id, delta):
+        """
+        Return post_info with like_count including unflushed deltas.
+        
+        Called inside the write's transaction, so the delta of this write
+        is not in the buffer yet (it is added on commit).
+        """
+        from .counters import counter_buffer
+        
+        info = self._post_info(post_id)
+        if info is not None:
+            pending = counter_buffer.pending_likes(post_id) + delta
+            info['like_count'] = max(info['like_count'] + pending, 0)
+        return info
+    
+    def _post_info(self, post_id):
+        """Fetch the counter fields of a post, or None if it doesn't exist."""
+        return (
+            Post.objects.filter(pk=post_id)
+            .values('like_count', 'author_id', 'title')
+            .first()
+        )
 
 
 class Like(models.Model):
@@ -153,6 +567,8 @@ class Like(models.Model):
         help_text="Timestamp when like was created"
     )
     
+    objects = LikeManager()
+    
     class Meta:
         unique_together = ['user', 'post']
         ordering = ['-created_at']
@@ -165,3 +581,482 @@ class Like(models.Model):
     
     def __str__(self):
         return f"{self.user.username} likes {self.post.title}"
+
+
+class TrendingScoreManager(models.Manager):
+    """
+    Manager for incrementally maintained, time-decayed trending scores.
+    
+    A post's score is ln(sum of weight * 2 ** ((t - EPOCH) / half-life))
+    over its engagement events at times t. Adding an event is a log-sum-exp
+    in a single UPDATE, and removing one is the matching log-difference.
+    Stored scores grow linearly with time and can't overflow. The decayed
+    value at any moment is exp(score - decay_offset(now)).
+    
+    The half-life and the sliding window (events older than it are
+    ignored) come from TRENDING_HALF_LIFE_HOURS and TRENDING_WINDOW_HOURS.
+    """
+    
+    EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    LIKE_WEIGHT = 1.0
+    COMMENT_WEIGHT = 2.0
+    
+    # Below this remaining log-mass a retraction deletes the row instead
+    RETRACT_EPSILON = 1e-6
+    
+    def decay_offset(self, at):
+        """Return the log-scale offset of time ``at`` relative to EPOCH."""
+        half_life = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 12) * 3600
+        return (at - self.EPOCH).total_seconds() * math.log(2) / half_life
+    
+    def contribution(self, weight, at):
+        """Return the stored-scale contribution of one event."""
+        return math.log(weight) + self.decay_offset(at)
+    
+    def record(self, post_id, weight, at=None):
+        """
+        Add an engagement event of the given weight to a post's score.
+        """
+        at = at or timezone.now()
+        self.add_contribution(post_id, self.contribution(weight, at), at)
+    
+    def add_contribution(self, post_id, contribution, at):
+        """
+        Add stored-scale mass to a post's score; ``at`` is the latest event.
+        
+        Several events can be added at once by passing the log-sum-exp of
+        their contributions (see posts.counters).
+        """
+        value = models.Value(contribution, output_field=models.FloatField())
+        one = models.Value(1.0, output_field=models.FloatField())
+        score = models.F('score')
+        
+        # ln(e^s + e^v) = max(s, v) + ln(1 + e^-|s - v|)
+        updated = self.filter(post_id=post_id).update(
+            score=Greatest(score, value) + Ln(one + Exp(-Abs(score - value))),
+            updated_at=at,
+        )
+        if not updated:
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(post_id=post_id, score=contribution, updated_at=at)
+            except IntegrityError:
+                # Another request created the row first; add to it instead
+                self.add_contribution(post_id, contribution, at)
+    
+    def retract(self, post_id, weight, at):
+        """
+        Remove an engagement event that was recorded at time ``at``.
+        """
+        self.retract_contribution(post_id, self.contribution(weight, at))
+    
+    def retract_contribution(self, post_id, contribution):
+        """
+        Remove stored-scale mass previously added to a post's score.
+        """
+        scores = self.filter(post_id=post_id)
+        
+        # Nothing meaningful would remain: drop the row
+        deleted, _ = scores.filter(score__lte=contribution + self.RETRACT_EPSILON).delete()
+        if deleted:
+            return
+        
+        # ln(e^s - e^c) = s + ln(1 - e^(c - s))
+        value = models.Value(contribution, output_field=models.FloatField())
+        one = models.Value(1.0, output_field=models.FloatField())
+        scores.update(score=models.F('score') + Ln(one - Exp(value - models.F('score'))))
+    
+    def window_start(self, now=None):
+        """Return the start of the sliding window."""
+        hours = getattr(settings, 'TRENDING_WINDOW_HOURS', 72)
+        return (now or timezone.now()) - timedelta(hours=hours)
+    
+    def top(self, limit, now=None):
+        """
+        Return [(post_id, current_score)] for the top ``limit`` posts.
+        
+        Posts without engagement inside the sliding window are skipped.
+        Current scores are in units of "likes right now".
+        """
+        now = now or timezone.now()
+        offset = self.decay_offset(now)
+        rows = (
+            self.filter(updated_at__gte=self.window_start(now))
+            .order_by('-score')
+            .values_list('post_id', 'score')[:limit]
+        )
+        return [(post_id, math.exp(score - offset)) for post_id, score in rows]
+    
+    def rebuild(self, now=None):
+        """
+        Recompute every score from the Like and Comment rows in the window.
+        
+        Returns:
+            int: Number of posts scored
+        """
+        start = self.window_start(now)
+        events = {}
+        for model, weight in ((Like, self.LIKE_WEIGHT), (Comment, self.COMMENT_WEIGHT)):
+            rows = (
+                model.objects.filter(created_at__gte=start)
+                .values_list('post_id', 'created_at')
+                .iterator(chunk_size=2000)
+            )
+            for post_id, created_at in rows:
+                events.setdefault(post_id, []).append(
+                    (self.contribution(weight, created_at), created_at)
+                )
+        
+        scores = []
+        for post_id, post_events in events.items():
+            values = [value for value, _ in post_events]
+            peak = max(values)
+            score = peak + math.log(sum(math.exp(value - peak) for value in values))
+            latest = max(created_at for _, created_at in post_events)
+            scores.append(self.model(post_id=post_id, score=score, updated_at=latest))
+        
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(scores, batch_size=1000)
+        return len(scores)
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed engagement score of a post, maintained incrementally.
+    
+    Every like or comment at time t adds weight * 2 ** ((t - epoch) /
+    half-life) to the post's sum. The sum is stored as its natural log, so
+    it never overflows, and each event is a single UPDATE (see
+    TrendingScoreManager). All scores decay at the same rate, so ordering
+    by the stored value always gives the current ranking. The top-K query
+    is an index scan that never touches the Like table.
+    
+    Attributes:
+        post (OneToOneField): The scored post (primary key)
+        score (FloatField): log of the epoch-relative decayed engagement sum
+        updated_at (DateTimeField): Time of the last engagement event
+    """
+    
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        help_text="Post this score belongs to"
+    )
+    
+    score = models.FloatField(
+        help_text="Log of the time-decayed engagement sum (epoch relative)"
+    )
+    
+    updated_at = models.DateTimeField(
+        help_text="Timestamp of the last engagement event"
+    )
+    
+    objects = TrendingScoreManager()
+    
+    class Meta:
+        verbose_name = 'Trending Score'
+        verbose_name_plural = 'Trending Scores'
+        indexes = [
+            models.Index(fields=['-score']),
+        ]
+    
+    def __str__(self):
+        return f"Trending score for post {self.post_id}"
+
+
+class Hashtag(models.Model):
+    """
+    A hashtag used in at least one post.
+    
+    Attributes:
+        name (CharField): Lowercased tag text without the leading #
+    """
+    
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        help_text="Lowercased tag without the leading #"
+    )
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Hashtag'
+        verbose_name_plural = 'Hashtags'
+    
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    """
+    Inverted index entry linking a hashtag to a post that uses it.
+    
+    Rows are written by posts.tags.index_posts in the background; the
+    unique (hashtag, post) index serves tag lookups.
+    
+    Attributes:
+        hashtag (ForeignKey): The hashtag
+        post (ForeignKey): A post containing the hashtag
+    """
+    
+    hashtag = models.ForeignKey(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name='post_links',
+        help_text="Hashtag used in the post"
+    )
+    
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='hashtag_links',
+        help_text="Post containing the hashtag"
+    )
+    
+    class Meta:
+        unique_together = ['hashtag', 'post']
+        verbose_name = 'Post Hashtag'
+        verbose_name_plural = 'Post Hashtags'
+    
+    def __str__(self):
+        return f"Post {self.post_id} #{self.hashtag_id}"
+
+
+class Mention(models.Model):
+    """
+    An @mention of a user in a post.
+    
+    Attributes:
+        user (ForeignKey): The mentioned user
+        post (ForeignKey): The post mentioning them
+        created_at (DateTimeField): When the mention was indexed
+    """
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        help_text="User mentioned in the post"
+    )
+    
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        help_text="Post containing the mention"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Timestamp when the mention was indexed"
+    )
+    
+    class Meta:
+        unique_together = ['user', 'post']
+        ordering = ['-created_at']
+        verbose_name = 'Mention'
+        verbose_name_plural = 'Mentions'
+    
+    def __str__(self):
+        return f"@{self.user_id} in post {self.post_id}"
+
+
+class AdminJob(models.Model):
+    """
+    A bulk admin action running as a chunked background job.
+    
+    Admin actions on large selections (see social_media_api.admin_jobs)
+    store the selected primary keys here and return at once. The job then
+    processes them in ADMIN_JOB_CHUNK_SIZE chunks, one transaction per
+    chunk, and records its progress after each chunk, so a job can be
+    watched in the admin and resumed after a restart with
+    ``manage.py run_admin_jobs``. A running job refreshes heartbeat_at
+    after every chunk; only one whose heartbeat is older than
+    ADMIN_JOB_STALE_SECONDS counts as interrupted and may be resumed.
+    
+    Attributes:
+        content_type (ForeignKey): Model the action applies to
+        action (CharField): Action name (delete, mark_read, reassign_author)
+        params (JSONField): Action arguments, e.g. {"author_id": 3}
+        object_ids (JSONField): Selected primary keys in ascending order
+        total (PositiveIntegerField): Number of selected objects
+        processed (PositiveIntegerField): Objects handled so far; also the
+            resume position in object_ids
+        status (CharField): pending, running, done or failed
+        error (TextField): Failure message of a failed job
+        created_by (ForeignKey): Moderator who started the job
+        created_at (DateTimeField): When the job was queued
+        finished_at (DateTimeField): When the job completed or failed
+        heartbeat_at (DateTimeField): When the running worker last claimed
+            the job or finished a chunk
+    """
+    
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    content_type = models.ForeignKey(
+        'contenttypes.ContentType',
+        on_delete=models.CASCADE,
+        help_text="Model the action applies to"
+    )
+    
+    action = models.CharField(
+        max_length=50,
+        help_text="Bulk action to run"
+    )
+    
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Action arguments"
+    )
+    
+    object_ids = models.JSONField(
+        default=list,
+        help_text="Selected primary keys in ascending order"
+    )
+    
+    total = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of selected objects"
+    )
+    
+    processed = models.PositiveIntegerField(
+        default=0,
+        help_text="Objects handled so far"
+    )
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        help_text="Job state"
+    )
+    
+    error = models.TextField(
+        blank=True,
+        help_text="Error message if the job failed"
+    )
+    
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Moderator who started the job"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the job was queued"
+    )
+    
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the job completed or failed"
+    )
+    
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the running worker last claimed the job or finished a chunk"
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Admin Job'
+        verbose_name_plural = 'Admin Jobs'
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} {self.content_type.model} #{self.pk}"
+    
+    @property
+    def percent_done(self):
+        """Return progress as a whole percentage."""
+        if not self.total:
+            return 100
+        return self.processed * 100 // self.total
+
+
+class OutboxEvent(models.Model):
+    """
+    A change to posts, comments, likes or follows, in commit order.
+    
+    Writes append an event in the same transaction as the change itself
+    (see social_media_api.outbox), so an event exists if and only if the
+    change committed. The relay (``manage.py relay_outbox``, and a
+    background run after each write) hands events to their consumers in
+    id order and marks them processed.
+    
+    Attributes:
+        topic (CharField): Event type, e.g. "like.created"
+        payload (JSONField): Ids describing the change
+        created_at (DateTimeField): When the change was written
+        processed_at (DateTimeField): When the relay handled the event;
+            null while it is pending
+        attempts (PositiveSmallIntegerField): Failed delivery attempts
+        error (TextField): Last consumer error
+    """
+    
+    topic = models.CharField(
+        max_length=50,
+        help_text="Event type"
+    )
+    
+    payload = models.JSONField(
+        default=dict,
+        help_text="Ids describing the change"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the change was written"
+    )
+    
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the relay handled the event"
+    )
+    
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Failed delivery attempts"
+    )
+    
+    error = models.TextField(
+        blank=True,
+        help_text="Last consumer error"
+    )
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Outbox Event'
+        verbose_name_plural = 'Outbox Events'
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(processed_at__isnull=True),
+                name='posts_outbox_pending_idx',
+            ),
+            models.Index(fields=['processed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
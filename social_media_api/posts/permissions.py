@@ -5,6 +5,8 @@ This module defines permissions to ensure users can only modify
 their own content.
 """
 
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework import permissions
 
 
@@ -14,6 +16,8 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
     
     - Read permissions (GET, HEAD, OPTIONS) are allowed for any request
     - Write permissions (PUT, PATCH, DELETE) are only allowed to the author
+    
+    Compares the author_id column so the author is never loaded.
     """
     
     def has_object_permission(self, request, view, obj):
@@ -25,4 +29,49 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             return True
         
         # Write permissions are only allowed to the author of the object
-        return obj.author == request.user
+        return obj.author_id == request.user.pk
+
+
+class AuthorScopedWriteMixin:
+    """
+    ViewSet mixin that checks authorship before loading objects for writes.
+    
+    For update and destroy, get_object() first reads only the author_id
+    of the row by primary key (one indexed query, nothing hydrated). A
+    missing row is a 404 and another user's row a 403, so unauthorized
+    writes never load the object, its annotations or its relations. The
+    author's own object is then loaded from a queryset filtered by
+    author_id, so authorship is enforced in SQL as well as by
+    IsAuthorOrReadOnly.
+    
+    Attributes:
+        author_scoped_actions (tuple): ViewSet actions checked this way
+    """
+    
+    author_scoped_actions = ('update', 'partial_update', 'destroy')
+    
+    def get_object(self):
+        """
+        Return the object, checking the author first for write requests.
+        """
+        if self.action not in self.author_scoped_actions:
+            return super().get_object()
+        
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        model = self.queryset.model
+        try:
+            author_id = model._default_manager.filter(**filter_kwargs).values_list(
+                'author_id', flat=True
+            ).first()
+        except (TypeError, ValueError):
+            raise Http404
+        if author_id is None:
+            raise Http404
+        if author_id != self.request.user.pk:
+            self.permission_denied(self.request)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        obj = get_object_or_404(queryset.filter(author_id=self.request.user.pk), **filter_kwargs)
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,340 @@
+"""
+Synthetic social graph generator for local load testing.
+
+Used by the ``seed_social_graph`` management command. Builds users, a
+follower graph, posts, comments, likes and notifications shaped roughly
+like production data:
+
+- Follower counts follow a power law. Every user is given a Zipf
+  popularity weight (rank ** -alpha) and followees are drawn by that
+  weight, so a few accounts have most of the followers and the long tail
+  has almost none. The number of accounts each user follows is heavy-tailed
+  too (Pareto).
+- Popular users also post more. Comments and likes go mostly to their
+  posts.
+- Timestamps are spread over the last ``days`` days. Comments and likes
+  come after the post they belong to.
+- Every like, comment and follow creates the matching notification, and
+  trending scores are rebuilt at the end.
+
+All rows are written with ``bulk_create`` in batches, one transaction per
+batch. Only ids are kept in memory, so hundreds of thousands of rows are
+fine. Seeded users share one password (SEED_PASSWORD), hashed once.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+
+from notifications.models import Notification
+
+from .models import Post, Comment, Like, TrendingScore
+
+User = get_user_model()
+
+SEED_PASSWORD = 'seed-password-123'
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Pareto shape for the number of accounts each user follows (mean 3x scale)
+FOLLOWING_PARETO_SHAPE = 1.5
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def _explicit_timestamps(model, fields):
+    """
+    Temporarily turn off auto_now/auto_now_add so bulk_create keeps the
+    timestamps set on the instances.
+
+    This changes the field definitions process-wide, which is fine for the
+    management command. Don't use it in request handling code.
+    """
+    saved = []
+    for name in fields:
+        field = model._meta.get_field(name)
+        saved.append((field, field.auto_now, field.auto_now_add))
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _insert(model, rows, batch_size, timestamp_fields=()):
+    """
+    bulk_create (instance, timestamp) pairs in batches and return the pks.
+
+    Each instance's ``timestamp_fields`` are set to its timestamp, overriding
+    auto_now/auto_now_add.
+    """
+    pks = []
+    with _explicit_timestamps(model, timestamp_fields):
+        for batch in _batches(rows, batch_size):
+            objects = []
+            for instance, timestamp in batch:
+                for field in timestamp_fields:
+                    setattr(instance, field, timestamp)
+                objects.append(instance)
+            with transaction.atomic():
+                model.objects.bulk_create(objects)
+            pks.extend(instance.pk for instance in objects)
+    return pks
+
+
+class SocialGraphSeeder:
+    """
+    Generates one synthetic data set.
+
+    Args:
+        users: Number of users to create
+        posts_per_user: Average posts per user
+        comments_per_post: Average comments per post
+        likes_per_post: Average likes per post
+        avg_following: Average number of accounts each user follows
+        alpha: Zipf exponent of user popularity (higher = more skewed)
+        days: Timestamps are spread over this many days before now
+        prefix: Username prefix; numbering continues after existing users
+        seed: Random seed for reproducible data sets
+        batch_size: Rows per bulk_create and transaction
+        progress: Optional callable receiving a status string per stage
+    """
+
+    def __init__(self, users=1000, posts_per_user=5, comments_per_post=2,
+                 likes_per_post=5, avg_following=20, alpha=1.2, days=90,
+                 prefix='seed', seed=None, batch_size=DEFAULT_BATCH_SIZE,
+                 progress=None):
+        self.users = users
+        self.posts_per_user = posts_per_user
+        self.comments_per_post = comments_per_post
+        self.likes_per_post = likes_per_post
+        self.avg_following = avg_following
+        self.alpha = alpha
+        self.days = days
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.progress = progress or (lambda message: None)
+        self.random = random.Random(seed)
+        self.now = timezone.now()
+        self.counts = {}
+
+    def run(self):
+        """
+        Generate the data set.
+
+        Returns:
+            dict: Number of rows created per kind
+        """
+        self.user_ids = self.create_users()
+        self.progress(f'{len(self.user_ids)} users')
+
+        # Zipf popularity weights over a random ranking of the new users
+        ranked = list(self.user_ids)
+        self.random.shuffle(ranked)
+        self.popularity = {
+            user_id: 1 / (rank + 1) ** self.alpha for rank, user_id in enumerate(ranked)
+        }
+        self.ranked_ids = ranked
+        self.ranked_cum_weights = list(accumulate(self.popularity[u] for u in ranked))
+
+        self.create_follows()
+        self.progress(f'{self.counts["follows"]} follows')
+        self.create_posts()
+        self.progress(f'{self.counts["posts"]} posts')
+        self.create_comments()
+        self.progress(f'{self.counts["comments"]} comments')
+        self.create_likes()
+        self.progress(f'{self.counts["likes"]} likes')
+        self.counts['trending_scores'] = TrendingScore.objects.rebuild()
+        self.counts['notifications'] = self.notification_count
+        return self.counts
+
+    def random_time(self, after=None):
+        """Return a random timestamp in the window, later than ``after``."""
+        start = after or self.now - timedelta(days=self.days)
+        span = max((self.now - start).total_seconds(), 0)
+        return start + timedelta(seconds=self.random.uniform(0, span))
+
+    def popular_users(self, k):
+        """Draw k user ids weighted by popularity (with replacement)."""
+        return self.random.choices(self.ranked_ids, cum_weights=self.ranked_cum_weights, k=k)
+
+    def create_users(self):
+        existing = User.objects.filter(username__startswith=f'{self.prefix}_').count()
+        password = make_password(SEED_PASSWORD)
+
+        def rows():
+            for number in range(existing + 1, existing + self.users + 1):
+                username = f'{self.prefix}_{number}'
+                yield User(
+                    username=username,
+                    email=f'{username}@example.com',
+                    password=password,
+                    bio=f'Synthetic user {number}',
+                ), None
+
+        user_ids = _insert(User, rows(), self.batch_size)
+        self.counts['users'] = len(user_ids)
+        return user_ids
+
+    def create_follows(self):
+        field = User._meta.get_field('followers')
+        through = field.remote_field.through
+        followed_column = f'{field.m2m_field_name()}_id'
+        follower_column = f'{field.m2m_reverse_field_name()}_id'
+        user_type = ContentType.objects.get_for_model(User)
+        cap = len(self.user_ids) - 1
+        follows = []
+
+        def rows():
+            for follower_id in self.user_ids:
+                scale = self.avg_following / 3
+                degree = min(cap, max(1, round(scale * self.random.paretovariate(
+                    FOLLOWING_PARETO_SHAPE
+                ))))
+                followed = set(self.popular_users(degree))
+                followed.discard(follower_id)
+                for followed_id in followed:
+                    follows.append((followed_id, follower_id))
+                    yield through(**{
+                        followed_column: followed_id,
+                        follower_column: follower_id,
+                    }), None
+
+        self.counts['follows'] = len(_insert(through, rows(), self.batch_size))
+        self.notification_count = self.create_notifications(
+            (followed_id, follower_id, 'started following you', user_type, followed_id,
+             self.random_time())
+            for followed_id, follower_id in follows
+        )
+
+    def create_posts(self):
+        total = self.users * self.posts_per_user
+        authors = self.popular_users(total)
+        created = [self.random_time() for _ in authors]
+
+        def rows():
+            for number, (author_id, created_at) in enumerate(zip(authors, created), 1):
+                yield Post(
+                    author_id=author_id,
+                    title=f'Synthetic post {number}',
+                    content=f'Synthetic content for post {number}. ' * 4,
+                ), created_at
+
+        post_ids = _insert(Post, rows(), self.batch_size, ('created_at', 'updated_at'))
+        self.posts = list(zip(post_ids, authors, created))
+        # Posts by popular users attract most comments and likes
+        self.post_cum_weights = list(accumulate(
+            self.popularity[author_id] for _, author_id, _ in self.posts
+        ))
+        self.counts['posts'] = len(post_ids)
+
+    def popular_posts(self, k):
+        """Draw k (post_id, author_id, created_at) tuples weighted by author popularity."""
+        if not self.posts:
+            return []
+        return self.random.choices(self.posts, cum_weights=self.post_cum_weights, k=k)
+
+    def create_comments(self):
+        post_type = ContentType.objects.get_for_model(Post)
+        picks = [
+            (post, self.random.choice(self.user_ids), self.random_time(post[2]))
+            for post in self.popular_posts(len(self.posts) * self.comments_per_post)
+        ]
+
+        def rows():
+            for (post_id, _, _), author_id, created_at in picks:
+                yield Comment(
+                    post_id=post_id,
+                    author_id=author_id,
+                    content='Synthetic comment',
+                ), created_at
+
+        self.counts['comments'] = len(
+            _insert(Comment, rows(), self.batch_size, ('created_at', 'updated_at'))
+        )
+        Comment.objects.fill_root_paths()
+        self.notification_count += self.create_notifications(
+            (post_author_id, author_id, 'commented on your post', post_type, post_id, created_at)
+            for (post_id, post_author_id, _), author_id, created_at in picks
+        )
+
+    def create_likes(self):
+        post_type = ContentType.objects.get_for_model(Post)
+        seen = set()
+        picks = []
+        for post in self.popular_posts(len(self.posts) * self.likes_per_post):
+            user_id = self.random.choice(self.user_ids)
+            if (user_id, post[0]) not in seen:
+                seen.add((user_id, post[0]))
+                picks.append((post, user_id, self.random_time(post[2])))
+
+        rows = (
+            (Like(user_id=user_id, post_id=post_id), created_at)
+            for (post_id, _, _), user_id, created_at in picks
+        )
+        self.counts['likes'] = len(_insert(Like, rows, self.batch_size, ('created_at',)))
+        self.notification_count += self.create_notifications(
+            (post_author_id, user_id, 'liked your post', post_type, post_id, created_at)
+            for (post_id, post_author_id, _), user_id, created_at in picks
+        )
+
+        # Sync the denormalized counter for the seeded posts
+        if self.posts:
+            counts = (
+                Like.objects.filter(post=OuterRef('pk'))
+                .order_by()
+                .values('post')
+                .annotate(total=Count('pk'))
+                .values('total')
+            )
+            Post.objects.filter(
+                pk__gte=min(post_id for post_id, _, _ in self.posts),
+                pk__lte=max(post_id for post_id, _, _ in self.posts),
+                pk__in=Like.objects.values('post'),
+            ).update(like_count=Subquery(counts))
+
+    def create_notifications(self, events):
+        """
+        Insert a notification per (recipient, actor, verb, type, id, time)
+        event, skipping actions on the actor's own content.
+        """
+        rows = (
+            (Notification(
+                recipient_id=recipient_id,
+                actor_id=actor_id,
+                verb=verb,
+                target_content_type=content_type,
+                target_object_id=object_id,
+            ), timestamp)
+            for recipient_id, actor_id, verb, content_type, object_id, timestamp in events
+            if recipient_id != actor_id
+        )
+        return len(_insert(Notification, rows, self.batch_size, ('timestamp',)))
+
+
+def seed_social_graph(**options):
+    """
+    Generate a synthetic data set; see SocialGraphSeeder for the options.
+
+    Returns:
+        dict: Number of rows created per kind
+    """
+    return SocialGraphSeeder(**options).run()
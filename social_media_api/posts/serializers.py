@@ -6,7 +6,9 @@ handling data validation and representation.
 """
 
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from social_media_api.serialization import FastListSerializer
 from .models import Post, Comment, Like
 
 User = get_user_model()
@@ -17,6 +19,9 @@ class CommentSerializer(serializers.ModelSerializer):
     Serializer for Comment model.
     
     Includes author information and handles comment creation/updates.
+    Replies set ``parent`` to the comment they answer; ``parent`` and
+    ``depth`` are null and 0 for top-level comments, so clients that
+    ignore threading still see every comment as a flat list.
     """
     
     author = serializers.StringRelatedField(read_only=True)
@@ -25,10 +30,41 @@ class CommentSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'post_id', 'author', 'author_id', 
+        fields = ['id', 'post', 'post_id', 'parent', 'depth', 'author', 'author_id', 
                   'content', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'author', 'author_id', 'post_id', 
+        read_only_fields = ['id', 'author', 'author_id', 'post_id', 'depth',
                            'created_at', 'updated_at']
+        list_serializer_class = FastListSerializer
+    
+    def validate(self, attrs):
+        """
+        Check that a reply stays on its parent's post and within
+        COMMENT_MAX_DEPTH, and that existing comments aren't re-threaded.
+        """
+        if self.instance is not None:
+            if 'parent' in attrs and attrs['parent'] != self.instance.parent:
+                raise serializers.ValidationError({
+                    'parent': 'The parent of an existing comment cannot be changed.'
+                })
+            post = attrs.get('post')
+            moved = post is not None and post.pk != self.instance.post_id
+            if moved and (self.instance.parent_id or self.instance.replies.exists()):
+                raise serializers.ValidationError({
+                    'post': 'Comments in a reply thread cannot be moved to another post.'
+                })
+            return attrs
+        
+        parent = attrs.get('parent')
+        if parent is not None:
+            if parent.post_id != attrs['post'].pk:
+                raise serializers.ValidationError({
+                    'parent': 'The parent comment belongs to a different post.'
+                })
+            if parent.depth >= settings.COMMENT_MAX_DEPTH:
+                raise serializers.ValidationError({
+                    'parent': f'Replies cannot be nested more than {settings.COMMENT_MAX_DEPTH} levels deep.'
+                })
+        return attrs
     
     def create(self, validated_data):
         """
@@ -38,6 +74,23 @@ class CommentSerializer(serializers.ModelSerializer):
         return Comment.objects.create(**validated_data)
 
 
+class CommentThreadSerializer(CommentSerializer):
+    """
+    Top-level comment with the first replies of its thread.
+    
+    ``replies`` is flat and in thread order (each reply follows the
+    comment it answers); use ``depth`` to indent. ``reply_count`` is the
+    size of the whole thread, so clients know when to fetch the rest from
+    /api/comments/{id}/replies/.
+    """
+    
+    reply_count = serializers.IntegerField(read_only=True)
+    replies = CommentSerializer(source='thread_replies', many=True, read_only=True)
+    
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['reply_count', 'replies']
+
+
 class PostSerializer(serializers.ModelSerializer):
     """
     Serializer for Post model.
@@ -48,14 +101,25 @@ class PostSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
     author_id = serializers.IntegerField(source='author.id', read_only=True)
     comment_count = serializers.IntegerField(read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
     comments = CommentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Post
         fields = ['id', 'author', 'author_id', 'title', 'content', 
-                  'created_at', 'updated_at', 'comment_count', 'comments']
+                  'created_at', 'updated_at', 'comment_count', 'like_count',
+                  'liked_by_me', 'comments']
         read_only_fields = ['id', 'author', 'author_id', 'created_at', 
-                           'updated_at', 'comment_count']
+                           'updated_at', 'comment_count', 'like_count']
+    
+    def get_liked_by_me(self, obj):
+        """
+        Whether the requesting user liked this post.
+        
+        Read from the liked_by_me annotation added by
+        PostQuerySet.with_viewer_state; False when not annotated.
+        """
+        return getattr(obj, 'liked_by_me', False)
     
     def create(self, validated_data):
         """
@@ -77,18 +141,28 @@ class PostSerializer(serializers.ModelSerializer):
 class PostListSerializer(serializers.ModelSerializer):
     """
     Lightweight serializer for listing posts without nested comments.
+    
+    Lists are serialized through a compiled field plan
+    (social_media_api.serialization), as are comment lists.
     """
     
     author = serializers.StringRelatedField(read_only=True)
     author_id = serializers.IntegerField(source='author.id', read_only=True)
     comment_count = serializers.IntegerField(read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = ['id', 'author', 'author_id', 'title', 'content', 
-                  'created_at', 'updated_at', 'comment_count']
+                  'created_at', 'updated_at', 'comment_count', 'like_count',
+                  'liked_by_me']
         read_only_fields = ['id', 'author', 'author_id', 'created_at', 
-                           'updated_at', 'comment_count']
+                           'updated_at', 'comment_count', 'like_count']
+        list_serializer_class = FastListSerializer
+    
+    def get_liked_by_me(self, obj):
+        """Whether the requesting user liked this post (see PostSerializer)."""
+        return getattr(obj, 'liked_by_me', False)
 
 
 class LikeSerializer(serializers.ModelSerializer):
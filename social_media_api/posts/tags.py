@@ -0,0 +1,115 @@
+"""
+Hashtag and @mention extraction for posts.
+
+Post text is parsed after the post is saved, off the request thread: the
+create, update and bulk-import paths publish post.created/post.updated
+events, and the outbox relay (social_media_api.outbox) passes the post
+ids of each run of events to ``index_posts``, which processes the whole
+batch with a fixed number of queries. Results land in the Hashtag/PostHashtag
+inverted index (served by /api/tags/{tag}/posts/) and the Mention table.
+Users mentioned for the first time in a post get a notification.
+
+Indexing is idempotent. ``index_post_tags`` re-indexes every post, for
+example after deploying the feature.
+"""
+
+import operator
+import re
+from functools import reduce
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+
+from notifications.models import Notification
+
+from .models import Post, Hashtag, PostHashtag, Mention
+
+User = get_user_model()
+
+# '#' not preceded by a word character, '#' or '&' (HTML entities like &#39;)
+HASHTAG_RE = re.compile(r'(?<![\w#&])#(\w{1,100})')
+
+# '@' not preceded by a word character (skips e-mail addresses)
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]{1,150})')
+
+
+def extract_hashtags(text):
+    """Return the unique lowercased hashtags in text, in order of appearance."""
+    return list(dict.fromkeys(tag.lower() for tag in HASHTAG_RE.findall(text or '')))
+
+
+def extract_mentions(text):
+    """Return the unique mentioned usernames in text, in order of appearance."""
+    names = (name.rstrip('.') for name in MENTION_RE.findall(text or ''))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def index_posts(post_ids):
+    """
+    Rebuild the hashtag links and mentions of a batch of posts.
+
+    Mentions that are new for a post notify the mentioned user (never for
+    self-mentions); mentions that were already indexed don't notify again.
+    """
+    posts = list(
+        Post.objects.filter(pk__in=post_ids).values_list('id', 'author_id', 'title', 'content')
+    )
+    if not posts:
+        return
+
+    parsed = {}
+    for post_id, author_id, title, content in posts:
+        text = f'{title}\n{content}'
+        parsed[post_id] = (author_id, extract_hashtags(text), extract_mentions(text))
+
+    tag_names = {tag for _, tags, _ in parsed.values() for tag in tags}
+    usernames = {name for _, _, names in parsed.values() for name in names}
+    ids = list(parsed)
+
+    with transaction.atomic():
+        if tag_names:
+            Hashtag.objects.bulk_create(
+                [Hashtag(name=name) for name in tag_names], ignore_conflicts=True
+            )
+        tag_ids = dict(Hashtag.objects.filter(name__in=tag_names).values_list('name', 'id'))
+        user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+        PostHashtag.objects.filter(post_id__in=ids).delete()
+        PostHashtag.objects.bulk_create([
+            PostHashtag(post_id=post_id, hashtag_id=tag_ids[tag])
+            for post_id, (_, tags, _) in parsed.items()
+            for tag in tags
+        ])
+
+        wanted = {
+            (post_id, user_ids[name]): author_id
+            for post_id, (author_id, _, names) in parsed.items()
+            for name in names
+            if name in user_ids
+        }
+        existing = set(Mention.objects.filter(post_id__in=ids).values_list('post_id', 'user_id'))
+        stale = existing - set(wanted)
+        if stale:
+            Mention.objects.filter(reduce(operator.or_, (
+                Q(post_id=post_id, user_id=user_id) for post_id, user_id in stale
+            ))).delete()
+        new = [pair for pair in wanted if pair not in existing]
+        Mention.objects.bulk_create([
+            Mention(post_id=post_id, user_id=user_id) for post_id, user_id in new
+        ])
+
+        post_type = ContentType.objects.get_for_model(Post)
+        Notification.objects.bulk_create([
+            Notification(
+                recipient_id=user_id,
+                actor_id=wanted[(post_id, user_id)],
+                verb='mentioned you in a post',
+                target_content_type=post_type,
+                target_object_id=post_id,
+            )
+            for post_id, user_id in new
+            if user_id != wanted[(post_id, user_id)]
+        ])
+
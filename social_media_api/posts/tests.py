@@ -4,13 +4,28 @@ Tests for the posts app.
 This module contains test cases for Post and Comment functionality.
 """
 
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import connection, models
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 
-from .models import Post, Comment, Like
+from .counters import counter_buffer, reconcile_like_counts
+from .models import Post, Comment, Like, TrendingScore, Mention, PostHashtag
+from .tags import extract_hashtags, extract_mentions
 
 User = get_user_model()
 
@@ -346,6 +361,7 @@ class LikeTestCase(APITestCase):
     
     def setUp(self):
         """Set up test users and posts."""
+        cache.clear()  # stored idempotent responses
         self.client = APIClient()
         
         # Create test users
@@ -435,12 +451,14 @@ class LikeTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
     
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
     def test_like_creates_notification(self):
         """Test that liking a post creates a notification for the post author."""
         from notifications.models import Notification
         
         url = f'/api/posts/{self.post2.id}/like/'
-        response = self.client.post(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         
@@ -470,3 +488,1027 @@ class LikeTestCase(APITestCase):
         ).count()
         
         self.assertEqual(notification_count, 0)
+    
+    def test_like_returns_like_count(self):
+        """Test that liking and unliking return the updated like counter."""
+        response = self.client.post(f'/api/posts/{self.post2.id}/like/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['like_count'], 1)
+        self.post2.refresh_from_db()
+        self.assertEqual(self.post2.like_count, 1)
+        
+        response = self.client.post(f'/api/posts/{self.post2.id}/unlike/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['like_count'], 0)
+        self.post2.refresh_from_db()
+        self.assertEqual(self.post2.like_count, 0)
+    
+    def test_duplicate_like_does_not_change_count(self):
+        """Test that a repeated like leaves the counter untouched."""
+        self.client.post(f'/api/posts/{self.post2.id}/like/')
+        response = self.client.post(f'/api/posts/{self.post2.id}/like/')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.post2.refresh_from_db()
+        self.assertEqual(self.post2.like_count, 1)
+        self.assertEqual(Like.objects.filter(post=self.post2).count(), 1)
+    
+    def test_unlike_nonexistent_post(self):
+        """Test unliking a post that doesn't exist."""
+        response = self.client.post('/api/posts/99999/unlike/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_like_with_idempotency_key_replays_response(self):
+        """Test that a retry with the same Idempotency-Key replays the first response."""
+        url = f'/api/posts/{self.post2.id}/like/'
+        first = self.client.post(url, HTTP_IDEMPOTENCY_KEY='tap-1')
+        retry = self.client.post(url, HTTP_IDEMPOTENCY_KEY='tap-1')
+        
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.post2.refresh_from_db()
+        self.assertEqual(self.post2.like_count, 1)
+    
+    def test_idempotency_key_is_scoped_to_the_target(self):
+        """Test that reusing a key for another post performs a new like."""
+        first = self.client.post(f'/api/posts/{self.post2.id}/like/', HTTP_IDEMPOTENCY_KEY='tap-1')
+        other = self.client.post(f'/api/posts/{self.post1.id}/like/', HTTP_IDEMPOTENCY_KEY='tap-1')
+        
+        self.assertEqual(other.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', other)
+        self.assertNotEqual(other.data['like']['post'], first.data['like']['post'])
+        self.assertTrue(Like.objects.filter(post=self.post1).exists())
+    
+    def test_post_list_reports_liked_by_me(self):
+        """Test that post lists expose like_count and liked_by_me per post."""
+        Like.objects.add_like(self.user1, self.post2.id)
+        
+        response = self.client.get('/api/posts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        posts = {post['id']: post for post in response.data['results']}
+        
+        self.assertTrue(posts[self.post2.id]['liked_by_me'])
+        self.assertEqual(posts[self.post2.id]['like_count'], 1)
+        self.assertFalse(posts[self.post1.id]['liked_by_me'])
+        self.assertEqual(posts[self.post1.id]['like_count'], 0)
+    
+    def test_liked_by_me_false_for_anonymous(self):
+        """Test that anonymous users see liked_by_me as False."""
+        Like.objects.add_like(self.user1, self.post2.id)
+        self.client.credentials()
+        
+        response = self.client.get(f'/api/posts/{self.post2.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['liked_by_me'])
+        self.assertEqual(response.data['like_count'], 1)
+
+
+class BulkImportTestCase(APITestCase):
+    """Test cases for bulk post import."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='importer',
+            email='importer@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def _jsonl(self, rows):
+        return '\n'.join(json.dumps(row) for row in rows) + '\n'
+    
+    def test_bulk_import_endpoint(self):
+        """Test that valid lines are imported and invalid ones reported."""
+        body = self._jsonl([
+            {'title': 'First', 'content': 'One'},
+            {'title': 'Second', 'content': 'Two', 'created_at': '2020-05-01T12:00:00Z'},
+            {'content': 'Missing title'},
+        ]) + 'not json\n'
+        
+        response = self.client.post(
+            '/api/posts/bulk-import/', body, content_type='application/x-ndjson'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([e['line'] for e in response.data['errors']], [3, 4])
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 2)
+        backdated = Post.objects.get(title='Second')
+        self.assertEqual(backdated.created_at.year, 2020)
+    
+    def test_bulk_import_reports_invalid_utf8(self):
+        """Test that a line with invalid UTF-8 is a line error, not a 500."""
+        body = (
+            self._jsonl([{'title': 'First', 'content': 'One'}]).encode()
+            + b'{"title": "Bad \xff\xfe", "content": "Two"}\n'
+            + self._jsonl([{'title': 'Third', 'content': 'Three'}]).encode()
+        )
+        
+        response = self.client.post(
+            '/api/posts/bulk-import/', body, content_type='application/x-ndjson'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 1))
+        self.assertEqual(response.data['errors'][0]['line'], 2)
+        self.assertIn('Invalid UTF-8', response.data['errors'][0]['errors']['non_field_errors'][0])
+    
+    def test_bulk_import_requires_ndjson(self):
+        """Test that other content types are rejected."""
+        response = self.client.post(
+            '/api/posts/bulk-import/', {'title': 'x', 'content': 'y'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    
+    def test_import_posts_command(self):
+        """Test the import_posts management command resolves authors by username."""
+        rows = [
+            {'title': f'Post {i}', 'content': 'Body', 'author': 'importer'}
+            for i in range(5)
+        ] + [{'title': 'Orphan', 'content': 'Body', 'author': 'nobody'}]
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as handle:
+            handle.write(self._jsonl(rows))
+        self.addCleanup(os.remove, handle.name)
+        
+        out = StringIO()
+        call_command('import_posts', handle.name, '--batch-size', '2', stdout=out)
+        
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 5)
+        self.assertIn('Imported 5 post(s), 1 line(s) rejected', out.getvalue())
+
+
+class LikeThrottleTestCase(APITestCase):
+    """Test cases for token-bucket throttling on the like endpoints."""
+    
+    RATES = {'user': '1000/min', 'anon': '1000/min', 'likes': '2/min'}
+    
+    def setUp(self):
+        from social_media_api.throttling import TokenBucketThrottle
+        
+        cache.clear()
+        patcher = mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', self.RATES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='tapper',
+            email='tapper@example.com',
+            password='testpass123'
+        )
+        self.posts = [
+            Post.objects.create(author=self.user, title=f'Post {i}', content='Body')
+            for i in range(3)
+        ]
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def test_burst_beyond_bucket_is_rejected(self):
+        """Test that requests beyond the bucket size get 429 without writing."""
+        responses = [
+            self.client.post(f'/api/posts/{post.id}/like/') for post in self.posts
+        ]
+        
+        self.assertEqual(
+            [r.status_code for r in responses],
+            [status.HTTP_201_CREATED, status.HTTP_201_CREATED,
+             status.HTTP_429_TOO_MANY_REQUESTS]
+        )
+        self.assertIn('Retry-After', responses[2])
+        self.assertEqual(Like.objects.filter(user=self.user).count(), 2)
+    
+    def test_buckets_are_per_user(self):
+        """Test that one user's bucket does not affect another's."""
+        for post in self.posts[:2]:
+            self.client.post(f'/api/posts/{post.id}/like/')
+        
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=other).key}'
+        )
+        response = self.client.post(f'/api/posts/{self.posts[2].id}/like/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    
+    def test_idle_client_bursts_at_most_bucket_size(self):
+        """Test that refills are capped at the bucket size, also after expiry."""
+        from social_media_api.throttling import TokenBucketThrottle
+        
+        posts = [
+            Post.objects.create(author=self.user, title=f'Burst {i}', content='Body')
+            for i in range(40)
+        ]
+        clock = mock.Mock(return_value=1000.0)
+        rates = dict(self.RATES, likes='10/min')
+        
+        def burst(at, count):
+            clock.return_value = at
+            with mock.patch.object(TokenBucketThrottle, 'timer', clock), \
+                    mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', rates):
+                return [
+                    self.client.post(f'/api/posts/{posts.pop().id}/like/').status_code
+                    for _ in range(count)
+                ].count(status.HTTP_201_CREATED)
+        
+        self.assertEqual(burst(1000.0, 1), 1)
+        # Nearly a full period idle: the bucket is full (10), not 9 + 9
+        self.assertEqual(burst(1059.0, 15), 10)
+        # Long idle: again at most a full bucket
+        self.assertEqual(burst(1500.0, 15), 10)
+        # Six seconds later exactly one token has refilled
+        self.assertEqual(burst(1506.0, 3), 1)
+    
+    def _throttle(self):
+        from social_media_api.throttling import TokenBucketThrottle
+        
+        request = mock.Mock()
+        request.user = self.user
+        return TokenBucketThrottle.for_scope('likes')(), request
+    
+    def test_concurrent_requests_never_overspend(self):
+        """Test that concurrent requests spend each token exactly once."""
+        allowed = []
+        
+        def spend():
+            throttle, request = self._throttle()
+            for _ in range(5):
+                allowed.append(throttle.allow_request(request, None))
+        
+        threads = [threading.Thread(target=spend) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 2)
+    
+    def test_cache_lock_fails_closed(self):
+        """Test that a bucket whose lock stays taken rejects the request."""
+        throttle, request = self._throttle()
+        throttle.allow_request(request, None)  # resolves the rate
+        key = throttle.get_cache_key(request, None)
+        
+        cache.set(f'{key}_lock', 'someone-else', 60)
+        self.assertEqual(throttle._spend_with_cache_lock(key), (False, 0))
+        # Another request's lock is left alone
+        self.assertEqual(cache.get(f'{key}_lock'), 'someone-else')
+        
+        cache.delete(f'{key}_lock')
+        self.assertEqual(throttle._spend_with_cache_lock(key)[0], True)
+        self.assertIsNone(cache.get(f'{key}_lock'))
+
+
+class InstrumentationTestCase(APITestCase):
+    """Test cases for the query/latency instrumentation middleware."""
+    
+    def setUp(self):
+        from social_media_api.instrumentation import registry
+        
+        registry.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='viewer',
+            email='viewer@example.com',
+            password='testpass123'
+        )
+        Post.objects.create(author=self.user, title='Timed', content='Body')
+    
+    def test_server_timing_header(self):
+        """Test that API responses report DB, serialize and total timings."""
+        response = self.client.get('/api/posts/')
+        
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('total;dur=', timing)
+    
+    def test_metrics_endpoint_is_staff_only(self):
+        """Test that the metrics summary requires a staff session."""
+        self.client.get('/api/posts/')
+        
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/admin/metrics/').status_code, 403)
+        
+        self.user.is_staff = True
+        self.user.save(update_fields=['is_staff'])
+        response = self.client.get('/admin/metrics/')
+        
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()['views']['posts:post-list']
+        self.assertEqual(summary['requests'], 1)
+        self.assertGreater(summary['queries']['max'], 0)
+        self.assertIn('p95', summary['latency_ms'])
+
+
+class SyntheticDataTestCase(TestCase):
+    """Test cases for the seed_social_graph and benchmark_api commands."""
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_seed_social_graph(self):
+        """Test that seeding creates consistent users, posts, likes and notifications."""
+        from notifications.models import Notification
+        
+        out = StringIO()
+        call_command('seed_social_graph', '--users', '30', '--posts-per-user', '2',
+                     '--seed', '7', stdout=out)
+        
+        self.assertEqual(User.objects.filter(username__startswith='seed_').count(), 30)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 120)
+        self.assertTrue(self.client.login(username='seed_1', password='seed-password-123'))
+        
+        # Denormalized like counts match the Like rows
+        for post in Post.objects.all():
+            self.assertEqual(post.like_count, post.likes.count())
+        
+        # Likes and comments are never older than their post
+        self.assertFalse(Like.objects.filter(created_at__lt=models.F('post__created_at')).exists())
+        self.assertFalse(Notification.objects.filter(recipient=models.F('actor')).exists())
+        self.assertIn('✓ Seeded 30 users', out.getvalue())
+    
+    def test_benchmark_api_writes_results(self):
+        """Test that the benchmark reports every endpoint and leaves the data unchanged."""
+        call_command('seed_social_graph', '--users', '20', '--seed', '3', stdout=StringIO())
+        likes_before = Like.objects.count()
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as handle:
+            path = handle.name
+        self.addCleanup(os.remove, path)
+        
+        call_command('benchmark_api', '--iterations', '5', '--warmup', '1',
+                     '--viewers', '2', '--json', path, stdout=StringIO())
+        
+        with open(path, encoding='utf-8') as handle:
+            results = json.load(handle)
+        self.assertEqual(
+            set(results['endpoints']),
+            {'feed', 'post_list', 'post_comments', 'like', 'unlike', 'follow', 'unfollow'}
+        )
+        for entry in results['endpoints'].values():
+            self.assertEqual(entry['errors'], 0)
+            self.assertLessEqual(entry['latency_ms']['p50'], entry['latency_ms']['p99'])
+        self.assertEqual(Like.objects.count(), likes_before)
+        
+        # Comparing against a previous run prints the deltas
+        out = StringIO()
+        call_command('benchmark_api', '--iterations', '2', '--warmup', '0',
+                     '--compare', path, stdout=out)
+        self.assertIn('vs baseline', out.getvalue())
+
+
+class TrendingTestCase(APITestCase):
+    """Test cases for the trending posts endpoint and score table."""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fan1 = User.objects.create_user(username='fan1', password='testpass123')
+        self.fan2 = User.objects.create_user(username='fan2', password='testpass123')
+        self.client.force_authenticate(user=self.fan1)
+        self.quiet = Post.objects.create(author=self.author, title='Quiet', content='Body')
+        self.popular = Post.objects.create(author=self.author, title='Popular', content='Body')
+        self.discussed = Post.objects.create(author=self.author, title='Discussed', content='Body')
+    
+    def _trending(self):
+        response = self.client.get('/api/posts/trending/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item['title'], item['trending_score']) for item in response.data['results']]
+    
+    def test_likes_and_comments_rank_posts(self):
+        """Test that likes count once, comments twice, and unengaged posts are omitted."""
+        Like.objects.add_like(self.fan1, self.popular.id)
+        Like.objects.add_like(self.fan2, self.popular.id)
+        Like.objects.add_like(self.fan1, self.discussed.id)
+        self.client.post('/api/comments/', {'post': self.discussed.id, 'content': 'Nice'})
+        
+        trending = self._trending()
+        
+        self.assertEqual([title for title, _ in trending], ['Discussed', 'Popular'])
+        self.assertAlmostEqual(trending[0][1], 3.0, places=2)
+        self.assertAlmostEqual(trending[1][1], 2.0, places=2)
+    
+    def test_unlike_and_comment_delete_retract_score(self):
+        """Test that removing engagement lowers or removes the score."""
+        Like.objects.add_like(self.fan1, self.popular.id)
+        Like.objects.add_like(self.fan2, self.popular.id)
+        Like.objects.remove_like(self.fan1, self.popular.id)
+        self.assertAlmostEqual(self._trending()[0][1], 1.0, places=2)
+        
+        Like.objects.remove_like(self.fan2, self.popular.id)
+        self.assertEqual(self._trending(), [])
+        
+        comment = Comment.objects.create(post=self.quiet, author=self.fan1, content='Hi')
+        TrendingScore.objects.record(self.quiet.id, TrendingScore.objects.COMMENT_WEIGHT,
+                                     comment.created_at)
+        self.client.delete(f'/api/comments/{comment.id}/')
+        self.assertEqual(self._trending(), [])
+    
+    def test_failed_comment_delete_keeps_score(self):
+        """Test that engagement is only retracted once the delete commits."""
+        comment = Comment.objects.create(post=self.quiet, author=self.fan1, content='Hi')
+        TrendingScore.objects.record(self.quiet.id, TrendingScore.objects.COMMENT_WEIGHT,
+                                     comment.created_at)
+        
+        with mock.patch('posts.views.publish', side_effect=RuntimeError('outbox down')):
+            with self.assertRaises(RuntimeError):
+                self.client.delete(f'/api/comments/{comment.id}/')
+        self.assertTrue(Comment.objects.filter(pk=comment.pk).exists())
+        self.assertAlmostEqual(self._trending()[0][1], 2.0, places=2)
+    
+    def test_engagement_decays_with_half_life(self):
+        """Test that older engagement is worth less and ages out of the window."""
+        now = timezone.now()
+        with self.settings(TRENDING_HALF_LIFE_HOURS=12, TRENDING_WINDOW_HOURS=72):
+            TrendingScore.objects.record(self.popular.id, 1.0, now - timedelta(hours=12))
+            TrendingScore.objects.record(self.popular.id, 1.0, now - timedelta(hours=12))
+            TrendingScore.objects.record(self.discussed.id, 1.5, now)
+            TrendingScore.objects.record(self.quiet.id, 10.0, now - timedelta(hours=100))
+            
+            top = dict(TrendingScore.objects.top(10, now=now))
+        
+        # Two likes one half-life ago are worth one like now
+        self.assertAlmostEqual(top[self.popular.id], 1.0, places=6)
+        self.assertAlmostEqual(top[self.discussed.id], 1.5, places=6)
+        self.assertNotIn(self.quiet.id, top)
+    
+    def test_rebuild_matches_incremental_scores(self):
+        """Test that rebuilding from Like and Comment rows reproduces the scores."""
+        Like.objects.add_like(self.fan1, self.popular.id)
+        Like.objects.add_like(self.fan2, self.popular.id)
+        self.client.post('/api/comments/', {'post': self.discussed.id, 'content': 'Nice'})
+        incremental = dict(TrendingScore.objects.values_list('post_id', 'score'))
+        
+        out = StringIO()
+        call_command('rebuild_trending_scores', stdout=out)
+        
+        rebuilt = dict(TrendingScore.objects.values_list('post_id', 'score'))
+        self.assertEqual(set(rebuilt), set(incremental))
+        for post_id, score in incremental.items():
+            self.assertAlmostEqual(rebuilt[post_id], score, places=6)
+        self.assertIn('2 post(s)', out.getvalue())
+    
+    def test_trending_does_not_scan_likes(self):
+        """Test that the endpoint reads the score table, not the Like table."""
+        Like.objects.add_like(self.fan1, self.popular.id)
+        
+        with CaptureQueriesContext(connection) as context:
+            self._trending()
+        
+        self.assertFalse(any(
+            Like._meta.db_table in query['sql'] and 'EXISTS' not in query['sql']
+            for query in context.captured_queries
+        ))
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class HashtagMentionTestCase(APITestCase):
+    """Test cases for hashtag/mention extraction and the tag endpoint."""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob.smith', password='testpass123')
+        self.client.force_authenticate(user=self.author)
+    
+    def _create(self, title, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/posts/', {'title': title, 'content': content})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+    
+    def test_extraction(self):
+        """Test hashtag and mention parsing edge cases."""
+        text = 'Loving #Django and #django! Mail me@example.com, ping @alice and @bob.smith.'
+        self.assertEqual(extract_hashtags(text), ['django'])
+        self.assertEqual(extract_mentions(text), ['alice', 'bob.smith'])
+        self.assertEqual(extract_hashtags('issue&#35;1 ##double'), [])
+    
+    def test_tag_posts_endpoint(self):
+        """Test that posts are listed by tag through the inverted index."""
+        first = self._create('First', 'Learning #Python today')
+        second = self._create('#Python tips', 'More tips')
+        self._create('Other', 'Nothing to see #rust')
+        
+        response = self.client.get('/api/tags/python/posts/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['id'] for p in response.data['results']], [second, first])
+        self.assertEqual(self.client.get('/api/tags/%23PYTHON/posts/').data['count'], 2)
+        self.assertEqual(self.client.get('/api/tags/unknown/posts/').data['count'], 0)
+    
+    def test_mentions_notify_once(self):
+        """Test that new mentions notify, re-indexing and self-mentions don't."""
+        from notifications.models import Notification
+        
+        post_id = self._create('Hello', 'Hi @alice and @author, meet @nobody')
+        self.assertEqual(
+            list(Mention.objects.filter(post_id=post_id).values_list('user__username', flat=True)
+                 .order_by('user__username')),
+            ['alice', 'author']
+        )
+        self.assertEqual(Notification.objects.filter(verb='mentioned you in a post').count(), 1)
+        
+        # Editing to add @bob.smith notifies only him and drops @alice
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/posts/{post_id}/', {'content': 'Hi @author and @bob.smith'})
+        notified = Notification.objects.filter(verb='mentioned you in a post')
+        self.assertEqual(
+            sorted(notified.values_list('recipient__username', flat=True)), ['alice', 'bob.smith']
+        )
+        self.assertFalse(Mention.objects.filter(post_id=post_id, user=self.alice).exists())
+        
+        # A full re-index is idempotent
+        call_command('index_post_tags', stdout=StringIO())
+        self.assertEqual(notified.count(), 2)
+    
+    def test_bulk_import_indexes_in_batches(self):
+        """Test that imported posts are indexed after each chunk commits."""
+        body = '\n'.join(json.dumps({'title': f'Post {i}', 'content': '#bulk'}) for i in range(3))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/posts/bulk-import/', body, content_type='application/x-ndjson')
+        
+        self.assertEqual(PostHashtag.objects.filter(hashtag__name='bulk').count(), 3)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, REAPER_BATCH_SIZE=2)
+class SoftDeleteTestCase(APITestCase):
+    """Test cases for soft-deleted posts and the batched reaper."""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Doomed', content='#gone')
+        for i in range(5):
+            Comment.objects.create(post=self.post, author=self.reader, content=f'Comment {i}')
+        Like.objects.add_like(self.reader, self.post.pk)
+        self.client.force_authenticate(user=self.author)
+    
+    def test_delete_hides_post_immediately(self):
+        """Test that a deleted post disappears before the reaper runs."""
+        response = self.client.delete(f'/api/posts/{self.post.id}/')
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(Comment.objects.filter(post_id=self.post.pk).count(), 0)
+        self.assertEqual(self.client.get(f'/api/posts/{self.post.id}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/comments/').data['count'], 0)
+        
+        self.client.force_authenticate(user=self.reader)
+        response = self.client.post(f'/api/posts/{self.post.id}/like/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_reaper_removes_dependents_in_batches(self):
+        """Test that the background reaper hard-deletes the post and its rows."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/posts/{self.post.id}/')
+        
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(Comment._base_manager.filter(post_id=self.post.pk).exists())
+        self.assertFalse(Like.objects.filter(post_id=self.post.pk).exists())
+    
+    def test_reap_deleted_command(self):
+        """Test that the command finishes purges dropped from the queue."""
+        self.post.soft_delete()
+        other = Post.objects.create(author=self.author, title='Kept', content='Stays')
+        
+        out = StringIO()
+        call_command('reap_deleted', stdout=out)
+        
+        self.assertIn('1 post(s)', out.getvalue())
+        self.assertEqual(list(Post.all_objects.values_list('pk', flat=True)), [other.pk])
+        self.assertEqual(Comment._base_manager.count(), 0)
+
+
+class CommentThreadTestCase(APITestCase):
+    """Test cases for threaded replies stored as materialized paths."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='threader', password='testpass123')
+        self.post = Post.objects.create(author=self.user, title='Threads', content='Discuss')
+        self.client.force_authenticate(user=self.user)
+    
+    def _comment(self, content, parent=None):
+        data = {'post': self.post.id, 'content': content}
+        if parent is not None:
+            data['parent'] = parent
+        response = self.client.post('/api/comments/', data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data['id']
+    
+    def test_replies_store_path_and_depth(self):
+        """Test that replies extend their parent's path."""
+        root = self._comment('Root')
+        reply = self._comment('Reply', parent=root)
+        nested = self._comment('Nested', parent=reply)
+        
+        comment = Comment.objects.get(pk=nested)
+        self.assertEqual(comment.depth, 2)
+        self.assertEqual(comment.path, f'{root:010d}/{reply:010d}/{nested:010d}/')
+        
+        # Flat clients still get every comment, now with parent and depth
+        flat = self.client.get(f'/api/posts/{self.post.id}/comments/').data
+        self.assertEqual([(c['id'], c['parent'], c['depth']) for c in flat],
+                         [(root, None, 0), (reply, root, 1), (nested, reply, 2)])
+    
+    def test_depth_limit_and_post_mismatch(self):
+        """Test that replies beyond COMMENT_MAX_DEPTH or across posts are rejected."""
+        parent = self._comment('Level 0')
+        with override_settings(COMMENT_MAX_DEPTH=1):
+            parent = self._comment('Level 1', parent=parent)
+            response = self.client.post('/api/comments/', {
+                'post': self.post.id, 'content': 'Level 2', 'parent': parent
+            })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parent', response.data)
+        
+        other = Post.objects.create(author=self.user, title='Other', content='Elsewhere')
+        response = self.client.post('/api/comments/', {
+            'post': other.id, 'content': 'Wrong post', 'parent': parent
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_threads_endpoint(self):
+        """Test that each thread lists its first replies and total size."""
+        first = self._comment('First thread')
+        a = self._comment('A', parent=first)
+        b = self._comment('B', parent=a)
+        self._comment('C', parent=first)
+        second = self._comment('Second thread')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/posts/{self.post.id}/threads/?replies=2')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        threads = response.data['results']
+        self.assertEqual([t['id'] for t in threads], [first, second])
+        self.assertEqual(threads[0]['reply_count'], 3)
+        self.assertEqual([r['id'] for r in threads[0]['replies']], [a, b])
+        self.assertEqual(threads[1]['reply_count'], 0)
+        self.assertEqual(threads[1]['replies'], [])
+        
+        # Post, page count, roots and one query for all replies
+        self.assertEqual(len(queries), 4)
+    
+    def test_replies_endpoint_paginates_subtree(self):
+        """Test that a comment's subtree is listed in thread order."""
+        root = self._comment('Root')
+        a = self._comment('A', parent=root)
+        a1 = self._comment('A1', parent=a)
+        b = self._comment('B', parent=root)
+        self._comment('Unrelated')
+        
+        response = self.client.get(f'/api/comments/{root}/replies/')
+        self.assertEqual([c['id'] for c in response.data['results']], [a, a1, b])
+        
+        response = self.client.get(f'/api/comments/{root}/replies/?depth=1')
+        self.assertEqual([c['id'] for c in response.data['results']], [a, b])
+    
+    def test_deleting_comment_removes_replies(self):
+        """Test that deleting a comment deletes its whole subtree."""
+        root = self._comment('Root')
+        self._comment('Nested', parent=self._comment('Reply', parent=root))
+        
+        self.client.delete(f'/api/comments/{root}/')
+        
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 0)
+
+
+class SparseFieldsetTestCase(APITestCase):
+    """Test cases for ?fields= and ?omit= on post endpoints."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='sparse', password='testpass123')
+        self.post = Post.objects.create(author=self.user, title='Sparse', content='SECRET BODY')
+        Comment.objects.create(post=self.post, author=self.user, content='Hi')
+        self.client.force_authenticate(user=self.user)
+    
+    def test_fields_prunes_response_and_sql(self):
+        """Test that only the requested fields are serialized and selected."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/?fields=id,title')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.post.id, 'title': 'Sparse'}])
+        post_sql = [q['sql'] for q in queries.captured_queries if 'posts_post' in q['sql']]
+        self.assertFalse(any('"content"' in sql for sql in post_sql))
+        self.assertFalse(any('posts_comment' in sql for sql in post_sql))
+        self.assertFalse(any('accounts_customuser' in sql for sql in post_sql))
+    
+    def test_omit_and_retrieve(self):
+        """Test that omitted fields are dropped and the rest still resolve."""
+        response = self.client.get('/api/posts/?omit=content,comment_count')
+        row = response.data['results'][0]
+        self.assertNotIn('content', row)
+        self.assertNotIn('comment_count', row)
+        self.assertEqual(row['author'], 'sparse')
+        
+        response = self.client.get(f'/api/posts/{self.post.id}/?fields=id,comments')
+        self.assertEqual(set(response.data), {'id', 'comments'})
+        self.assertEqual(len(response.data['comments']), 1)
+    
+    def test_unknown_field_rejected(self):
+        """Test that unknown field names return 400 with the available fields."""
+        response = self.client.get('/api/posts/?fields=id,password')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', str(response.data['fields']))
+    
+    def test_writes_ignore_fields(self):
+        """Test that ?fields= doesn't affect create responses."""
+        response = self.client.post('/api/posts/?fields=id', {'title': 'New', 'content': 'Body'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('content', response.data)
+
+
+class AuthorScopedWriteTestCase(APITestCase):
+    """Test cases for author checks on update and delete."""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='owner', password='testpass123')
+        self.other = User.objects.create_user(username='intruder', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Mine', content='Body')
+        self.comment = Comment.objects.create(post=self.post, author=self.author, content='Hi')
+    
+    def test_unauthorized_writes_use_one_query(self):
+        """Test that another user's writes are refused after one author_id lookup."""
+        self.client.force_authenticate(user=self.other)
+        for method, url in (
+            ('patch', f'/api/posts/{self.post.id}/'),
+            ('delete', f'/api/posts/{self.post.id}/'),
+            ('put', f'/api/comments/{self.comment.id}/'),
+            ('delete', f'/api/comments/{self.comment.id}/'),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(url, {'content': 'Hijacked'})
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, (method, url))
+            self.assertEqual(len(queries), 1, (method, url))
+            self.assertNotIn('"content"', queries[0]['sql'])
+        
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.content, 'Hi')
+    
+    def test_missing_object_is_404(self):
+        """Test that unknown ids still return 404."""
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.delete('/api/comments/999999/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete('/api/posts/abc/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+    
+    def test_author_can_update_and_delete(self):
+        """Test that the author's own writes still succeed."""
+        self.client.force_authenticate(user=self.author)
+        response = self.client.patch(f'/api/comments/{self.comment.id}/', {'content': 'Edited'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['content'], 'Edited')
+        
+        response = self.client.delete(f'/api/posts/{self.post.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class FeedCacheTestCase(APITestCase):
+    """Test cases for the cached, prewarmed first feed page."""
+    
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.writer = User.objects.create_user(username='writer', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.reader.following.add(self.writer)
+        self.post = Post.objects.create(author=self.writer, title='First', content='Body')
+        Post.objects.create(author=self.other, title='Unfollowed', content='Body')
+    
+    def _feed_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/feed/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+    
+    def test_login_warms_feed(self):
+        """Test that the first feed request after login is served from cache."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/login/', {
+                'username': 'reader', 'password': 'testpass123'
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.reader)
+        
+        warm, warm_queries = self._feed_queries()
+        cache.clear()
+        cold, cold_queries = self._feed_queries()
+        self.assertEqual(warm.data, cold.data)
+        self.assertEqual([post['title'] for post in warm.data['results']], ['First'])
+        self.assertEqual(warm_queries, 1)
+        self.assertGreater(cold_queries, warm_queries)
+    
+    def test_follow_and_new_posts_refresh_feed(self):
+        """Test that follow changes and new posts bypass the stale page."""
+        self.client.force_authenticate(user=self.reader)
+        self._feed_queries()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/follow/{self.other.id}/')
+        response, queries = self._feed_queries()
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(queries, 1)
+        
+        Post.objects.create(author=self.writer, title='Newest', content='Body')
+        response, _ = self._feed_queries()
+        self.assertEqual(response.data['results'][0]['title'], 'Newest')
+    
+    def test_own_like_invalidates_feed(self):
+        """Test that the viewer's like is visible in the next feed page."""
+        self.client.force_authenticate(user=self.reader)
+        self.assertFalse(self._feed_queries()[0].data['results'][0]['liked_by_me'])
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        self.assertTrue(self._feed_queries()[0].data['results'][0]['liked_by_me'])
+    
+    def test_later_pages_and_next_link(self):
+        """Test that the cached first page links to the uncached second page."""
+        for i in range(10):
+            Post.objects.create(author=self.writer, title=f'Extra {i}', content='Body')
+        self.client.force_authenticate(user=self.reader)
+        first = self._feed_queries()[0].data
+        self.assertEqual(first['count'], 11)
+        self.assertTrue(first['next'].endswith('/api/feed/?page=2'))
+        
+        second = self.client.get(first['next']).data
+        self.assertEqual([post['title'] for post in second['results']], ['First'])
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=3600)
+class CounterBufferTestCase(APITestCase):
+    """Test cases for write-behind like counts and trending scores."""
+    
+    def setUp(self):
+        cache.clear()
+        counter_buffer.flush()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.likers = [
+            User.objects.create_user(username=f'liker{i}', password='testpass123')
+            for i in range(3)
+        ]
+        self.post = Post.objects.create(author=self.author, title='Hot', content='Body')
+        self.other = Post.objects.create(author=self.author, title='Other', content='Body')
+    
+    def tearDown(self):
+        counter_buffer.flush()
+    
+    def _like(self, user, post):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/posts/{post.id}/like/')
+    
+    def test_likes_are_buffered_until_flush(self):
+        """Test that likes reach like_count and trending in one flush."""
+        counts = [self._like(user, self.post).data['like_count'] for user in self.likers]
+        self.assertEqual(counts, [1, 2, 3])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertFalse(TrendingScore.objects.filter(post=self.post).exists())
+        
+        with CaptureQueriesContext(connection) as queries:
+            counter_buffer.flush()
+        post_updates = [q for q in queries if q['sql'].startswith('UPDATE "posts_post"')]
+        self.assertEqual(len(post_updates), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 3)
+        
+        # Same score as three write-through likes
+        buffered = TrendingScore.objects.get(post=self.post).score
+        with override_settings(COUNTER_FLUSH_INTERVAL=0):
+            for user in self.likers:
+                Like.objects.add_like(user, self.other.pk)
+        self.assertAlmostEqual(TrendingScore.objects.get(post=self.other).score, buffered, places=3)
+    
+    def test_posts_with_equal_deltas_share_an_update(self):
+        """Test that one UPDATE covers every post with the same delta."""
+        self._like(self.likers[0], self.post)
+        self._like(self.likers[0], self.other)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(counter_buffer.flush()['likes'], 2)
+        self.assertEqual(
+            len([q for q in queries if q['sql'].startswith('UPDATE "posts_post"')]), 1
+        )
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('like_count', flat=True)), [1, 1]
+        )
+    
+    def test_unlike_and_rollback(self):
+        """Test that unlikes cancel out and rolled-back likes are not buffered."""
+        self._like(self.likers[0], self.post)
+        self.client.force_authenticate(user=self.likers[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/posts/{self.post.id}/unlike/')
+        self.assertEqual(response.data['like_count'], 0)
+        
+        Like.objects.add_like(self.likers[1], self.post.pk)  # on_commit never runs
+        self.assertEqual(counter_buffer.pending_likes(self.post.pk), 0)
+        self.assertEqual(counter_buffer.flush()['likes'], 0)
+    
+    def test_comments_buffer_trending_score(self):
+        """Test that comment engagement is written at flush time."""
+        self.client.force_authenticate(user=self.likers[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/comments/', {'post': self.post.id, 'content': 'Nice'})
+        self.assertFalse(TrendingScore.objects.filter(post=self.post).exists())
+        counter_buffer.flush()
+        self.assertTrue(TrendingScore.objects.filter(post=self.post).exists())
+    
+    def test_reconcile_counters_fixes_drift(self):
+        """Test that reconcile_counters recomputes counts lost in a crash."""
+        self._like(self.likers[0], self.post)
+        self._like(self.likers[1], self.post)
+        counter_buffer._reset()  # the worker died before flushing
+        Post.objects.filter(pk=self.other.pk).update(like_count=5)
+        
+        out = StringIO()
+        call_command('reconcile_counters', '--grace', '0', '--force', stdout=out)
+        self.assertIn('Corrected like counts of 2 post(s)', out.getvalue())
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('like_count', flat=True)), [2, 0]
+        )
+    
+    def test_reconcile_skips_recent_likes(self):
+        """Test that posts liked within the grace period are left alone."""
+        self._like(self.likers[0], self.post)
+        counter_buffer._reset()
+        out = StringIO()
+        call_command('reconcile_counters', '--force', stdout=out)
+        self.assertIn('of 0 post(s)', out.getvalue())
+    
+    def test_reconcile_refuses_per_process_cache(self):
+        """Test that reconcile_counters needs --force without a shared cache."""
+        with self.assertRaisesMessage(CommandError, 'REDIS_URL'):
+            call_command('reconcile_counters', stdout=StringIO())
+    
+    def test_reconcile_skips_recent_unlikes(self):
+        """Test that a buffered unlike is not counted twice by reconciling."""
+        self._like(self.likers[0], self.post)
+        self._like(self.likers[1], self.post)
+        counter_buffer.flush()
+        Like.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        self.client.force_authenticate(user=self.likers[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/posts/{self.post.id}/unlike/')
+        
+        # Another worker's reconcile runs while this one still holds the -1
+        self.assertEqual(reconcile_like_counts(grace_seconds=60), 0)
+        counter_buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+    
+    def test_failed_flush_keeps_trending_mass(self):
+        """Test that a failed like_count write re-buffers the trending mass too."""
+        self._like(self.likers[0], self.post)
+        with mock.patch('django.db.models.query.QuerySet.update', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                counter_buffer.flush()
+        self.assertFalse(TrendingScore.objects.filter(post=self.post).exists())
+        
+        self.assertEqual(counter_buffer.flush(), {'likes': 1, 'trending': 1})
+        self.assertTrue(TrendingScore.objects.filter(post=self.post).exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+    
+    def test_failed_trending_write_is_rebuffered(self):
+        """Test that one post's failed trending write doesn't lose the others."""
+        self._like(self.likers[0], self.post)
+        self._like(self.likers[0], self.other)
+        original = TrendingScore.objects.add_contribution
+        
+        def fail_for_post(post_id, *args):
+            if post_id == self.post.pk:
+                raise RuntimeError('trending write failed')
+            return original(post_id, *args)
+        
+        with mock.patch.object(TrendingScore.objects, 'add_contribution', side_effect=fail_for_post), \
+                self.assertLogs('posts.counters', 'ERROR'):
+            self.assertEqual(counter_buffer.flush(), {'likes': 2, 'trending': 1})
+        self.assertFalse(TrendingScore.objects.filter(post=self.post).exists())
+        self.assertTrue(TrendingScore.objects.filter(post=self.other).exists())
+        
+        self.assertEqual(counter_buffer.flush(), {'likes': 0, 'trending': 1})
+        self.assertTrue(TrendingScore.objects.filter(post=self.post).exists())
+
+
+class CounterBenchmarkTestCase(TransactionTestCase):
+    """Smoke test for the benchmark_counters command."""
+    
+    def test_benchmark_reports_both_modes(self):
+        """Test that both modes end with a consistent like_count."""
+        out = StringIO()
+        call_command('benchmark_counters', '--threads', '2', '--likes', '3', stdout=out)
+        output = out.getvalue()
+        self.assertIn('✓ write-through', output)
+        self.assertIn('✓ write-behind', output)
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Post.objects.exists())
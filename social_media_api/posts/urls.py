@@ -6,7 +6,7 @@ This module defines URL patterns for posts and comments using DRF routers.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, FeedView, like_post, unlike_post
+from .views import PostViewSet, CommentViewSet, FeedView, TagPostsView, like_post, unlike_post
 
 # Create a router and register viewsets
 router = DefaultRouter()
@@ -27,6 +27,9 @@ urlpatterns = [
     # POST /api/posts/<int:pk>/unlike/
     path('posts/<int:pk>/unlike/', unlike_post, name='unlike-post'),
     
+    # GET /api/tags/<tag>/posts/
+    path('tags/<str:tag>/posts/', TagPostsView.as_view(), name='tag-posts'),
+    
     # Include all router URLs
     path('', include(router.urls)),
 ]
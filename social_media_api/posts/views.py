@@ -9,32 +9,76 @@ delete their own posts and comments.
 """
 
 from rest_framework import viewsets, permissions, filters, generics
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.contrib.contenttypes.models import ContentType
+from django.http import Http404
+from django.db import transaction
+from social_media_api.idempotency import idempotent
+from social_media_api.background import run_in_background
+from social_media_api.fieldsets import SparseFieldsetMixin
+from social_media_api.instrumentation import InstrumentedViewMixin
+from social_media_api.outbox import publish
+from social_media_api.reaper import reap_post
+from social_media_api.response_cache import CachedRetrieveMixin, invalidate
+from social_media_api.throttling import TokenBucketThrottle, UserTokenBucketThrottle
 
-from .models import Post, Comment, Like
-from .serializers import PostSerializer, PostListSerializer, CommentSerializer, LikeSerializer
-from .permissions import IsAuthorOrReadOnly
+from .models import Post, Comment, Like, TrendingScore
+from .serializers import (
+    PostSerializer,
+    PostListSerializer,
+    CommentSerializer,
+    CommentThreadSerializer,
+    LikeSerializer,
+)
+from .counters import record_engagement, retract_engagement
+from .permissions import AuthorScopedWriteMixin, IsAuthorOrReadOnly
+from .feed_cache import feed_cache_enabled, feed_queryset, get_first_page, invalidate_feed
+from .importers import import_posts
 
 
-class PostViewSet(viewsets.ModelViewSet):
+# Page size bounds for the trending endpoint
+TRENDING_DEFAULT_LIMIT = 20
+TRENDING_MAX_LIMIT = 100
+
+# Replies shown under each thread by /api/posts/{id}/threads/
+THREAD_DEFAULT_REPLIES = 3
+THREAD_MAX_REPLIES = 50
+
+
+def _bounded_int(request, name, default, minimum, maximum):
+    """Read an integer query parameter, falling back to default and clamping."""
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        value = default
+    return max(minimum, min(value, maximum))
+
+
+class PostViewSet(AuthorScopedWriteMixin, CachedRetrieveMixin, SparseFieldsetMixin,
+                  InstrumentedViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for Post model providing CRUD operations.
     
     List, create, retrieve, update, and delete posts.
     Includes filtering, searching, and ordering capabilities.
+    List, detail and trending responses accept ?fields= / ?omit= (see
+    social_media_api.fieldsets). Detail responses are cached and rebuilt
+    single-flight (see social_media_api.response_cache); liked_by_me is
+    filled in per request.
     
     Permissions:
         - List/Retrieve: Available to all authenticated users
         - Create: Authenticated users only
-        - Update/Delete: Only the post author
+        - Update/Delete: Only the post author (checked on author_id before
+          the post is loaded; see AuthorScopedWriteMixin)
     """
     
-    queryset = Post.objects.all().select_related('author').prefetch_related('comments')
+    queryset = Post.objects.all().select_related('author')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     
@@ -48,19 +92,78 @@ class PostViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'updated_at', 'title']
     ordering = ['-created_at']
     
+    # Sparse fieldsets: fields served by annotations/prefetches need no column
+    sparse_fieldset_actions = ('list', 'retrieve', 'trending')
+    sparse_field_columns = {'comment_count': (), 'liked_by_me': (), 'comments': ()}
+    
+    response_cache_scope = 'post'
+    
+    def get_queryset(self):
+        """
+        Annotate posts with comment counts and the requesting user's like
+        state; prefetch comments (with authors) for nested detail views.
+        Only what the requested fields need is added or selected.
+        """
+        queryset = super().get_queryset()
+        if self.wants_field('comment_count'):
+            queryset = queryset.with_comment_count()
+        if self.wants_field('liked_by_me'):
+            queryset = queryset.with_viewer_state(self.request.user)
+        if self.action == 'comments' or (self.action == 'retrieve' and self.wants_field('comments')):
+            queryset = queryset.with_comments()
+        if not (self.wants_field('author') or self.wants_field('author_id')):
+            queryset = queryset.select_related(None)
+        return self.sparse_queryset(queryset)
+    
     def get_serializer_class(self):
         """
         Use different serializers for list and detail views.
         """
-        if self.action == 'list':
+        if self.action in ('list', 'trending'):
             return PostListSerializer
         return PostSerializer
     
     def perform_create(self, serializer):
         """
-        Set the post author to the current authenticated user.
+        Set the post author to the current authenticated user and publish
+        a post.created event (hashtags and mentions are indexed from it).
+        """
+        with transaction.atomic():
+            post = serializer.save(author=self.request.user)
+            publish('post.created', post_id=post.pk, author_id=post.author_id)
+    
+    def perform_update(self, serializer):
+        """
+        Save the post and publish a post.updated event for re-indexing.
         """
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            post = serializer.save()
+            publish('post.updated', post_id=post.pk, author_id=post.author_id)
+        invalidate('post', post.pk)
+    
+    def perform_destroy(self, instance):
+        """
+        Soft-delete the post so it disappears at once, then remove its
+        comments, likes and other dependents in the background.
+        """
+        with transaction.atomic():
+            deleted = instance.soft_delete()
+            if deleted:
+                publish('post.deleted', post_id=instance.pk, author_id=instance.author_id)
+        if deleted:
+            invalidate('post', instance.pk)
+            run_in_background(reap_post, instance.pk)
+    
+    def personalize_cached_data(self, request, pk, data):
+        """
+        Set liked_by_me for the requesting user on a cached post.
+        """
+        if 'liked_by_me' not in data:
+            return data
+        liked = request.user.is_authenticated and Like.objects.filter(
+            user=request.user, post_id=pk
+        ).exists()
+        return {**data, 'liked_by_me': liked}
     
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
@@ -73,9 +176,125 @@ class PostViewSet(viewsets.ModelViewSet):
         comments = post.comments.all()
         serializer = CommentSerializer(comments, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def threads(self, request, pk=None):
+        """
+        Paginated top-level comments, each with the start of its thread.
+        
+        GET /api/posts/{id}/threads/?page=1&replies=3
+        
+        Each top-level comment carries its first ``replies`` (max 50)
+        replies in thread order and the thread's total ``reply_count``.
+        The replies of every thread on the page come from one range query
+        on the (post, path) index; fetch the rest of a thread from
+        /api/comments/{id}/replies/.
+        
+        Response:
+            - 200 OK: Paginated list of threads
+            - 404 Not Found: If post doesn't exist
+        """
+        post = self.get_object()
+        limit = _bounded_int(request, 'replies', THREAD_DEFAULT_REPLIES, 0, THREAD_MAX_REPLIES)
+        
+        roots = Comment.objects.filter(post=post, depth=0).select_related('author').order_by('path')
+        page = self.paginate_queryset(roots)
+        threads = Comment.objects.select_related('author').with_first_replies(page, limit)
+        serializer = CommentThreadSerializer(threads, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        Top posts by time-decayed likes and comments.
+        
+        GET /api/posts/trending/?limit=20
+        
+        Reads the top ``limit`` (max 100) rows of the incrementally
+        maintained TrendingScore table, then fetches just those posts.
+        Posts without a like or comment in the last TRENDING_WINDOW_HOURS
+        are not listed. ``trending_score`` is the decayed engagement right
+        now, in likes (a comment counts double).
+        
+        Response:
+            - 200 OK: {"results": [posts ordered by trending_score]}
+        """
+        limit = _bounded_int(request, 'limit', TRENDING_DEFAULT_LIMIT, 1, TRENDING_MAX_LIMIT)
+        
+        ranked = TrendingScore.objects.top(limit)
+        posts = self.get_queryset().in_bulk([post_id for post_id, _ in ranked])
+        ranked = [(posts[post_id], score) for post_id, score in ranked if post_id in posts]
+        
+        serializer = self.get_serializer([post for post, _ in ranked], many=True)
+        results = serializer.data
+        for item, (_, score) in zip(results, ranked):
+            item['trending_score'] = round(score, 3)
+        return Response({'results': results})
+    
+    @action(detail=False, methods=['post'], url_path='bulk-import',
+            permission_classes=[permissions.IsAuthenticated])
+    def bulk_import(self, request):
+        """
+        Import many posts for the authenticated user in one request.
+        
+        POST /api/posts/bulk-import/
+        Content-Type: application/x-ndjson
+        
+        The body is read as a stream of JSON lines (title, content and an
+        optional created_at), validated in chunks and inserted with
+        bulk_create. Valid lines are imported even if others fail.
+        
+        Response:
+            - 200 OK: Import totals and per-line errors
+            - 400 Bad Request: Empty body
+        """
+        if not request.content_type.startswith(('application/x-ndjson', 'application/jsonl')):
+            return Response({
+                'error': 'Send the posts as application/x-ndjson, one JSON object per line'
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        
+        stream = request.stream
+        if stream is None:
+            return Response({
+                'error': 'Request body is empty'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = import_posts(stream, author=request.user)
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class TagPostsView(InstrumentedViewMixin, generics.ListAPIView):
+    """
+    API view listing the posts that use a hashtag.
+    
+    GET /api/tags/<tag>/posts/
+    
+    The tag is matched case-insensitively, with or without the leading
+    #. Posts are found through the PostHashtag inverted index rather than
+    a text search, newest first. An unknown tag gives an empty list.
+    
+    Response:
+        - 200 OK: Paginated list of posts
+    """
+    
+    serializer_class = PostListSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    
+    def get_queryset(self):
+        """
+        Return the posts linked to the hashtag, newest first.
+        """
+        tag = self.kwargs['tag'].lstrip('#').lower()
+        return (
+            Post.objects.filter(hashtag_links__hashtag__name=tag)
+            .select_related('author')
+            .with_comment_count()
+            .with_viewer_state(self.request.user)
+            .order_by('-created_at')
+        )
+
+
+class CommentViewSet(AuthorScopedWriteMixin, InstrumentedViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for Comment model providing CRUD operations.
     
@@ -84,7 +303,8 @@ class CommentViewSet(viewsets.ModelViewSet):
     Permissions:
         - List/Retrieve: Available to all authenticated users
         - Create: Authenticated users only
-        - Update/Delete: Only the comment author
+        - Update/Delete: Only the comment author (checked on author_id
+          before the comment is loaded; see AuthorScopedWriteMixin)
     """
     
     queryset = Comment.objects.all().select_related('author', 'post')
@@ -101,21 +321,73 @@ class CommentViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """
-        Set the comment author to the current authenticated user.
-        Create notification for post author.
+        Set the comment author to the current authenticated user and
+        publish a comment.created event (the post author is notified
+        from it).
         """
-        comment = serializer.save(author=self.request.user)
-        
-        # Create notification for post author (if not commenting on own post)
-        if comment.post.author != self.request.user:
-            from notifications.models import Notification
-            Notification.objects.create(
-                recipient=comment.post.author,
-                actor=self.request.user,
-                verb='commented on your post',
-                target_content_type=ContentType.objects.get_for_model(comment.post),
-                target_object_id=comment.post.id
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            publish(
+                'comment.created', comment_id=comment.pk, post_id=comment.post_id,
+                author_id=comment.author_id, post_author_id=comment.post.author_id
+            )
+        invalidate_feed(self.request.user.pk)
+        invalidate('post', comment.post_id)
+        record_engagement(
+            comment.post_id, TrendingScore.objects.COMMENT_WEIGHT, comment.created_at
+        )
+    
+    def perform_destroy(self, instance):
+        """
+        Delete the comment with its replies, then take them out of the
+        post's trending score once the delete has committed.
+        """
+        with transaction.atomic():
+            created = [instance.created_at]
+            created += Comment.objects.subtree(instance).values_list('created_at', flat=True)
+            publish(
+                'comment.deleted', comment_id=instance.pk, post_id=instance.post_id,
+                author_id=instance.author_id, post_author_id=instance.post.author_id
             )
+            instance.delete()
+        invalidate_feed(self.request.user.pk)
+        invalidate('post', instance.post_id)
+        for created_at in created:
+            retract_engagement(
+                instance.post_id, TrendingScore.objects.COMMENT_WEIGHT, created_at
+            )
+    
+    def perform_update(self, serializer):
+        """
+        Save the comment and drop the cached detail of its post.
+        """
+        comment = serializer.save()
+        invalidate('post', comment.post_id)
+    
+    @action(detail=True, methods=['get'])
+    def replies(self, request, pk=None):
+        """
+        Paginated replies below a comment, at every depth, in thread order.
+        
+        GET /api/comments/{id}/replies/?page=1&depth=2
+        
+        The subtree is read with one range query on the (post, path)
+        index. ``depth`` optionally limits how many levels below the
+        comment are included.
+        
+        Response:
+            - 200 OK: Paginated list of comments
+            - 404 Not Found: If comment doesn't exist
+        """
+        comment = self.get_object()
+        max_depth = None
+        if 'depth' in request.query_params:
+            max_depth = _bounded_int(request, 'depth', 1, 1, settings.COMMENT_MAX_DEPTH)
+        
+        replies = Comment.objects.subtree(comment, max_depth).select_related('author')
+        page = self.paginate_queryset(replies)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     def get_queryset(self):
         """
@@ -130,7 +402,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class FeedView(generics.ListAPIView):
+class FeedView(InstrumentedViewMixin, generics.ListAPIView):
     """
     Create a view in the posts app that generates a feed based on the posts
     from users that the current user follows. This view should return posts ordered by
@@ -146,6 +418,8 @@ class FeedView(generics.ListAPIView):
         - Ordered by creation date (newest first)
         - Supports pagination (configured globally)
         - Returns empty list if user doesn't follow anyone
+        - The first page is cached per user and prewarmed after login and
+          follow changes (see posts.feed_cache)
     
     Response:
         - 200 OK: Returns list of posts from followed users
@@ -160,16 +434,35 @@ class FeedView(generics.ListAPIView):
         Return posts from users that the current user follows.
         Ordered by creation date (most recent first).
         """
-        user = self.request.user
-        # Get all users that the current user follows
-        following_users = user.following.all()
+        return feed_queryset(self.request.user)
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Serve the first page from the feed cache; later pages, and any
+        request with other query parameters, are built as usual.
+        """
+        params = request.query_params
+        if not feed_cache_enabled() or set(params) - {'page'} or params.get('page', '1') != '1':
+            return super().list(request, *args, **kwargs)
         
-        # Get posts from those users, ordered by creation date
-        return Post.objects.filter(author__in=following_users).order_by('-created_at')
+        page = get_first_page(request.user)
+        next_link = None
+        if page['count'] > len(page['results']):
+            next_link = replace_query_param(
+                request.build_absolute_uri(), self.paginator.page_query_param, 2
+            )
+        return Response({
+            'count': page['count'],
+            'next': next_link,
+            'previous': None,
+            'results': page['results'],
+        })
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserTokenBucketThrottle, TokenBucketThrottle.for_scope('likes')])
+@idempotent
 def like_post(request, pk):
     """
     Like a post.
@@ -177,71 +470,82 @@ def like_post(request, pk):
     POST /api/posts/<int:pk>/like/
     
     Creates a like for the specified post by the authenticated user.
-    Prevents duplicate likes and creates a notification for the post author.
+    The like row and the post's like counter are written in one
+    transaction using conflict-safe statements, so concurrent duplicate
+    requests cannot raise IntegrityError. With COUNTER_FLUSH_INTERVAL set,
+    the counter is updated in batches instead (see posts.counters). Send
+    an Idempotency-Key header to have retries replay the original response.
     
     Response:
-        - 201 Created: Like created successfully
+        - 201 Created: Like created successfully (includes new like_count)
         - 400 Bad Request: Already liked
         - 404 Not Found: Post doesn't exist
     """
-    post = generics.get_object_or_404(Post, pk=pk)
     user = request.user
+    with transaction.atomic():
+        like, post_info = Like.objects.add_like(user, pk)
+        if like is not None:
+            # The post author is notified from the event
+            publish('like.created', post_id=like.post_id, user_id=user.pk,
+                    post_author_id=post_info['author_id'])
     
-    # Use get_or_create to prevent duplicate likes
-    like, created = Like.objects.get_or_create(user=request.user, post=post)
+    if post_info is None:
+        raise Http404
     
-    if not created:
+    if like is None:
         return Response({
             'error': 'You have already liked this post'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Create notification for post author (if not liking own post)
-    if post.author != user:
-        from notifications.models import Notification
-        Notification.objects.create(
-            recipient=post.author,
-            actor=user,
-            verb='liked your post',
-            target_content_type=ContentType.objects.get_for_model(post),
-            target_object_id=post.id
-        )
+    invalidate_feed(user.pk)
+    invalidate('post', like.post_id)
     
     serializer = LikeSerializer(like)
     return Response({
-        'message': f'You liked the post "{post.title}"',
-        'like': serializer.data
+        'message': f'You liked the post "{post_info["title"]}"',
+        'like': serializer.data,
+        'like_count': post_info['like_count']
     }, status=status.HTTP_201_CREATED)
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserTokenBucketThrottle, TokenBucketThrottle.for_scope('likes')])
+@idempotent
 def unlike_post(request, pk):
     """
     Unlike a post.
     
     POST /api/posts/<int:pk>/unlike/
     
-    Removes the like from the specified post by the authenticated user.
+    Removes the like from the specified post by the authenticated user
+    with a single DELETE ... RETURNING and decrements the like counter
+    in the same transaction (or in the next batch with write-behind
+    counters).
     
     Response:
-        - 200 OK: Like removed successfully
+        - 200 OK: Like removed successfully (includes new like_count)
         - 400 Bad Request: Post not liked
         - 404 Not Found: Post doesn't exist
     """
-    post = generics.get_object_or_404(Post, pk=pk)
-    user = request.user
+    with transaction.atomic():
+        removed, post_info = Like.objects.remove_like(request.user, pk)
+        if removed and post_info is not None:
+            publish('like.deleted', post_id=pk, user_id=request.user.pk,
+                    post_author_id=post_info['author_id'])
     
-    # Check if user has liked the post
-    try:
-        like = Like.objects.get(user=user, post=post)
-    except Like.DoesNotExist:
+    if post_info is None:
+        raise Http404
+    
+    if not removed:
         return Response({
             'error': 'You have not liked this post'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Delete the like
-    like.delete()
+    invalidate_feed(request.user.pk)
+    invalidate('post', pk)
     
     return Response({
-        'message': f'You unliked the post "{post.title}"'
+        'message': f'You unliked the post "{post_info["title"]}"',
+        'like_count': post_info['like_count']
     }, status=status.HTTP_200_OK)
@@ -0,0 +1,272 @@
+"""
+Bulk admin actions that run as chunked background jobs.
+
+Django's built-in "delete selected" action loads every selected object
+and cascades inside the request, which times out on large selections.
+The actions here only store the selected primary keys in an AdminJob
+(posts.models) and queue it with run_in_background, so the request
+returns after two queries whatever the selection size.
+
+The job then works through the keys in ADMIN_JOB_CHUNK_SIZE chunks and
+saves its progress after each one; the message shown after queueing
+links to the job's admin page. Every handler is idempotent, so a chunk
+that was interrupted can simply run again: ``manage.py run_admin_jobs``
+resumes jobs a process restart left unfinished.
+
+A running job holds a lease: it stamps heartbeat_at when it is claimed
+and after every chunk, and only a job whose heartbeat is older than
+ADMIN_JOB_STALE_SECONDS can be claimed again. Each progress update is
+conditional on the heartbeat the worker last wrote, so a worker whose job
+was taken over stops at its next chunk instead of racing the new one.
+
+Chunks stay short so the heartbeat keeps up: unbounded work such as
+reaping a deleted post's comments and likes is queued, not done inline.
+Changes to posts invalidate their cached details and publish the same
+outbox events as the equivalent API request.
+
+Actions:
+    - delete_in_background: posts are soft-deleted, publish post.deleted
+      and are reaped in the background (see social_media_api.reaper);
+      likes keep Post.like_count in step
+    - mark_read_in_background: notifications only
+    - reassign_author_in_background: posts (publishing post.updated) and
+      comments; the new author's username is entered in the action bar
+"""
+
+import logging
+from datetime import timedelta
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from .background import run_in_background
+from .outbox import publish_many
+from .response_cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+
+def _chunk_size():
+    return getattr(settings, 'ADMIN_JOB_CHUNK_SIZE', 1000)
+
+
+def _stale_before():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'ADMIN_JOB_STALE_SECONDS', 600))
+
+
+def _delete_posts(model, ids, params):
+    from social_media_api.reaper import reap_post
+
+    with transaction.atomic():
+        posts = list(
+            model.all_objects.select_for_update()
+            .filter(pk__in=ids, deleted_at__isnull=True).values_list('pk', 'author_id')
+        )
+        post_ids = [post_id for post_id, author_id in posts]
+        model.all_objects.filter(pk__in=post_ids).update(deleted_at=timezone.now())
+        publish_many('post.deleted', [
+            {'post_id': post_id, 'author_id': author_id} for post_id, author_id in posts
+        ])
+        # reap_deleted picks up any reap a restart drops
+        for post_id in post_ids:
+            run_in_background(reap_post, post_id)
+    invalidate('post', *post_ids)
+
+
+def _delete_likes(model, ids, params):
+    from social_media_api.reaper import _delete_likes_in_batches
+
+    _delete_likes_in_batches(model._base_manager.filter(pk__in=ids))
+
+
+def _delete_rows(model, ids, params):
+    with transaction.atomic():
+        model._base_manager.filter(pk__in=ids).delete()
+
+
+def _mark_read(model, ids, params):
+    model._base_manager.filter(pk__in=ids, read=False).update(read=True)
+
+
+def _reassign_posts(model, ids, params):
+    author_id = params['author_id']
+    with transaction.atomic():
+        model._base_manager.filter(pk__in=ids).update(author_id=author_id)
+        publish_many('post.updated', [
+            {'post_id': post_id, 'author_id': author_id}
+            for post_id in model.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        ])
+    invalidate('post', *ids)
+
+
+def _reassign_comments(model, ids, params):
+    model._base_manager.filter(pk__in=ids).update(author_id=params['author_id'])
+    post_ids = model._base_manager.filter(pk__in=ids).values_list('post_id', flat=True)
+    invalidate('post', *set(post_ids))
+
+
+# (app_label.model_name, action) -> handler(model, ids, params)
+HANDLERS = {
+    ('posts.post', 'delete'): _delete_posts,
+    ('posts.post', 'reassign_author'): _reassign_posts,
+    ('posts.comment', 'delete'): _delete_rows,
+    ('posts.comment', 'reassign_author'): _reassign_comments,
+    ('posts.like', 'delete'): _delete_likes,
+    ('notifications.notification', 'delete'): _delete_rows,
+    ('notifications.notification', 'mark_read'): _mark_read,
+}
+
+
+def start_job(request, queryset, action, params=None):
+    """
+    Store the selection as an AdminJob and queue it.
+
+    Returns:
+        AdminJob: The queued job
+    """
+    from posts.models import AdminJob
+
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    job = AdminJob.objects.create(
+        content_type=ContentType.objects.get_for_model(queryset.model),
+        action=action,
+        params=params or {},
+        object_ids=ids,
+        total=len(ids),
+        created_by=request.user,
+    )
+    run_in_background(run_admin_job, job.pk)
+    return job
+
+
+def run_admin_job(job_id, resume=False):
+    """
+    Process a job chunk by chunk, saving progress after each chunk.
+
+    Only pending jobs are claimed unless resume is set, in which case
+    failed jobs and running jobs whose heartbeat went stale (interrupted)
+    are picked up as well. If another worker takes the job over, this one
+    stops after its current chunk.
+
+    Returns:
+        AdminJob: The job, or None if it could not be claimed
+    """
+    from posts.models import AdminJob
+
+    claimable = Q(status=AdminJob.PENDING)
+    if resume:
+        claimable |= Q(status=AdminJob.FAILED)
+        claimable |= Q(status=AdminJob.RUNNING) & (
+            Q(heartbeat_at__isnull=True) | Q(heartbeat_at__lt=_stale_before())
+        )
+    heartbeat = timezone.now()
+    if not AdminJob.objects.filter(claimable, pk=job_id).update(
+        status=AdminJob.RUNNING, error='', heartbeat_at=heartbeat
+    ):
+        return None
+
+    job = AdminJob.objects.select_related('content_type').get(pk=job_id)
+    model = job.content_type.model_class()
+    handler = HANDLERS[(f'{job.content_type.app_label}.{job.content_type.model}', job.action)]
+    chunk_size = _chunk_size()
+    try:
+        while job.processed < job.total:
+            ids = job.object_ids[job.processed:job.processed + chunk_size]
+            handler(model, ids, job.params)
+            job.processed += len(ids)
+            previous, heartbeat = heartbeat, timezone.now()
+            if not AdminJob.objects.filter(pk=job.pk, heartbeat_at=previous).update(
+                processed=job.processed, heartbeat_at=heartbeat
+            ):
+                logger.warning('Admin job %s was taken over by another worker', job.pk)
+                return None
+    except Exception as exc:
+        logger.exception('Admin job %s failed', job.pk)
+        job.status, job.error = AdminJob.FAILED, str(exc)
+    else:
+        job.status = AdminJob.DONE
+    job.finished_at = timezone.now()
+    if not AdminJob.objects.filter(pk=job.pk, heartbeat_at=heartbeat).update(
+        status=job.status, error=job.error, finished_at=job.finished_at
+    ):
+        return None
+    return job
+
+
+def resume_admin_jobs(include_failed=False):
+    """
+    Run every pending or interrupted job, oldest first.
+
+    Running jobs that are still making progress are left alone.
+
+    Returns:
+        list: The jobs that were run
+    """
+    from posts.models import AdminJob
+
+    statuses = [AdminJob.PENDING, AdminJob.RUNNING]
+    if include_failed:
+        statuses.append(AdminJob.FAILED)
+    job_ids = AdminJob.objects.filter(status__in=statuses).order_by('pk').values_list('pk', flat=True)
+    jobs = [run_admin_job(job_id, resume=True) for job_id in list(job_ids)]
+    return [job for job in jobs if job is not None]
+
+
+def _queue(modeladmin, request, queryset, action, params=None):
+    job = start_job(request, queryset, action, params)
+    url = reverse('admin:posts_adminjob_change', args=[job.pk])
+    modeladmin.message_user(request, format_html(
+        'Queued "{}" for {} {} as a background job. <a href="{}">Follow its progress</a>.',
+        action.replace('_', ' '), job.total, queryset.model._meta.verbose_name_plural, url
+    ), messages.SUCCESS)
+
+
+@admin.action(description='Delete selected in the background', permissions=['delete'])
+def delete_in_background(modeladmin, request, queryset):
+    _queue(modeladmin, request, queryset, 'delete')
+
+
+@admin.action(description='Mark selected as read in the background', permissions=['change'])
+def mark_read_in_background(modeladmin, request, queryset):
+    _queue(modeladmin, request, queryset, 'mark_read')
+
+
+@admin.action(description='Reassign selected to the new author in the background',
+              permissions=['change'])
+def reassign_author_in_background(modeladmin, request, queryset):
+    username = request.POST.get('new_author', '').strip()
+    author = get_user_model().objects.visible().filter(username=username).first() if username else None
+    if author is None:
+        modeladmin.message_user(
+            request, 'Enter the username of an active user as the new author.', messages.ERROR
+        )
+        return
+    _queue(modeladmin, request, queryset, 'reassign_author', {'author_id': author.pk})
+
+
+class ReassignAuthorActionForm(ActionForm):
+    """Action bar with a username box for reassign_author_in_background."""
+
+    new_author = forms.CharField(required=False, label='New author (username)')
+
+
+class BackgroundActionsAdminMixin:
+    """
+    ModelAdmin mixin that drops the in-request "delete selected" action.
+
+    Set ``actions`` to the background actions the model supports.
+    """
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
@@ -0,0 +1,133 @@
+"""
+Helpers that keep Django admin changelists fast on large tables.
+
+- EstimatedCountPaginator: uses the PostgreSQL planner's row estimate
+  instead of COUNT(*) once a changelist has more than
+  ADMIN_ESTIMATED_COUNT_THRESHOLD rows (100,000 by default)
+- count_subquery(): a correlated COUNT evaluated only for the rows on the
+  page, instead of a JOIN + GROUP BY over the whole table
+- RelatedIdFilter: filter on a foreign key by id without rendering every
+  related row (e.g. every user) into the sidebar
+- LargeTableAdminMixin: wires the paginator in and turns off the second
+  "show full result count" COUNT
+"""
+
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for queryset, or None.
+
+    Only PostgreSQL is supported; EXPLAIN plans the query without running
+    it, so this costs the same on 1,000 and 100 million rows.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    try:
+        plan = json.loads(queryset.order_by().explain(format='json'))
+    except (DatabaseError, ValueError):
+        return None
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates the count of very large querysets.
+
+    Exact counts are kept below ADMIN_ESTIMATED_COUNT_THRESHOLD, so small
+    tables and narrow filters still show exact totals.
+    """
+
+    @cached_property
+    def count(self):
+        """Return the estimated row count above the threshold, else the exact one."""
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
+
+
+def count_subquery(queryset, field):
+    """
+    Return a correlated COUNT of queryset rows whose field is the outer pk.
+
+    Annotating a changelist with this counts only the rows on the page.
+    """
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        n=Count('*')
+    ).values('n')
+    return Coalesce(Subquery(counts), 0)
+
+
+class RelatedIdFilter(admin.SimpleListFilter):
+    """
+    List filter on a foreign key id (``?author=12``).
+
+    Unlike a plain list_filter entry it doesn't list every related row;
+    the sidebar shows only the current selection. Changelists link to it
+    from the related column (see LargeTableAdminMixin.filter_link).
+
+    Attributes:
+        parameter_name (str): Foreign key field name, also the URL parameter
+    """
+
+    def lookups(self, request, model_admin):
+        """Offer only the currently selected related object."""
+        value = self.value()
+        if not value or not value.isdigit():
+            return []
+        related = model_admin.model._meta.get_field(self.parameter_name).related_model
+        label = related._base_manager.filter(pk=value).first()
+        return [(value, str(label))] if label is not None else []
+
+    def queryset(self, request, queryset):
+        """Filter by the related id."""
+        value = self.value()
+        if value is None:
+            return queryset
+        if not value.isdigit():
+            return queryset.none()
+        return queryset.filter(**{f'{self.parameter_name}_id': value})
+
+
+class AuthorFilter(RelatedIdFilter):
+    title = 'author'
+    parameter_name = 'author'
+
+
+class UserFilter(RelatedIdFilter):
+    title = 'user'
+    parameter_name = 'user'
+
+
+class PostFilter(RelatedIdFilter):
+    title = 'post'
+    parameter_name = 'post'
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin mixin for tables too large for COUNT(*) on every page view.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def filter_link(self, obj, field):
+        """Render a related object as a link filtering the changelist by it."""
+        related_id = getattr(obj, f'{field}_id')
+        if related_id is None:
+            return '-'
+        return format_html('<a href="?{}={}">{}</a>', field, related_id, getattr(obj, field))
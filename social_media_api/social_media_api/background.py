@@ -0,0 +1,63 @@
+"""
+Minimal in-process background task runner.
+
+Tasks are queued on a small thread pool once the surrounding database
+transaction commits, so request latency never includes them and they never
+see uncommitted rows. Every task must be idempotent and have a management
+command that can redo its work, because a process restart drops whatever
+is still queued.
+
+Set BACKGROUND_TASKS_EAGER = True to run tasks synchronously on commit
+(used by the test suite).
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+                thread_name_prefix='background-task',
+            )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+
+
+def _run_in_thread(func, args, kwargs):
+    try:
+        _run(func, args, kwargs)
+    finally:
+        # Worker threads open their own connections; don't leak them
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) off the request thread after commit.
+    """
+    def submit():
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            _run(func, args, kwargs)
+        else:
+            _get_executor().submit(_run_in_thread, func, args, kwargs)
+
+    transaction.on_commit(submit)
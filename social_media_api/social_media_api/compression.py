@@ -0,0 +1,130 @@
+"""
+Negotiated response compression.
+
+CompressionMiddleware compresses API responses at or above
+COMPRESSION_MIN_SIZE bytes (1 KB by default) with the best encoding the
+client accepts: brotli if installed (requires: pip install brotli),
+otherwise gzip. Feeds and post details with nested comments typically
+shrink by 80-90%. Small responses are sent as-is because compressing
+them saves little and still costs CPU.
+
+Compared with Django's GZipMiddleware it honours q-values in
+Accept-Encoding (including ``gzip;q=0``), adds brotli, only compresses
+text-like content types, and leaves streaming responses alone. Streaming
+responses are the NDJSON export, which is gzipped already, and static
+files, which WhiteNoise serves precompressed. Like GZipMiddleware, gzip
+output carries random padding in the header to mitigate BREACH.
+"""
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised when brotli is missing
+    brotli = None
+
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+
+
+def available_encodings():
+    """Return the supported encodings, most preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into {coding: q}.
+    """
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header, encodings=None):
+    """
+    Return the encoding to use for a request's Accept-Encoding, or None.
+
+    The highest q-value wins; ties go to the server's preference order.
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in encodings or available_encodings():
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(content, encoding):
+    """Compress bytes with the given encoding ('br' or 'gzip')."""
+    if encoding == 'br':
+        return brotli.compress(
+            content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+        )
+    return compress_string(content, max_random_bytes=100)
+
+
+class CompressionMiddleware:
+    """
+    Compress large text responses with brotli or gzip.
+
+    Place it near the top of MIDDLEWARE (after QueryMetricsMiddleware) so
+    it sees the final response body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return response
+        if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+
+        # A strong ETag would now claim byte equality with the uncompressed body
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,128 @@
+"""
+Sparse fieldsets: ``?fields=`` and ``?omit=`` on read endpoints.
+
+``GET /api/posts/?fields=id,title,author`` returns only those keys, and
+``?omit=content,comment_count`` returns everything else. The selection
+prunes the SQL as well as the JSON:
+
+- the queryset is restricted with ``.only()`` to the primary key, the
+  columns behind the selected fields and the foreign keys it joins, so
+  unrequested columns (e.g. post ``content``) are never read
+- views check ``wants_field()`` before adding annotations, joins and
+  prefetches, so e.g. ``comment_count`` costs nothing when not asked for
+
+A field whose source isn't a model column (a property, an annotation, a
+method field) must be listed in the view's ``sparse_field_columns`` with
+the columns it needs, often none. If it isn't listed, the queryset is
+left unrestricted so the field can never trigger a per-row query.
+"""
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsetMixin:
+    """
+    GenericAPIView mixin adding ``?fields=`` / ``?omit=`` to GET requests.
+
+    Attributes:
+        sparse_field_columns (dict): Serializer field name -> model columns
+            it reads, for fields that aren't backed by a model column
+        sparse_fieldset_actions (tuple): ViewSet actions that honour the
+            parameters (None: every GET handled by the view)
+    """
+
+    sparse_field_columns = {}
+    sparse_fieldset_actions = None
+
+    def requested_fields(self):
+        """
+        Return the set of serializer fields to include, or None for all.
+
+        Raises:
+            ValidationError: If a parameter names an unknown field
+        """
+        if hasattr(self, '_requested_fields'):
+            return self._requested_fields
+
+        self._requested_fields = None
+        params = self.request.query_params
+        if self.request.method != 'GET' or not ({'fields', 'omit'} & set(params)):
+            return None
+        if (self.sparse_fieldset_actions is not None
+                and getattr(self, 'action', None) not in self.sparse_fieldset_actions):
+            return None
+
+        available = [
+            name for name, field in self.get_serializer_class()().fields.items()
+            if not field.write_only
+        ]
+        selected = set(available)
+        for param in ('fields', 'omit'):
+            if param not in params:
+                continue
+            names = {name.strip() for name in params[param].split(',') if name.strip()}
+            unknown = names - set(available)
+            if unknown:
+                raise ValidationError({
+                    param: f'Unknown field(s): {", ".join(sorted(unknown))}. '
+                           f'Available: {", ".join(available)}.'
+                })
+            selected = selected & names if param == 'fields' else selected - names
+        self._requested_fields = selected
+        return selected
+
+    def wants_field(self, name):
+        """Whether the response will include the serializer field name."""
+        requested = self.requested_fields()
+        return requested is None or name in requested
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Return the serializer with unrequested fields removed.
+        """
+        serializer = super().get_serializer(*args, **kwargs)
+        requested = self.requested_fields()
+        if requested is not None:
+            child = getattr(serializer, 'child', serializer)
+            for name in list(child.fields):
+                if name not in requested:
+                    del child.fields[name]
+        return serializer
+
+    def sparse_queryset(self, queryset):
+        """
+        Restrict queryset to the columns the requested fields need.
+        """
+        requested = self.requested_fields()
+        if requested is None:
+            return queryset
+
+        model = queryset.model
+        columns = {model._meta.pk.name}
+        fields = self.get_serializer_class()().fields
+        for name in requested:
+            if name in self.sparse_field_columns:
+                columns.update(self.sparse_field_columns[name])
+                continue
+            field = fields[name]
+            source = field.source_attrs[0] if field.source_attrs else None
+            try:
+                model_field = model._meta.get_field(source) if source else None
+            except Exception:
+                model_field = None
+            if model_field is None or not model_field.concrete or model_field.many_to_many:
+                # Unknown requirements: load every column rather than risk
+                # a deferred-field query per row
+                return queryset
+            if isinstance(field, serializers.Serializer):
+                return queryset
+            columns.add(model_field.name)
+
+        # Relations joined with select_related can't be deferred
+        select_related = queryset.query.select_related
+        if select_related is True:
+            return queryset
+        if select_related:
+            columns.update(select_related)
+        return queryset.only(*columns)
@@ -0,0 +1,67 @@
+"""
+Idempotency-Key support for write endpoints.
+
+Clients may send an ``Idempotency-Key`` header with a POST request. The
+first response for a given (user, path, key) is stored in the cache and
+replayed verbatim for any retry carrying the same key, so a double-tap or
+a network retry never performs the write twice. The path names the target
+object, so reusing a key for another object (liking a second post) is a
+new request rather than a replay.
+"""
+
+import functools
+import hashlib
+
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+# How long a stored response stays replayable (seconds)
+IDEMPOTENCY_TTL = 60 * 60 * 24
+
+# How long a key is locked while its first request is still running
+IDEMPOTENCY_LOCK_TTL = 30
+
+
+def idempotent(view_func):
+    """
+    Decorator for DRF function views that honours the Idempotency-Key header.
+
+    Requests without the header are passed through unchanged. Successful
+    and client-error responses are cached; server errors are not, so the
+    client can retry them.
+    """
+
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key or not request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+
+        target = hashlib.sha1(request.path.encode()).hexdigest()
+        cache_key = f'idempotency:{view_func.__name__}:{target}:{request.user.pk}:{key}'
+        lock_key = f'{cache_key}:lock'
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            data, status_code = cached
+            response = Response(data, status=status_code)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        # Only one request per key may run; concurrent duplicates get 409
+        if not cache.add(lock_key, True, IDEMPOTENCY_LOCK_TTL):
+            return Response({
+                'error': 'A request with this Idempotency-Key is already in progress'
+            }, status=status.HTTP_409_CONFLICT)
+
+        try:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(cache_key, (response.data, response.status_code), IDEMPOTENCY_TTL)
+        finally:
+            cache.delete(lock_key)
+
+        return response
+
+    return wrapper
@@ -0,0 +1,260 @@
+"""
+Transactional outbox for post, comment, like and follow changes.
+
+Side effects of a write (notifications, search indexing, feed warmup)
+used to run inline in the view, so every new consumer added request
+latency. Instead, each write calls ``publish``, which appends an
+OutboxEvent (posts.models) in the same transaction as the change: the
+event exists exactly when the change committed, and the request only
+pays for one INSERT.
+
+``relay_outbox`` then hands pending events to the consumers in HANDLERS,
+in id order and in batches of OUTBOX_BATCH_SIZE. It runs in the
+background after every commit that published events, and
+``manage.py relay_outbox --loop`` runs it continuously as a separate
+process, which also picks up events a restart left pending.
+
+Delivery rules:
+    - Consecutive events with the same topic reach a consumer together,
+      so it can use one query for the whole run
+    - Consumers run in the relay's transaction, so database-only side
+      effects happen exactly once; anything external must be idempotent
+    - A failing event stops the relay, keeping later events in order,
+      and is retried on the next run; after OUTBOX_MAX_ATTEMPTS it is
+      marked processed with its error (see the Outbox Event admin)
+    - One relay runs at a time: it holds a cache lock, refreshed after
+      every batch and released only by its owner, and on databases with
+      SKIP LOCKED a relay that still meets a locked earlier event stops
+      rather than overtake it
+
+Topics and payloads:
+    - post.created, post.updated, post.deleted: post_id, author_id
+    - comment.created, comment.deleted: comment_id, post_id, author_id,
+      post_author_id
+    - like.created, like.deleted: post_id, user_id, post_author_id
+    - follow.created, follow.deleted: follower_id, followed_id
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .background import run_in_background
+
+logger = logging.getLogger(__name__)
+
+# Cache key and expiry (seconds) of the lock held by the running relay
+RELAY_LOCK_KEY = 'outbox:relay:lock'
+RELAY_LOCK_TTL = 60
+
+
+def _notify(payloads, verb, recipient_key, actor_key, target_model, target_key):
+    from django.contrib.contenttypes.models import ContentType
+    from notifications.models import Notification
+
+    target_type = ContentType.objects.get_for_model(target_model)
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=payload[recipient_key],
+            actor_id=payload[actor_key],
+            verb=verb,
+            target_content_type=target_type,
+            target_object_id=payload[target_key],
+        )
+        for payload in payloads
+        if payload[recipient_key] != payload[actor_key]
+    ])
+
+
+def _notify_comment(payloads):
+    from posts.models import Post
+
+    _notify(payloads, 'commented on your post', 'post_author_id', 'author_id', Post, 'post_id')
+
+
+def _notify_like(payloads):
+    from posts.models import Post
+
+    _notify(payloads, 'liked your post', 'post_author_id', 'user_id', Post, 'post_id')
+
+
+def _notify_follow(payloads):
+    from django.contrib.auth import get_user_model
+
+    _notify(payloads, 'started following you', 'followed_id', 'follower_id', get_user_model(),
+            'followed_id')
+
+
+def _index_posts(payloads):
+    from posts.tags import index_posts
+
+    index_posts(list(dict.fromkeys(payload['post_id'] for payload in payloads)))
+
+
+def _warm_feeds(payloads):
+    from posts.feed_cache import feed_cache_enabled, warm_feed
+
+    if feed_cache_enabled():
+        for follower_id in dict.fromkeys(payload['follower_id'] for payload in payloads):
+            warm_feed(follower_id)
+
+
+# topic -> consumers, each called with the payloads of a run of events
+HANDLERS = {
+    'post.created': [_index_posts],
+    'post.updated': [_index_posts],
+    'comment.created': [_notify_comment],
+    'like.created': [_notify_like],
+    'follow.created': [_notify_follow, _warm_feeds],
+    'follow.deleted': [_warm_feeds],
+}
+
+
+def publish(topic, **payload):
+    """
+    Append an event to the outbox in the current transaction.
+    """
+    publish_many(topic, [payload])
+
+
+def publish_many(topic, payloads):
+    """
+    Append one event per payload, in order, in the current transaction.
+    """
+    from posts.models import OutboxEvent
+
+    events = [OutboxEvent(topic=topic, payload=payload) for payload in payloads]
+    if events:
+        OutboxEvent.objects.bulk_create(events)
+        run_in_background(relay_outbox)
+
+
+def _deliver(topic, payloads):
+    for handler in HANDLERS.get(topic, ()):
+        handler(payloads)
+
+
+def _try_deliver(topic, events):
+    """Deliver events in a savepoint; return the error message or None."""
+    try:
+        with transaction.atomic():
+            _deliver(topic, [event.payload for event in events])
+    except Exception as exc:
+        if len(events) == 1:
+            logger.exception('Outbox event %s (%s) failed', events[0].pk, topic)
+        return f'{type(exc).__name__}: {exc}'
+    return None
+
+
+def _relay_batch(batch_size):
+    """
+    Deliver one batch of pending events.
+
+    Returns:
+        tuple: (events processed, whether delivery stopped on a failure)
+    """
+    from posts.models import OutboxEvent
+
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        pending = OutboxEvent.objects.filter(processed_at__isnull=True).order_by('pk')
+        events = list(pending.select_for_update(skip_locked=skip_locked)[:batch_size])
+        if skip_locked and events and pending.filter(pk__lt=events[0].pk).exists():
+            # Another relay holds earlier events; delivering ours would
+            # overtake them
+            return 0, True
+        done, failed, error = [], None, None
+        for topic, run in groupby(events, key=lambda event: event.topic):
+            run = list(run)
+            if _try_deliver(topic, run) is None:
+                done += run
+                continue
+            # Find the failing event by delivering the run one at a time
+            for event in run:
+                error = _try_deliver(topic, [event])
+                if error is not None:
+                    failed = event
+                    break
+                done.append(event)
+            break
+
+        if failed is not None:
+            failed.attempts += 1
+            OutboxEvent.objects.filter(pk=failed.pk).update(attempts=failed.attempts, error=error)
+            if failed.attempts >= getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5):
+                # Give up on it so the events behind it can flow
+                done.append(failed)
+                failed = None
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in done]).update(
+            processed_at=timezone.now()
+        )
+    return len(done), failed is not None
+
+
+def _holds_lock(owner):
+    return cache.get(RELAY_LOCK_KEY) == owner
+
+
+def relay_outbox(batch_size=None):
+    """
+    Deliver pending events until none are left or one fails.
+
+    Returns immediately if another relay holds the lock; it picks up
+    events committed while it runs. The lock is refreshed after every
+    batch, and the relay stops if it has lost it to another relay.
+
+    Returns:
+        int: Number of events processed
+    """
+    from posts.models import OutboxEvent
+
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 500)
+    processed = 0
+    owner = uuid.uuid4().hex
+    while cache.add(RELAY_LOCK_KEY, owner, RELAY_LOCK_TTL):
+        try:
+            while True:
+                count, stopped = _relay_batch(batch_size)
+                processed += count
+                if stopped:
+                    return processed
+                if count < batch_size:
+                    break
+                if not _holds_lock(owner):
+                    logger.warning('Outbox relay lock expired; leaving the rest to its new holder')
+                    return processed
+                cache.touch(RELAY_LOCK_KEY, RELAY_LOCK_TTL)
+        finally:
+            if _holds_lock(owner):
+                cache.delete(RELAY_LOCK_KEY)
+        # Events committed after our last batch whose relay saw the lock
+        if not OutboxEvent.objects.filter(processed_at__isnull=True).exists():
+            break
+    return processed
+
+
+def prune_outbox(days, batch_size=5000):
+    """
+    Delete events processed more than days ago, in batches.
+
+    Returns:
+        int: Number of events deleted
+    """
+    from posts.models import OutboxEvent
+
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = list(
+            OutboxEvent.objects.filter(processed_at__lt=cutoff)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OutboxEvent.objects.filter(pk__in=ids).delete()[0]
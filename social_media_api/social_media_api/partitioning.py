@@ -0,0 +1,243 @@
+"""
+Optional monthly range partitioning on PostgreSQL.
+
+Notification is an append-mostly table read newest-first per recipient. On
+PostgreSQL it can be converted, once, into a table partitioned by month on
+``timestamp``. Each partition then has small indexes of its own. Old months
+can be detached (kept as ordinary tables for archiving) or dropped in
+constant time, with no bulk DELETE and the vacuum work that follows it.
+The ``manage_partitions`` management command does the conversion and the
+monthly upkeep.
+
+Post is not partitioned. PostgreSQL requires every unique constraint on a
+partitioned table, the primary key included, to contain the partition key.
+Comment and Like reference posts by ``post_id`` alone, so their foreign keys
+could not point at a partitioned post table. Post gets the time bucketing on
+the read side only.
+
+That read side is the retention window. Set PARTITION_RETENTION_MONTHS to
+N to have the feed and notification list query only the current month and
+the N-1 before it (``retention_cutoff()``). On a partitioned table the
+planner then skips every older partition. On an ordinary table the filter
+still bounds the index range scanned. The default of 0 disables the window
+and querysets are unchanged.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+class PartitioningError(Exception):
+    """Raised when a partitioning operation cannot be carried out."""
+
+
+def month_start(value):
+    """Return the first instant of value's month (UTC)."""
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    """Shift a month start by count months (may be negative)."""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def retention_cutoff(now=None, months=None):
+    """
+    Return the oldest timestamp inside the retention window, or None.
+
+    ``months`` defaults to PARTITION_RETENTION_MONTHS.
+    """
+    if months is None:
+        months = getattr(settings, 'PARTITION_RETENTION_MONTHS', 0)
+    if not months:
+        return None
+    return add_months(month_start(now or timezone.now()), -(months - 1))
+
+
+class PartitionedTable:
+    """
+    A model table range-partitioned by month on one datetime column.
+
+    Partitions are named ``<table>_pYYYY_MM``, and a ``<table>_default``
+    partition catches rows outside every monthly range.
+    """
+
+    def __init__(self, model, column):
+        self.model = model
+        self.column = column
+        self.table = model._meta.db_table
+
+    def partition_name(self, month):
+        return f'{self.table}_p{month.year:04d}_{month.month:02d}'
+
+    @property
+    def default_partition(self):
+        return f'{self.table}_default'
+
+    def partition_sql(self, month):
+        """Return the CREATE statement for the partition holding month."""
+        upper = add_months(month, 1)
+        return (
+            f'CREATE TABLE IF NOT EXISTS "{self.partition_name(month)}" '
+            f'PARTITION OF "{self.table}" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+
+    def _check_backend(self):
+        if connection.vendor != 'postgresql':
+            raise PartitioningError(
+                f'Table partitioning requires PostgreSQL (current database: {connection.vendor})'
+            )
+
+    def is_partitioned(self):
+        self._check_backend()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relkind FROM pg_class c "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+                [self.table],
+            )
+            row = cursor.fetchone()
+        return row is not None and row[0] == 'p'
+
+    def partitions(self):
+        """
+        Return [(name, bound_expression)] of the attached partitions, in order.
+        """
+        self._check_backend()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+                "FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = %s ORDER BY child.relname",
+                [self.table],
+            )
+            return cursor.fetchall()
+
+    def convert(self, months_ahead=3):
+        """
+        Convert the existing table into a monthly-partitioned one.
+
+        Runs in a single transaction while holding an exclusive lock, and
+        copies every row, so schedule it for a maintenance window. Indexes
+        and foreign keys are recreated under their original names. Ids
+        keep coming from a sequence that continues after the current
+        maximum.
+        """
+        self._check_backend()
+        if self.is_partitioned():
+            raise PartitioningError(f'{self.table} is already partitioned')
+
+        old_table = f'{self.table}_unpartitioned'
+        sequence = f'{self.table}_id_seq'
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE "{self.table}" IN ACCESS EXCLUSIVE MODE')
+
+            # Definitions are read before the rename so they name the new table
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes WHERE tablename = %s "
+                "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE contype = 'p')",
+                [self.table],
+            )
+            index_definitions = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [self.table],
+            )
+            foreign_keys = cursor.fetchall()
+            cursor.execute(f'SELECT MIN("{self.column}"), MAX(id) FROM "{self.table}"')
+            oldest, max_id = cursor.fetchone()
+
+            cursor.execute(f'ALTER TABLE "{self.table}" RENAME TO "{old_table}"')
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{sequence}_partitioned"')
+            cursor.execute(f"SELECT setval('\"{sequence}_partitioned\"', %s)", [max_id or 1])
+            cursor.execute(
+                f'CREATE TABLE "{self.table}" (LIKE "{old_table}" INCLUDING DEFAULTS) '
+                f'PARTITION BY RANGE ("{self.column}")'
+            )
+            cursor.execute(
+                f'ALTER TABLE "{self.table}" ALTER COLUMN id '
+                f"SET DEFAULT nextval('\"{sequence}_partitioned\"')"
+            )
+            cursor.execute(
+                f'ALTER TABLE "{self.table}" ADD PRIMARY KEY (id, "{self.column}")'
+            )
+
+            first = month_start(oldest or timezone.now())
+            last = add_months(month_start(timezone.now()), months_ahead)
+            month = first
+            while month <= last:
+                cursor.execute(self.partition_sql(month))
+                month = add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE "{self.default_partition}" PARTITION OF "{self.table}" DEFAULT'
+            )
+
+            cursor.execute(f'INSERT INTO "{self.table}" SELECT * FROM "{old_table}"')
+            cursor.execute(f'DROP TABLE "{old_table}"')
+            cursor.execute(
+                f'ALTER SEQUENCE "{sequence}_partitioned" OWNED BY "{self.table}".id'
+            )
+            for definition in index_definitions:
+                cursor.execute(definition)
+            for name, definition in foreign_keys:
+                cursor.execute(f'ALTER TABLE "{self.table}" ADD CONSTRAINT "{name}" {definition}')
+
+    def ensure_partitions(self, months_ahead=3, now=None):
+        """
+        Create the partitions for the current month and months_ahead more.
+
+        Returns:
+            list: Names of the partitions checked or created
+        """
+        self._check_backend()
+        if not self.is_partitioned():
+            raise PartitioningError(f'{self.table} is not partitioned; run with --convert first')
+
+        current = month_start(now or timezone.now())
+        names = []
+        with connection.cursor() as cursor:
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                cursor.execute(self.partition_sql(month))
+                names.append(self.partition_name(month))
+        return names
+
+    def detach_before(self, cutoff, drop=False):
+        """
+        Detach (or drop) every monthly partition that ends before cutoff.
+
+        Detached partitions stay behind as ordinary tables, so they can be
+        archived and then dropped.
+
+        Returns:
+            list: Names of the partitions detached or dropped
+        """
+        self._check_backend()
+        cutoff_name = self.partition_name(month_start(cutoff))
+        prefix = f'{self.table}_p'
+        expired = [
+            name for name, _ in self.partitions()
+            if name.startswith(prefix) and name < cutoff_name
+        ]
+        with connection.cursor() as cursor:
+            for name in expired:
+                cursor.execute(f'ALTER TABLE "{self.table}" DETACH PARTITION "{name}"')
+                if drop:
+                    cursor.execute(f'DROP TABLE "{name}"')
+        return expired
+
+
+def partitioned_tables():
+    """Return the PartitionedTable for every table that supports partitioning."""
+    from notifications.models import Notification
+
+    return [PartitionedTable(Notification, 'timestamp')]
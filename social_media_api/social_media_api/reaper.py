@@ -0,0 +1,181 @@
+"""
+Deferred removal of soft-deleted posts and accounts.
+
+Deleting a post or an account only sets ``deleted_at`` (see
+``Post.soft_delete`` and ``CustomUser.soft_delete``). The default managers
+and list views hide the row and everything hanging off it from that moment,
+so the request returns after one or two UPDATEs however much content is
+attached.
+
+The rows themselves are removed here, off the request thread. Dependents
+go first, in primary-key batches of REAPER_BATCH_SIZE with one short
+transaction per batch, so no single statement locks thousands of rows or
+holds a transaction open for the whole purge. The post or user row is
+deleted last, once nothing references it.
+
+Every function is idempotent and can be re-run after an interruption;
+``reap_deleted`` (the ``reap_deleted`` management command) finishes any
+purge that a process restart dropped from the background queue.
+"""
+
+import logging
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+logger = logging.getLogger(__name__)
+
+
+def _batch_size(batch_size=None):
+    return batch_size or getattr(settings, 'REAPER_BATCH_SIZE', 500)
+
+
+def _delete_in_batches(queryset, batch_size=None):
+    """
+    Delete the rows of queryset batch_size at a time.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    batch_size = _batch_size(batch_size)
+    manager = queryset.model._base_manager
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            manager.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+
+def _delete_likes_in_batches(queryset, batch_size=None):
+    """
+    Delete likes batch_size at a time, keeping Post.like_count in step.
+
+    Returns:
+        int: Number of likes deleted
+    """
+    from posts.models import Post, Like
+
+    batch_size = _batch_size(batch_size)
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by('pk').values_list('pk', 'post_id')[:batch_size])
+            if not rows:
+                return deleted
+            Like._base_manager.filter(pk__in=[pk for pk, _ in rows]).delete()
+
+            # One UPDATE per distinct decrement instead of one per post
+            by_amount = defaultdict(list)
+            for post_id, amount in Counter(post_id for _, post_id in rows).items():
+                by_amount[amount].append(post_id)
+            for amount, post_ids in by_amount.items():
+                Post.all_objects.filter(pk__in=post_ids).update(
+                    like_count=Greatest(F('like_count') - amount, 0)
+                )
+        deleted += len(rows)
+
+
+def reap_post(post_id, batch_size=None):
+    """
+    Remove a soft-deleted post and everything that references it.
+
+    Posts that are missing or not soft-deleted are left alone.
+
+    Returns:
+        int: Number of rows deleted, the post included
+    """
+    from notifications.models import Notification
+    from posts.models import Post, Comment, Like, Mention, PostHashtag, TrendingScore
+
+    if not Post.all_objects.filter(pk=post_id, deleted_at__isnull=False).exists():
+        return 0
+
+    post_type = ContentType.objects.get_for_model(Post)
+    deleted = sum(
+        _delete_in_batches(queryset, batch_size)
+        for queryset in (
+            Notification.objects.filter(
+                target_content_type=post_type, target_object_id=post_id
+            ),
+            Mention.objects.filter(post_id=post_id),
+            PostHashtag.objects.filter(post_id=post_id),
+            Like._base_manager.filter(post_id=post_id),
+            Comment._base_manager.filter(post_id=post_id),
+            TrendingScore.objects.filter(post_id=post_id),
+        )
+    )
+    removed, _ = Post.all_objects.filter(pk=post_id, deleted_at__isnull=False).delete()
+    logger.info('Reaped post %s (%s dependent rows)', post_id, deleted)
+    return deleted + (1 if removed else 0)
+
+
+def reap_user(user_id, batch_size=None):
+    """
+    Remove a soft-deleted account, its posts and every row referencing it.
+
+    Likes the user gave are removed with the matching like_count
+    decrements. Accounts that are missing or not soft-deleted are left
+    alone.
+
+    Returns:
+        int: Number of rows deleted, the user included
+    """
+    from notifications.models import Notification
+    from posts.models import Post, Comment, Like, Mention
+
+    User = get_user_model()
+    if not User.objects.filter(pk=user_id, deleted_at__isnull=False).exists():
+        return 0
+
+    deleted = 0
+    post_ids = Post.all_objects.filter(author_id=user_id).values_list('pk', flat=True)
+    for post_id in list(post_ids):
+        deleted += reap_post(post_id, batch_size)
+
+    deleted += _delete_likes_in_batches(Like._base_manager.filter(user_id=user_id), batch_size)
+
+    follows = User._meta.get_field('followers')
+    Follow = follows.remote_field.through
+    deleted += sum(
+        _delete_in_batches(queryset, batch_size)
+        for queryset in (
+            Comment._base_manager.filter(author_id=user_id),
+            Notification.objects.filter(Q(actor_id=user_id) | Q(recipient_id=user_id)),
+            Mention.objects.filter(user_id=user_id),
+            Follow.objects.filter(
+                Q(**{f'{follows.m2m_column_name()}': user_id})
+                | Q(**{f'{follows.m2m_reverse_name()}': user_id})
+            ),
+        )
+    )
+    removed, _ = User.objects.filter(pk=user_id, deleted_at__isnull=False).delete()
+    logger.info('Reaped user %s (%s dependent rows)', user_id, deleted)
+    return deleted + (1 if removed else 0)
+
+
+def reap_deleted(batch_size=None):
+    """
+    Finish purging every soft-deleted account and post.
+
+    Returns:
+        dict: Number of users, posts and rows reaped
+    """
+    from posts.models import Post
+
+    User = get_user_model()
+    counts = {'users': 0, 'posts': 0, 'rows': 0}
+    for user_id in list(User.objects.filter(deleted_at__isnull=False).values_list('pk', flat=True)):
+        counts['rows'] += reap_user(user_id, batch_size)
+        counts['users'] += 1
+    for post_id in list(Post.all_objects.filter(deleted_at__isnull=False).values_list('pk', flat=True)):
+        counts['rows'] += reap_post(post_id, batch_size)
+        counts['posts'] += 1
+    return counts
@@ -0,0 +1,155 @@
+"""
+Shared response cache with single-flight recomputation.
+
+Post and profile detail responses (PostViewSet.retrieve, UserDetailView)
+are cached for RESPONSE_CACHE_TTL seconds (30 by default, 0 disables the
+cache). When an entry expires on a popular object, concurrent requests
+must not all rebuild it at once, so every rebuild goes through
+``single_flight``:
+
+- one request takes a short lock with ``cache.add`` and recomputes
+- while it does, the others get the expired value, which is kept for a
+  further RESPONSE_CACHE_STALE_TTL seconds (stale-while-revalidate)
+- if there is no expired value to serve, the others wait up to
+  SINGLE_FLIGHT_WAIT seconds for the new one instead of querying
+
+Writes that change a cached response (editing a post, a comment on it,
+a follow, a profile update) call ``invalidate``, which moves the object
+to a new cache version. Viewer-specific fields are not cached; views fill
+them in per request (see CachedRetrieveMixin.personalize_cached_data).
+With a per-process cache (no REDIS_URL) requests are coalesced within
+each worker process only.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+# How long a recompute may hold the lock before others may try (seconds)
+SINGLE_FLIGHT_LOCK_TTL = 10
+
+# How long requests without a stale value wait for the recompute (seconds)
+SINGLE_FLIGHT_WAIT = 2.0
+
+# Interval between cache checks while waiting (seconds)
+SINGLE_FLIGHT_POLL = 0.02
+
+
+def response_cache_enabled():
+    """Whether RESPONSE_CACHE_TTL enables the response cache."""
+    return getattr(settings, 'RESPONSE_CACHE_TTL', 30) > 0
+
+
+def single_flight(key, compute, ttl=None, stale_ttl=None):
+    """
+    Return the cached value for key, recomputing it at most once at a time.
+
+    Args:
+        key: Cache key of the value
+        compute: Callable returning the value; exceptions are propagated
+            and nothing is cached
+        ttl: Seconds the value is fresh (default RESPONSE_CACHE_TTL)
+        stale_ttl: Seconds an expired value may still be served while it
+            is recomputed (default RESPONSE_CACHE_STALE_TTL)
+    """
+    ttl = settings.RESPONSE_CACHE_TTL if ttl is None else ttl
+    stale_ttl = settings.RESPONSE_CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+    entry = cache.get(key)
+    if entry is not None and entry[1] > time.time():
+        return entry[0]
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, True, SINGLE_FLIGHT_LOCK_TTL):
+        try:
+            value = compute()
+            cache.set(key, (value, time.time() + ttl), ttl + stale_ttl)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    # Someone else is recomputing: serve the stale value, or wait for theirs
+    if entry is not None:
+        return entry[0]
+    deadline = time.time() + SINGLE_FLIGHT_WAIT
+    while time.time() < deadline:
+        time.sleep(SINGLE_FLIGHT_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if cache.get(lock_key) is None:
+            # The recompute failed (e.g. 404) or was evicted; don't wait on
+            break
+    return compute()
+
+
+def _version_key(scope, pk):
+    return f'response_version:{scope}:{pk}'
+
+
+def _version_ttl():
+    # A version only has to outlive the entries cached under it; once it
+    # expires the next read starts a new one, which misses at worst
+    return settings.RESPONSE_CACHE_TTL + settings.RESPONSE_CACHE_STALE_TTL
+
+
+def object_version(scope, pk):
+    """Return the current cache version of an object."""
+    version_key = _version_key(scope, pk)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, time.time_ns(), _version_ttl())
+        version = cache.get(version_key)
+    return version
+
+
+def invalidate(scope, *pks):
+    """Make cached responses for the given objects unreachable."""
+    cache.set_many({_version_key(scope, pk): time.time_ns() for pk in pks}, _version_ttl())
+
+
+def response_cache_key(scope, pk, request):
+    """
+    Return the cache key of request's response for object pk.
+
+    The host and full path (with ?fields= etc.) are part of the key, as
+    responses may contain absolute URLs.
+    """
+    variant = hashlib.sha1(
+        f'{request.get_host()}{request.get_full_path()}'.encode()
+    ).hexdigest()
+    return f'response:{scope}:{pk}:{object_version(scope, pk)}:{variant}'
+
+
+class CachedRetrieveMixin:
+    """
+    Serve retrieve() from the response cache through single_flight.
+
+    Attributes:
+        response_cache_scope (str): Names the cached object type; pass the
+            same name to invalidate()
+    """
+
+    response_cache_scope = None
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return the cached response data, recomputing it single-flight.
+        """
+        if not response_cache_enabled():
+            return super().retrieve(request, *args, **kwargs)
+
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        key = response_cache_key(self.response_cache_scope, pk, request)
+        data = single_flight(key, lambda: dict(super(CachedRetrieveMixin, self).retrieve(
+            request, *args, **kwargs
+        ).data))
+        return Response(self.personalize_cached_data(request, pk, data))
+
+    def personalize_cached_data(self, request, pk, data):
+        """
+        Return data with viewer-specific fields set for request.user.
+        """
+        return data
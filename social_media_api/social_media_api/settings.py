@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'social_media_api.instrumentation.QueryMetricsMiddleware',  # Query count / latency per view
+    'social_media_api.compression.CompressionMiddleware',  # brotli/gzip for large responses
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise for static files
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -108,6 +110,42 @@ DATABASES = {
 # }
 
 
+# Password hashing
+# PASSWORD_HASHER_PROFILE selects the hasher for new and rehashed passwords:
+#   'scrypt' (default, no extra dependency), 'argon2' (requires:
+#   pip install argon2-cffi) or 'pbkdf2' (Django's default).
+# The other hashers stay installed so existing hashes still verify; they
+# are upgraded to the selected profile transparently on the next login.
+PASSWORD_HASHER_PROFILE = config('PASSWORD_HASHER_PROFILE', default='scrypt')
+
+_PASSWORD_HASHER_PROFILES = {
+    'scrypt': 'accounts.hashers.TunedScryptPasswordHasher',
+    'argon2': 'accounts.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in _PASSWORD_HASHER_PROFILES.items()
+    if profile != PASSWORD_HASHER_PROFILE
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Hasher cost parameters (changing them triggers a rehash on next login)
+SCRYPT_WORK_FACTOR = config('SCRYPT_WORK_FACTOR', default=2**14, cast=int)
+SCRYPT_BLOCK_SIZE = config('SCRYPT_BLOCK_SIZE', default=8, cast=int)
+SCRYPT_PARALLELISM = config('SCRYPT_PARALLELISM', default=1, cast=int)
+ARGON2_TIME_COST = config('ARGON2_TIME_COST', default=2, cast=int)
+ARGON2_MEMORY_COST = config('ARGON2_MEMORY_COST', default=65536, cast=int)
+ARGON2_PARALLELISM = config('ARGON2_PARALLELISM', default=2, cast=int)
+
+# Repeat logins from a known device send the one-time device_token from
+# their previous login instead of the password; it is checked against a
+# short-lived HMAC in the cache instead of re-running the password hasher
+# (see accounts/device_logins.py). Set to 0 to disable.
+LOGIN_DEVICE_CACHE_TTL = config('LOGIN_DEVICE_CACHE_TTL', default=900, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -170,6 +208,84 @@ MEDIA_ROOT = BASE_DIR / 'media'
 #     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 #     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{AWS_LOCATION}/'
 
+# Uploads are streamed to a temporary file in 64 KB chunks instead of
+# being buffered in memory, whatever their size
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Profile picture pipeline (see accounts/images.py)
+PROFILE_PICTURE_MAX_UPLOAD_SIZE = config('PROFILE_PICTURE_MAX_UPLOAD_SIZE', default=10 * 1024 * 1024, cast=int)
+PROFILE_PICTURE_SIZES = {'thumb': 64, 'small': 128, 'medium': 256}
+
+# Request instrumentation (see social_media_api/instrumentation.py)
+QUERY_METRICS_WINDOW = config('QUERY_METRICS_WINDOW', default=1000, cast=int)
+QUERY_METRICS_SERVER_TIMING = config('QUERY_METRICS_SERVER_TIMING', default=True, cast=bool)
+
+# Background tasks (see social_media_api/background.py)
+BACKGROUND_TASK_WORKERS = config('BACKGROUND_TASK_WORKERS', default=2, cast=int)
+BACKGROUND_TASKS_EAGER = config('BACKGROUND_TASKS_EAGER', default=False, cast=bool)
+
+# Monthly partition retention (see social_media_api/partitioning.py).
+# When set, the feed and notification list only read the last N months,
+# and `manage_partitions --detach` removes older notification partitions.
+# 0 keeps everything.
+PARTITION_RETENTION_MONTHS = config('PARTITION_RETENTION_MONTHS', default=0, cast=int)
+
+# Trending posts (see TrendingScoreManager in posts/models.py): engagement
+# loses half its weight every TRENDING_HALF_LIFE_HOURS, and posts with no
+# likes or comments in the last TRENDING_WINDOW_HOURS drop off the list.
+TRENDING_HALF_LIFE_HOURS = config('TRENDING_HALF_LIFE_HOURS', default=12, cast=float)
+TRENDING_WINDOW_HOURS = config('TRENDING_WINDOW_HOURS', default=72, cast=float)
+
+# Write-behind counters (see posts/counters.py): seconds like counts and
+# trending scores are buffered per process before one batched flush.
+# `reconcile_counters` repairs counts lost in a crash. 0 writes through.
+COUNTER_FLUSH_INTERVAL = config('COUNTER_FLUSH_INTERVAL', default=0, cast=float)
+
+# Outbox (see social_media_api/outbox.py): events relayed per transaction,
+# and failed deliveries of one event before the relay skips it.
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=500, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+
+# Feed cache (see posts/feed_cache.py): seconds the first /api/feed/ page
+# is cached per user; it is prewarmed after login and follow changes.
+# 0 disables the cache.
+FEED_CACHE_TTL = config('FEED_CACHE_TTL', default=60, cast=int)
+
+# Response cache (see social_media_api/response_cache.py): seconds post and
+# profile detail responses stay fresh, and how long an expired response may
+# still be served while one request rebuilds it. 0 disables the cache.
+RESPONSE_CACHE_TTL = config('RESPONSE_CACHE_TTL', default=30, cast=int)
+RESPONSE_CACHE_STALE_TTL = config('RESPONSE_CACHE_STALE_TTL', default=300, cast=int)
+
+# Soft delete (see social_media_api/reaper.py): rows removed per transaction
+# when the background reaper purges a deleted post or account.
+REAPER_BATCH_SIZE = config('REAPER_BATCH_SIZE', default=500, cast=int)
+
+# Threaded comments (see CommentQuerySet in posts/models.py): replies may
+# nest COMMENT_MAX_DEPTH levels below a top-level comment (at most 22, the
+# deepest path that fits the column).
+COMMENT_MAX_DEPTH = min(config('COMMENT_MAX_DEPTH', default=5, cast=int), 22)
+
+# Response compression (see social_media_api/compression.py): responses of
+# at least COMPRESSION_MIN_SIZE bytes are sent with brotli (requires:
+# pip install brotli) or gzip, whichever the client accepts.
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+
+# Admin changelists (see social_media_api/admin_utils.py): above this many
+# rows, PostgreSQL's planner estimate replaces COUNT(*) for pagination.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+
+# Bulk admin actions (see social_media_api/admin_jobs.py): selected rows
+# handled per chunk by the background job.
+ADMIN_JOB_CHUNK_SIZE = config('ADMIN_JOB_CHUNK_SIZE', default=1000, cast=int)
+# A running job whose last chunk finished longer ago than this is treated
+# as interrupted and resumed by run_admin_jobs; keep it well above the
+# time one chunk takes.
+ADMIN_JOB_STALE_SECONDS = config('ADMIN_JOB_STALE_SECONDS', default=600, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -178,6 +294,27 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom user model
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
+# Cache configuration
+# Used for throttling buckets and idempotency keys. Defaults to a
+# per-process local-memory cache; set REDIS_URL to share state across
+# workers (requires: pip install redis).
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'social-media-api',
+        }
+    }
+
 # Security Settings for Production
 # Configure these settings for production deployment
 SECURE_BROWSER_XSS_FILTER = config('SECURE_BROWSER_XSS_FILTER', default=True, cast=bool)
@@ -211,4 +348,28 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # Token-bucket throttling (see social_media_api/throttling.py).
+    # Rates are '<burst size>/<refill period>'; views opt into a scope
+    # with throttle_scope or TokenBucketThrottle.for_scope().
+    'DEFAULT_THROTTLE_CLASSES': [
+        'social_media_api.throttling.UserTokenBucketThrottle',
+        'social_media_api.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': config('THROTTLE_RATE_USER', default='1000/min'),
+        'anon': config('THROTTLE_RATE_ANON', default='200/min'),
+        'auth': config('THROTTLE_RATE_AUTH', default='30/min'),
+        'likes': config('THROTTLE_RATE_LIKES', default='60/min'),
+        'follows': config('THROTTLE_RATE_FOLLOWS', default='30/min'),
+    },
+    # orjson-backed JSON when installed (see social_media_api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'social_media_api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'social_media_api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
@@ -0,0 +1,117 @@
+"""
+Test utilities for catching N+1 query regressions.
+
+QueryScalingTestMixin walks the project's URLconf, requests every named
+endpoint under a prefix, and does it twice: once after seeding N rows and
+once after seeding 10N. If any endpoint's query count grows with the data,
+the test fails and names the endpoint and both counts. New endpoints are
+picked up automatically; one that needs URL kwargs the test doesn't know
+how to fill fails loudly, so it can't be skipped by accident.
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+
+def iter_url_patterns(patterns=None, namespace=None, route='', kwarg_names=()):
+    """
+    Yield (qualified_name, route, kwarg_names) for every named URL pattern.
+
+    ``route`` is the concatenated pattern text (e.g. ``api/^posts/$``),
+    good enough for prefix filtering. Patterns with DRF's ``format``
+    suffix kwarg are skipped, since they duplicate the plain route.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+
+    for pattern in patterns:
+        names = tuple(kwarg_names) + tuple(pattern.pattern.regex.groupindex)
+        full_route = route + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            child_namespace = namespace
+            if pattern.namespace:
+                child_namespace = (
+                    f'{namespace}:{pattern.namespace}' if namespace else pattern.namespace
+                )
+            yield from iter_url_patterns(
+                pattern.url_patterns, child_namespace, full_route, names
+            )
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            if 'format' in names:
+                continue
+            qualified = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield qualified, full_route, names
+
+
+class QueryScalingTestMixin:
+    """
+    Mixin for APITestCase classes that checks query counts stay flat.
+
+    Subclasses implement:
+        seed(count): create ``count`` more units of related data
+        url_kwargs(name, kwarg): value for a URL kwarg of endpoint ``name``
+
+    and may set:
+        endpoint_prefix: only endpoints whose path starts with this
+        excluded_endpoints: qualified URL names to skip
+        scaling_base / scaling_factor: N and the multiplier (10 by default)
+    """
+
+    endpoint_prefix = '/api/'
+    excluded_endpoints = ()
+    scaling_base = 2
+    scaling_factor = 10
+
+    def seed(self, count):
+        raise NotImplementedError('.seed() must be overridden')
+
+    def url_kwargs(self, name, kwarg):
+        raise NotImplementedError('.url_kwargs() must be overridden')
+
+    def get_endpoint_urls(self):
+        """
+        Return {qualified_name: url} for every endpoint under the prefix.
+        """
+        urls = {}
+        for name, route, kwarg_names in iter_url_patterns():
+            if name in self.excluded_endpoints:
+                continue
+            if not ('/' + route.replace('^', '')).startswith(self.endpoint_prefix):
+                continue
+            kwargs = {kwarg: self.url_kwargs(name, kwarg) for kwarg in kwarg_names}
+            urls[name] = reverse(name, kwargs=kwargs)
+        return urls
+
+    def count_queries(self, urls):
+        """
+        GET every URL and return {name: (status_code, query_count)}.
+        """
+        counts = {}
+        for name, url in urls.items():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            counts[name] = (response.status_code, len(context.captured_queries))
+        return counts
+
+    def assertQueriesDoNotScale(self):
+        """
+        Fail if any endpoint runs more queries after seeding 10x the data.
+        """
+        self.seed(self.scaling_base)
+        urls = self.get_endpoint_urls()
+        small = self.count_queries(urls)
+
+        self.seed(self.scaling_base * (self.scaling_factor - 1))
+        large = self.count_queries(urls)
+
+        regressions = [
+            f'{name} ({urls[name]}): {small[name][1]} queries at N={self.scaling_base}, '
+            f'{large[name][1]} at N={self.scaling_base * self.scaling_factor}'
+            for name in urls
+            if large[name][1] > small[name][1]
+        ]
+        self.assertFalse(regressions, 'Query count grows with data:\n' + '\n'.join(regressions))
+        return large
@@ -0,0 +1,728 @@
+"""
+Project-wide tests that span every app.
+
+QueryScalingTestCase requests each API endpoint with N and then 10N rows
+of related data and fails if any endpoint's query count grows, catching
+N+1 regressions (per-row comment counts, follower counts, related-field
+lookups) across the whole URLconf.
+
+FastListSerializerTestCase checks that the compiled list serializers
+render exactly what DRF's standard ListSerializer renders, and
+ResponseEncodingTestCase covers the orjson renderer/parser and response
+compression. AdminChangelistTestCase applies the same N-vs-10N check to
+the admin changelists, and AdminJobTestCase the bulk admin actions.
+ResponseCacheTestCase and SingleFlightConcurrencyTestCase cover the
+single-flight response cache, and OutboxTestCase the event outbox and
+its relay.
+"""
+
+import gzip
+import json
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+from posts.models import Post, Comment, Like, OutboxEvent
+from posts.serializers import PostListSerializer, PostSerializer, CommentSerializer
+from posts.tags import index_posts
+from social_media_api.admin_utils import EstimatedCountPaginator
+from social_media_api.compression import choose_encoding
+from social_media_api.outbox import HANDLERS, RELAY_LOCK_KEY, RELAY_LOCK_TTL, publish, relay_outbox
+from social_media_api.response_cache import invalidate, object_version, single_flight
+from social_media_api.renderers import ORJSONRenderer
+from social_media_api.testing import QueryScalingTestMixin
+
+User = get_user_model()
+
+
+class QueryScalingTestCase(QueryScalingTestMixin, APITestCase):
+    """
+    Every /api/ endpoint must run a constant number of queries.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username='viewer', password='testpass123')
+        self.client.force_authenticate(user=self.viewer)
+        self.seeded = 0
+
+    def seed(self, count):
+        """
+        Add ``count`` users, each mutually following the viewer and owning
+        a post (tagged #seeded, mentioning the viewer) with a comment and
+        a reply, a like and a notification to the viewer.
+        """
+        for _ in range(count):
+            self.seeded += 1
+            user = User.objects.create_user(
+                username=f'user{self.seeded}', password='testpass123'
+            )
+            self.viewer.following.add(user)
+            user.following.add(self.viewer)
+
+            self.post = Post.objects.create(
+                author=user, title=f'Post {self.seeded}', content='Content #seeded @viewer'
+            )
+            index_posts([self.post.pk])
+            self.comment = Comment.objects.create(post=self.post, author=user, content='Hi')
+            Comment.objects.create(
+                post=self.post, author=self.viewer, content='Hello', parent=self.comment
+            )
+            Like.objects.create(user=self.viewer, post=self.post)
+            self.notification = Notification.objects.create(
+                recipient=self.viewer, actor=user, verb='liked your post', target=self.post
+            )
+            self.user = user
+
+    def url_kwargs(self, name, kwarg):
+        """
+        Map URL kwargs to the most recently seeded objects.
+
+        A KeyError here means a new parameterized endpoint was added;
+        add it to the mapping so it is covered.
+        """
+        objects = {
+            'posts:post-detail': self.post,
+            'posts:post-comments': self.post,
+            'posts:post-threads': self.post,
+            'posts:like-post': self.post,
+            'posts:unlike-post': self.post,
+            'posts:comment-detail': self.comment,
+            'posts:comment-replies': self.comment,
+            'accounts:user-detail': self.user,
+            'accounts:follow-user': self.user,
+            'accounts:unfollow-user': self.user,
+            'notifications:mark-read': self.notification,
+        }
+        if name == 'posts:tag-posts':
+            return 'seeded'
+        return objects[name].pk
+
+    def test_query_counts_do_not_grow_with_data(self):
+        """
+        Test that no API endpoint has an N+1 query pattern.
+        """
+        counts = self.assertQueriesDoNotScale()
+
+        # Sanity check that the walk covered the main list endpoints
+        for name in ('posts:post-list', 'posts:feed', 'posts:comment-list', 'posts:tag-posts',
+                     'accounts:user-list', 'notifications:notification-list'):
+            self.assertIn(name, counts)
+            self.assertEqual(counts[name][0], 200)
+
+
+class FastListSerializerTestCase(APITestCase):
+    """
+    Fast list serializers must render byte-identical JSON.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fast', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.post = Post.objects.create(author=self.user, title='Fast', content='Lists')
+        root = Comment.objects.create(post=self.post, author=self.other, content='Root')
+        Comment.objects.create(post=self.post, author=self.user, content='Reply', parent=root)
+        Notification.objects.create(
+            recipient=self.user, actor=self.other, verb='liked your post', target=self.post
+        )
+        Notification.objects.create(recipient=self.user, actor=self.other, verb='waved')
+
+    def assertSameJSON(self, serializer_class, instances, **kwargs):
+        renderer = JSONRenderer()
+        instances = list(instances)
+        standard = serializers.ListSerializer(instances, child=serializer_class(**kwargs)).data
+        fast = serializer_class(instances, many=True, **kwargs).data
+        self.assertEqual(renderer.render(fast), renderer.render(standard))
+
+    def test_posts_comments_and_notifications(self):
+        """Test each fast serializer against the standard ListSerializer."""
+        annotated = Post.objects.with_comment_count().with_viewer_state(self.user)
+        self.assertSameJSON(PostListSerializer, annotated)
+        self.assertSameJSON(PostListSerializer, Post.objects.all())
+        self.assertSameJSON(CommentSerializer, Comment.objects.all())
+        self.assertSameJSON(NotificationSerializer, Notification.objects.all())
+
+    def test_nested_comments_use_fast_path(self):
+        """Test that nested comment lists render identically too."""
+        data = PostSerializer(Post.objects.with_comments().get(pk=self.post.pk)).data
+        expected = serializers.ListSerializer(
+            self.post.comments.all(), child=CommentSerializer()
+        ).data
+        self.assertEqual(data['comments'], expected)
+
+    def test_benchmark_command(self):
+        """Test that the serializer benchmark runs and confirms identical output."""
+        out = StringIO()
+        call_command('benchmark_serializers', rows=20, repeat=1, stdout=out)
+        self.assertEqual(out.getvalue().count('identical JSON'), 3)
+
+
+class ResponseEncodingTestCase(APITestCase):
+    """
+    orjson rendering/parsing and negotiated compression.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='encoder', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_orjson_renderer_matches_stdlib(self):
+        """Test that ORJSONRenderer output is byte-identical to JSONRenderer."""
+        data = {
+            'text': 'caf\u00e9 \u2028 line',
+            'lazy': gettext_lazy('Not found.'),
+            'when': timezone.now(),
+            'amount': Decimal('1.50'),
+            1: [None, True, 2.5],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_json_request_body_is_parsed(self):
+        """Test that JSON bodies go through the orjson parser."""
+        response = self.client.post(
+            '/api/posts/', {'title': 'JSON', 'content': 'Body'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post('/api/posts/', '{"title": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_choose_encoding(self):
+        """Test Accept-Encoding negotiation with q-values."""
+        self.assertEqual(choose_encoding('gzip, deflate', ('br', 'gzip')), 'gzip')
+        self.assertEqual(choose_encoding('gzip, br', ('br', 'gzip')), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip', ('br', 'gzip')), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0', ('gzip',)))
+        self.assertEqual(choose_encoding('*', ('gzip',)), 'gzip')
+        self.assertIsNone(choose_encoding('', ('gzip',)))
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_large_responses_are_compressed(self):
+        """Test that large responses are gzipped when the client accepts it."""
+        Post.objects.bulk_create([
+            Post(author=self.user, title=f'Post {i}', content='Long content ' * 40)
+            for i in range(10)
+        ])
+        response = self.client.get('/api/posts/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(body['results']), 10)
+
+        response = self.client.get('/api/posts/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_small_responses_are_not_compressed(self):
+        """Test that responses under the threshold are sent as-is."""
+        response = self.client.get('/api/posts/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_benchmark_command(self):
+        """Test that the response benchmark runs."""
+        out = StringIO()
+        call_command('benchmark_responses', posts=[2], comments=1, repeat=1, stdout=out)
+        self.assertIn('gzip', out.getvalue())
+
+
+class AdminChangelistTestCase(APITestCase):
+    """Test cases for admin changelist query counts and pagination."""
+
+    changelists = (
+        '/admin/posts/post/',
+        '/admin/posts/comment/',
+        '/admin/posts/like/',
+        '/admin/accounts/customuser/',
+        '/admin/notifications/notification/',
+    )
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        self.client.force_login(self.admin)
+        self.created = 0
+
+    def _add_rows(self, count):
+        for _ in range(count):
+            self.created += 1
+            user = User.objects.create_user(username=f'member{self.created}', password='x')
+            user.followers.add(self.admin)
+            post = Post.objects.create(author=user, title=f'Post {self.created}', content='Body')
+            Comment.objects.create(post=post, author=self.admin, content='Nice')
+            Like.objects.create(user=self.admin, post=post)
+            Notification.objects.create(recipient=user, actor=self.admin, verb='liked your post')
+
+    def _query_counts(self):
+        counts = {}
+        for url in self.changelists:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url] = len(queries)
+        return counts
+
+    def test_query_counts_do_not_grow_with_data(self):
+        """Test that changelist query counts are independent of row counts."""
+        self._add_rows(2)
+        small = self._query_counts()
+        self._add_rows(18)
+        self.assertEqual(self._query_counts(), small)
+
+    def test_author_filter_and_counts(self):
+        """Test the id filter and the annotated comment and follower counts."""
+        self._add_rows(2)
+        author = User.objects.get(username='member1')
+        response = self.client.get(f'/admin/posts/post/?author={author.pk}')
+        self.assertEqual([post.title for post in response.context['cl'].result_list], ['Post 1'])
+        self.assertEqual(response.context['cl'].result_list[0].comment_count, 1)
+
+        response = self.client.get('/admin/accounts/customuser/')
+        admin_row = next(user for user in response.context['cl'].result_list if user.pk == self.admin.pk)
+        self.assertEqual((admin_row.followers_count, admin_row.following_count), (0, 2))
+
+    def test_estimated_count_paginator(self):
+        """Test that planner estimates replace exact counts above the threshold."""
+        self._add_rows(3)
+        queryset = Post.objects.order_by('pk')
+        with mock.patch('social_media_api.admin_utils.estimate_count', return_value=None):
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+        with override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000), \
+                mock.patch('social_media_api.admin_utils.estimate_count', return_value=5000):
+            paginator = EstimatedCountPaginator(queryset, 2)
+            self.assertEqual(paginator.count, 5000)
+            self.assertEqual(len(paginator.page(2).object_list), 1)
+        with override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000), \
+                mock.patch('social_media_api.admin_utils.estimate_count', return_value=500):
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, ADMIN_JOB_CHUNK_SIZE=2)
+class AdminJobTestCase(APITestCase):
+    """Test cases for bulk admin actions run as chunked background jobs."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        self.member = User.objects.create_user(username='member', password='testpass123')
+        self.client.force_login(self.admin)
+        self.posts = [
+            Post.objects.create(author=self.member, title=f'Post {i}', content='Body')
+            for i in range(5)
+        ]
+
+    def _run_action(self, url, action, objects, **extra):
+        data = {'action': action, '_selected_action': [obj.pk for obj in objects], **extra}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data, follow=True)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_bulk_delete_posts(self):
+        """Test that posts are deleted with their dependents in chunks."""
+        from posts.models import AdminJob
+
+        cache.clear()
+        Like.objects.create(user=self.admin, post=self.posts[0])
+        Comment.objects.create(post=self.posts[1], author=self.admin, content='Hi')
+        detail_url = f'/api/posts/{self.posts[0].pk}/'
+        self.assertEqual(self.client.get(detail_url).status_code, 200)
+        response = self._run_action('/admin/posts/post/', 'delete_in_background', self.posts[:3])
+
+        self.assertContains(response, 'Follow its progress')
+        job = AdminJob.objects.get()
+        self.assertEqual((job.status, job.processed, job.total), (AdminJob.DONE, 3, 3))
+        self.assertContains(self.client.get(f'/admin/posts/adminjob/{job.pk}/change/'), '3 / 3 (100%)')
+        self.assertEqual(Post.all_objects.count(), 2)
+        self.assertFalse(Like.objects.exists())
+        self.assertFalse(Comment._base_manager.exists())
+        self.assertEqual(
+            sorted(event.payload['post_id'] for event in OutboxEvent.objects.filter(topic='post.deleted')),
+            [post.pk for post in self.posts[:3]]
+        )
+        self.assertEqual(self.client.get(detail_url).status_code, 404)
+
+        # The in-request delete action is replaced
+        response = self.client.get('/admin/posts/post/')
+        self.assertNotContains(response, 'value="delete_selected"')
+
+    def test_mark_read_and_reassign(self):
+        """Test the notification and reassign-author actions."""
+        notifications = [
+            Notification.objects.create(recipient=self.member, actor=self.admin, verb='liked your post')
+            for _ in range(3)
+        ]
+        self._run_action('/admin/notifications/notification/', 'mark_read_in_background', notifications)
+        self.assertFalse(Notification.objects.filter(read=False).exists())
+
+        cache.clear()
+        comment = Comment.objects.create(post=self.posts[1], author=self.member, content='Hi')
+        post_url = f'/api/posts/{self.posts[0].pk}/'
+        comment_url = f'/api/posts/{self.posts[1].pk}/'
+        self.assertEqual(self.client.get(post_url).data['author_id'], self.member.pk)
+        self.client.get(comment_url)
+
+        self._run_action('/admin/posts/post/', 'reassign_author_in_background', self.posts,
+                         new_author='admin')
+        self._run_action('/admin/posts/comment/', 'reassign_author_in_background', [comment],
+                         new_author='admin')
+        self.assertEqual(set(Post.objects.values_list('author_id', flat=True)), {self.admin.pk})
+        self.assertEqual(OutboxEvent.objects.filter(topic='post.updated').count(), 5)
+        self.assertEqual(self.client.get(post_url).data['author_id'], self.admin.pk)
+        self.assertEqual(self.client.get(comment_url).data['comments'][0]['author'], 'admin')
+
+        response = self._run_action('/admin/posts/post/', 'reassign_author_in_background',
+                                    self.posts, new_author='nobody')
+        self.assertContains(response, 'username of an active user')
+
+    def test_command_resumes_interrupted_job(self):
+        """Test that run_admin_jobs finishes a job from its saved position."""
+        from posts.models import AdminJob
+
+        ids = [post.pk for post in self.posts]
+        job = AdminJob.objects.create(
+            content_type=ContentType.objects.get_for_model(Post), action='delete',
+            object_ids=ids, total=len(ids), processed=2, status=AdminJob.RUNNING,
+        )
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('run_admin_jobs', stdout=out)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AdminJob.DONE, 5))
+        self.assertEqual(list(Post.all_objects.values_list('pk', flat=True).order_by('pk')), ids[:2])
+        self.assertIn('Ran 1 job(s)', out.getvalue())
+
+    def test_live_running_job_is_not_resumed(self):
+        """Test that only running jobs with a stale heartbeat are taken over."""
+        from posts.models import AdminJob
+
+        ids = [post.pk for post in self.posts]
+        job = AdminJob.objects.create(
+            content_type=ContentType.objects.get_for_model(Post), action='delete',
+            object_ids=ids, total=len(ids), processed=2, status=AdminJob.RUNNING,
+            heartbeat_at=timezone.now(),
+        )
+        call_command('run_admin_jobs', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AdminJob.RUNNING, 2))
+        self.assertEqual(Post.all_objects.count(), 5)
+
+        AdminJob.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+        call_command('run_admin_jobs', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AdminJob.DONE, 5))
+
+    def test_worker_stops_when_job_is_taken_over(self):
+        """Test that a worker whose lease was taken over stops after its chunk."""
+        from posts.models import AdminJob
+        from social_media_api import admin_jobs
+
+        job = AdminJob.objects.create(
+            content_type=ContentType.objects.get_for_model(Post), action='mark_read',
+            object_ids=list(range(1, 7)), total=6,
+        )
+        chunks = []
+
+        def take_over(model, ids, params):
+            chunks.append(ids)
+            # Another worker claims the job while this chunk runs
+            AdminJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now())
+
+        with mock.patch.dict(admin_jobs.HANDLERS, {('posts.post', 'mark_read'): take_over}):
+            self.assertIsNone(admin_jobs.run_admin_job(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(chunks, [[1, 2]])
+        self.assertEqual((job.status, job.processed), (AdminJob.RUNNING, 0))
+
+
+class ResponseCacheTestCase(APITestCase):
+    """Test cases for cached post and profile detail responses."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Cached', content='Body')
+
+    def test_cached_post_is_personalized_and_invalidated(self):
+        """Test that hits skip the post query and writes refresh the entry."""
+        self.client.force_authenticate(user=self.reader)
+        url = f'/api/posts/{self.post.id}/'
+        self.client.get(url)
+        Like.objects.create(user=self.reader, post=self.post)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(response.data['liked_by_me'])
+
+        self.client.force_authenticate(user=self.author)
+        self.assertFalse(self.client.get(url).data['liked_by_me'])
+        self.client.patch(url, {'title': 'Edited'})
+        self.client.post('/api/comments/', {'post': self.post.id, 'content': 'New'})
+        response = self.client.get(url)
+        self.assertEqual(response.data['title'], 'Edited')
+        self.assertEqual(len(response.data['comments']), 1)
+
+    def test_cached_post_is_invalidated_by_likes_and_author_deletion(self):
+        """Test that like counts and author soft-deletes reach cached posts."""
+        self.client.force_authenticate(user=self.reader)
+        url = f'/api/posts/{self.post.id}/'
+        self.assertEqual(self.client.get(url).data['like_count'], 0)
+
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        self.assertEqual(self.client.get(url).data['like_count'], 1)
+        self.client.post(f'/api/posts/{self.post.id}/unlike/')
+        self.assertEqual(self.client.get(url).data['like_count'], 0)
+
+        self.author.soft_delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_cached_profile_is_invalidated_by_follow(self):
+        """Test that follows show up in both users' cached profiles."""
+        self.client.force_authenticate(user=self.reader)
+        url = f'/api/users/{self.author.id}/'
+        self.assertEqual(self.client.get(url).data['followers_count'], 0)
+        self.client.post(f'/api/follow/{self.author.id}/')
+        self.assertEqual(self.client.get(url).data['followers_count'], 1)
+
+    @override_settings(RESPONSE_CACHE_TTL=30, RESPONSE_CACHE_STALE_TTL=300)
+    def test_version_keys_expire(self):
+        """Test that version keys only live as long as the entries under them."""
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            object_version('post', self.post.pk)
+        self.assertEqual(add.call_args.args[2], 330)
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            invalidate('post', self.post.pk)
+        self.assertEqual(set_many.call_args.args[1], 330)
+
+    def test_stale_value_served_while_recomputing(self):
+        """Test that an expired entry is returned while another worker holds the lock."""
+        cache.set('flight', ('old', time.time() - 1), 60)
+        cache.add('flight:lock', True, 10)
+
+        def compute():
+            raise AssertionError('computed while locked')
+
+        self.assertEqual(single_flight('flight', compute, ttl=5, stale_ttl=60), 'old')
+
+        cache.delete('flight:lock')
+        self.assertEqual(single_flight('flight', lambda: 'new', ttl=5, stale_ttl=60), 'new')
+        self.assertEqual(single_flight('flight', compute, ttl=5, stale_ttl=60), 'new')
+
+
+class SingleFlightConcurrencyTestCase(TransactionTestCase):
+    """Concurrent requests for an uncached post hit the database once."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Hot', content='Body')
+
+    def test_concurrent_misses_query_once(self):
+        """Test that eight simultaneous misses run the post query once."""
+        from django.db.backends.utils import CursorWrapper
+
+        post_selects = []
+        execute = CursorWrapper.execute
+
+        def counting_execute(cursor, sql, params=None):
+            if sql.startswith('SELECT') and 'FROM "posts_post"' in sql:
+                post_selects.append(sql)
+                time.sleep(0.2)  # keep the recompute in flight
+            return execute(cursor, sql, params)
+
+        barrier = threading.Barrier(8)
+        results = []
+
+        def request():
+            from rest_framework.test import APIClient
+            from django.db import connections
+            try:
+                barrier.wait()
+                response = APIClient().get(f'/api/posts/{self.post.id}/')
+                results.append((response.status_code, response.data['title']))
+            finally:
+                connections.close_all()
+
+        with mock.patch.object(CursorWrapper, 'execute', counting_execute):
+            threads = [threading.Thread(target=request) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results, [(200, 'Hot')] * 8)
+        self.assertEqual(len(post_selects), 1)
+
+
+class OutboxTestCase(APITestCase):
+    """Writes append outbox events that the relay delivers in order."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Hot', content='Body')
+        self.client.force_authenticate(user=self.reader)
+
+    def _topics(self, **filters):
+        return list(OutboxEvent.objects.filter(**filters).values_list('topic', flat=True))
+
+    def test_writes_publish_events_in_order(self):
+        """Test that like, comment and follow writes append events, not notifications."""
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        self.client.post('/api/comments/', {'post': self.post.id, 'content': 'Nice'})
+        self.client.post(f'/api/follow/{self.author.id}/')
+        self.client.post(f'/api/posts/{self.post.id}/unlike/')
+
+        self.assertEqual(
+            self._topics(), ['like.created', 'comment.created', 'follow.created', 'like.deleted']
+        )
+        self.assertEqual(OutboxEvent.objects.first().payload, {
+            'post_id': self.post.id, 'user_id': self.reader.id, 'post_author_id': self.author.id,
+        })
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(relay_outbox(), 4)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('verb', flat=True)),
+            ['commented on your post', 'liked your post', 'started following you']
+        )
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(relay_outbox(), 0)
+
+    def test_rolled_back_write_publishes_nothing(self):
+        """Test that an event only exists if its transaction commits."""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Like.objects.add_like(self.reader, self.post.pk)
+                publish('like.created', post_id=self.post.pk, user_id=self.reader.pk,
+                        post_author_id=self.author.pk)
+                raise RuntimeError('rollback')
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertFalse(Like.objects.exists())
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_relay_runs_after_commit(self):
+        """Test that events are delivered in the background once the write commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/follow/{self.author.id}/')
+        self.assertTrue(Notification.objects.filter(
+            recipient=self.author, verb='started following you'
+        ).exists())
+        self.assertEqual(self._topics(processed_at__isnull=True), [])
+
+    def test_runs_of_one_topic_are_delivered_together(self):
+        """Test that consecutive events of a topic reach the consumer in one call."""
+        calls = []
+        for i in range(3):
+            publish('post.updated', post_id=i, author_id=self.author.pk)
+        publish('like.deleted', post_id=1, user_id=2, post_author_id=3)
+        publish('post.updated', post_id=9, author_id=self.author.pk)
+
+        with mock.patch.dict(HANDLERS, {'post.updated': [calls.append]}):
+            self.assertEqual(relay_outbox(), 5)
+        self.assertEqual(
+            [[payload['post_id'] for payload in run] for run in calls], [[0, 1, 2], [9]]
+        )
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_failing_event_holds_back_later_events(self):
+        """Test that a failure stops the stream until the event is given up on."""
+        def fail_on_two(payloads):
+            if any(payload['post_id'] == 2 for payload in payloads):
+                raise ValueError('boom')
+            delivered.extend(payload['post_id'] for payload in payloads)
+
+        delivered = []
+        for i in range(1, 5):
+            publish('post.updated', post_id=i, author_id=self.author.pk)
+
+        with mock.patch.dict(HANDLERS, {'post.updated': [fail_on_two]}), \
+                self.assertLogs('social_media_api.outbox', 'ERROR'):
+            self.assertEqual(relay_outbox(), 1)
+            failed = OutboxEvent.objects.get(payload__post_id=2)
+            self.assertEqual((failed.attempts, failed.processed_at), (1, None))
+            self.assertIn('ValueError: boom', failed.error)
+
+            # Second failure reaches OUTBOX_MAX_ATTEMPTS: skipped, rest delivered
+            self.assertEqual(relay_outbox(), 3)
+        self.assertEqual(delivered, [1, 3, 4])
+        self.assertEqual(OutboxEvent.objects.get(payload__post_id=2).attempts, 2)
+
+    def test_relay_refreshes_and_only_releases_its_own_lock(self):
+        """Test that a relay whose lock expired stops and leaves the new holder's lock."""
+        for i in range(4):
+            publish('post.updated', post_id=i, author_id=self.author.pk)
+
+        def expire_lock(payloads):
+            if payloads[0]['post_id'] == 1:
+                # The lock expired and another relay took it
+                cache.set(RELAY_LOCK_KEY, 'other-relay', RELAY_LOCK_TTL)
+
+        with mock.patch.dict(HANDLERS, {'post.updated': [expire_lock]}), \
+                mock.patch.object(cache, 'touch', wraps=cache.touch) as touch, \
+                self.assertLogs('social_media_api.outbox', 'WARNING'):
+            self.assertEqual(relay_outbox(batch_size=1), 2)
+        touch.assert_called_once_with(RELAY_LOCK_KEY, RELAY_LOCK_TTL)
+        self.assertEqual(cache.get(RELAY_LOCK_KEY), 'other-relay')
+        self.assertEqual(OutboxEvent.objects.filter(processed_at__isnull=True).count(), 2)
+
+    def test_relay_outbox_command_prunes_old_events(self):
+        """Test that the command relays pending events and prunes old ones."""
+        publish('post.deleted', post_id=1, author_id=self.author.pk)
+        old = OutboxEvent.objects.create(
+            topic='post.deleted', payload={}, processed_at=timezone.now() - timedelta(days=8)
+        )
+        out = StringIO()
+        call_command('relay_outbox', stdout=out)
+        self.assertIn('✓ Relayed 1 event(s)', out.getvalue())
+        self.assertIn('✓ Pruned 1 processed event(s)', out.getvalue())
+        self.assertFalse(OutboxEvent.objects.filter(pk=old.pk).exists())
+
+    def test_relay_outbox_loop_prunes_while_running(self):
+        """Test that --loop prunes every --prune-every polls, not only on exit."""
+        from posts.management.commands import relay_outbox as command
+
+        polls = []
+
+        def sleep(seconds):
+            polls.append(seconds)
+            if len(polls) == 4:
+                raise KeyboardInterrupt
+
+        with mock.patch.object(command.time, 'sleep', sleep), \
+                mock.patch.object(command, 'prune_outbox', return_value=1) as prune:
+            out = StringIO()
+            call_command('relay_outbox', '--loop', '--prune-every', '2', stdout=out)
+        # After polls 2 and 4, then once on exit
+        self.assertEqual(prune.call_count, 3)
+        self.assertIn('✓ Pruned 3 processed event(s)', out.getvalue())
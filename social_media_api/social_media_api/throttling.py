@@ -0,0 +1,203 @@
+"""
+Token-bucket request throttling shared by all apps.
+
+Each (scope, client) pair owns a bucket holding up to N tokens that refill
+continuously at N per period, where N/period is the scope's rate from
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] (e.g. '60/min'). A request spends
+one token; when the bucket is empty it is rejected with 429 before the view
+runs any queries.
+
+Bucket state is one cache entry holding the tokens left and the time they
+were counted. Each request first refills the bucket for the time elapsed,
+capped at N, so an idle client can burst at most N requests. The entry
+expires one period after the last request, by which time the bucket would
+be full anyway.
+
+The refill-and-spend step is atomic, so concurrent workers never spend
+the same token twice:
+
+- Redis (REDIS_URL set): one Lua script runs on the server, which shares
+  buckets across workers
+- local memory (the default): buckets are per process, and a process-wide
+  lock serialises updates
+- any other backend: a per-bucket ``cache.add`` lock; a request that
+  cannot take it within BUCKET_LOCK_WAIT is rejected rather than run
+  unlocked
+"""
+
+import threading
+import time
+import uuid
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.utils.connection import ConnectionProxy
+from rest_framework.throttling import SimpleRateThrottle
+
+# Seconds a bucket update may hold its lock, and how long to wait for it
+BUCKET_LOCK_TTL = 1
+BUCKET_LOCK_WAIT = 0.05
+
+# Refill and spend in one step on the Redis server. Numbers travel as
+# strings, since Redis truncates Lua numbers to integers.
+SPEND_SCRIPT = """
+local n, period, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens, counted_at = tonumber(state[1]), tonumber(state[2])
+if tokens == nil then
+    tokens, counted_at = n, now
+end
+tokens = math.min(n, tokens + math.max(now - counted_at, 0) * n / period)
+local allowed = 0
+if tokens >= 1 then
+    tokens, allowed = tokens - 1, 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(period))
+return {allowed, tostring(tokens)}
+"""
+
+_local_lock = threading.Lock()
+_spend_script = None
+
+
+def _backend(cache):
+    # DRF's default cache is a proxy; the type checks need the backend
+    return cache._connections[cache._alias] if isinstance(cache, ConnectionProxy) else cache
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token-bucket throttle keyed by user id, or client IP for anonymous users.
+
+    The scope comes from the view's ``throttle_scope`` attribute, falling
+    back to the class ``scope``. Views without a scope are not throttled.
+    Use ``TokenBucketThrottle.for_scope('likes')`` with the
+    ``@throttle_classes`` decorator on function-based views.
+    """
+
+    cache_format = 'throttle_bucket_%(scope)s_%(ident)s'
+
+    def __init__(self):
+        # Rate lookup is deferred until the view (and its scope) is known
+        self.wait_seconds = None
+
+    @classmethod
+    def for_scope(cls, scope):
+        """Return a subclass of this throttle bound to a fixed scope."""
+        name = f'{cls.__name__}_{scope}'
+        return type(name, (cls,), {'scope': scope})
+
+    def get_scope(self, request, view):
+        """Return the rate scope for this request, or None to skip throttling."""
+        return getattr(view, 'throttle_scope', None) or self.scope
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        """
+        Spend one token from the client's bucket, or reject the request.
+        """
+        self.scope = self.get_scope(request, view)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.num_requests is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        backend = _backend(self.cache)
+        if isinstance(backend, RedisCache):
+            allowed, tokens = self._spend_in_redis(backend, key)
+        elif isinstance(backend, LocMemCache):
+            with _local_lock:
+                allowed, tokens = self._spend(key)
+        else:
+            allowed, tokens = self._spend_with_cache_lock(key)
+        if allowed:
+            return True
+
+        self.wait_seconds = max(1 - tokens, 0) * self.duration / self.num_requests
+        return False
+
+    def _spend(self, key):
+        """
+        Refill the bucket and take a token; the caller makes this atomic.
+
+        Returns:
+            tuple: (whether a token was spent, tokens left)
+        """
+        now = self.timer()
+        tokens, counted_at = self.cache.get(key, (self.num_requests, now))
+        tokens = min(
+            self.num_requests,
+            tokens + max(now - counted_at, 0) * self.num_requests / self.duration
+        )
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.cache.set(key, (tokens, now), self.duration)
+        return allowed, tokens
+
+    def _spend_in_redis(self, backend, key):
+        global _spend_script
+
+        client = backend._cache.get_client(write=True)
+        if _spend_script is None:
+            _spend_script = client.register_script(SPEND_SCRIPT)
+        allowed, tokens = _spend_script(
+            keys=[backend.make_and_validate_key(key)],
+            args=[self.num_requests, self.duration, repr(self.timer())],
+            client=client,
+        )
+        return bool(allowed), float(tokens)
+
+    def _spend_with_cache_lock(self, key):
+        """
+        Spend under a per-bucket cache lock, failing closed.
+
+        If the lock stays taken for BUCKET_LOCK_WAIT, the request is
+        rejected as if the bucket were empty. The lock holds a random
+        token, so an update that outlived BUCKET_LOCK_TTL doesn't release
+        the lock a later request has taken.
+        """
+        lock_key = f'{key}_lock'
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + BUCKET_LOCK_WAIT
+        while not self.cache.add(lock_key, owner, BUCKET_LOCK_TTL):
+            if time.monotonic() >= deadline:
+                return False, 0
+            time.sleep(0.001)
+        try:
+            return self._spend(key)
+        finally:
+            if self.cache.get(lock_key) == owner:
+                self.cache.delete(lock_key)
+
+    def wait(self):
+        """Seconds until the next token is available."""
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Global per-user bucket applied to every API view.
+
+    Authenticated users draw from the 'user' scope and anonymous clients
+    from the 'anon' scope, independently of any per-view scope.
+    """
+
+    def get_scope(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return 'user'
+        return 'anon'
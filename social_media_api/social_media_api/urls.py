@@ -19,7 +19,11 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .instrumentation import metrics_view
+
 urlpatterns = [
+    # Staff-only per-view query/latency metrics (before the admin catch-all)
+    path('admin/metrics/', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
     path('api/', include('posts.urls')),